@@ -12,6 +12,10 @@ ob_start();
 
 require_once("word_processor.php");
 
+// Batch state (see handleBatchAPI)
+$API_BATCH_MODE = false;
+$API_BATCH_PROCESSORS = [];
+
 // Get the request path
 $request = $_SERVER['REQUEST_URI'];
 $path = parse_url($request, PHP_URL_PATH);
@@ -33,34 +37,156 @@ if (empty($segments)) {
 $category = $segments[0] ?? '';
 $action = $segments[1] ?? '';
 
+// POST api.php/batch runs several operations in one request
+if ($category === 'batch') {
+    handleBatchAPI();
+}
+
 // Guard against pathological query sizes while keeping normal inputs unaffected.
 enforceRequestSizeLimits();
 
+routeApiRequest($category, $action);
+
 // Route based on category/action pattern
-switch ($category) {
-    case 'characters':
-        handleCharacterAPIs($action);
-        break;
-    case 'text':
-        handleTextAPIs($action);
-        break;
-    case 'analysis':
-        handleAnalysisAPIs($action);
-        break;
-    case 'comparison':
-        handleComparisonAPIs($action);
-        break;
-    case 'validation':
-        handleValidationAPIs($action);
-        break;
-    case 'utility':
-        handleUtilityAPIs($action);
-        break;
-    case 'auth':
-        handleAuthAPIs($action);
-        break;
-    default:
-        sendResponse(404, "API category not found: $category", null, null, null);
+function routeApiRequest($category, $action) {
+    switch ($category) {
+        case 'characters':
+            handleCharacterAPIs($action);
+            break;
+        case 'text':
+            handleTextAPIs($action);
+            break;
+        case 'analysis':
+            handleAnalysisAPIs($action);
+            break;
+        case 'comparison':
+            handleComparisonAPIs($action);
+            break;
+        case 'validation':
+            handleValidationAPIs($action);
+            break;
+        case 'utility':
+            handleUtilityAPIs($action);
+            break;
+        case 'auth':
+            handleAuthAPIs($action);
+            break;
+        default:
+            sendResponse(404, "API category not found: $category", null, null, null);
+    }
+}
+
+// ── Batch support ─────────────────────────────────────────────────────
+// While a batch runs, sendResponse() throws ApiBatchItemResult instead of
+// writing output and exiting, so each operation's response can be collected.
+// Word processors are memoized per (string, language) so each distinct
+// input is parsed into logical characters only once per batch.
+
+class ApiBatchItemResult extends Exception {
+    public $payload;
+
+    public function __construct($payload) {
+        parent::__construct($payload['message'] ?? '');
+        $this->payload = $payload;
+    }
+}
+
+function getWordProcessor($string, $language) {
+    global $API_BATCH_MODE, $API_BATCH_PROCESSORS;
+
+    if (!$API_BATCH_MODE) {
+        return new wordProcessor($string, $language);
+    }
+
+    $key = strtolower(trim((string)$language)) . '|' . $string;
+    if (!isset($API_BATCH_PROCESSORS[$key])) {
+        $API_BATCH_PROCESSORS[$key] = new wordProcessor($string, $language);
+    }
+    return $API_BATCH_PROCESSORS[$key];
+}
+
+function handleBatchAPI() {
+    global $API_BATCH_MODE, $API_BATCH_PROCESSORS;
+
+    if (($_SERVER['REQUEST_METHOD'] ?? 'GET') !== 'POST') {
+        sendResponse(405, "Batch API requires POST with a JSON array of operations", null, null, null);
+    }
+
+    $payload = json_decode(file_get_contents('php://input'), true);
+    // Accept either a bare array or {"operations": [...]}
+    if (is_array($payload) && isset($payload['operations'])) {
+        $payload = $payload['operations'];
+    }
+    if (!is_array($payload) || array_values($payload) !== $payload) {
+        sendResponse(400, "Invalid batch body: expected a JSON array of {category, action, params}", null, null, null);
+    }
+
+    $maxOps = (int)(getenv('API_MAX_BATCH_OPERATIONS') ?: 200);
+    if ($maxOps <= 0) {
+        $maxOps = 200;
+    }
+    if (count($payload) > $maxOps) {
+        sendResponse(413, "Too many batch operations (max $maxOps)", null, null, null);
+    }
+
+    $originalGet = $_GET;
+    $API_BATCH_MODE = true;
+    $API_BATCH_PROCESSORS = [];
+    $results = [];
+
+    foreach ($payload as $index => $op) {
+        $category = is_array($op) ? (string)($op['category'] ?? '') : '';
+        $action = is_array($op) ? (string)($op['action'] ?? '') : '';
+        $params = (is_array($op) && is_array($op['params'] ?? null)) ? $op['params'] : [];
+
+        $item = null;
+        if ($category === '' || $action === '') {
+            $item = batchItemPayload(400, "Missing category or action", null, null, null);
+        } elseif (in_array($category, ['auth', 'batch'], true)) {
+            $item = batchItemPayload(400, "API category not allowed in batch: $category", null, null, null);
+        } else {
+            // Handlers read their inputs from $_GET
+            $_GET = [];
+            foreach ($params as $key => $value) {
+                $_GET[$key] = is_array($value) ? $value : (string)$value;
+            }
+
+            try {
+                enforceRequestSizeLimits();
+                routeApiRequest($category, $action);
+                $item = batchItemPayload(500, "Operation produced no response", null, null, null);
+            } catch (ApiBatchItemResult $r) {
+                $item = $r->payload;
+            } catch (Throwable $e) {
+                $item = batchItemPayload(500, "Operation failed: " . $e->getMessage(), null, null, null);
+            }
+        }
+
+        $results[] = array_merge(['index' => $index, 'category' => $category, 'action' => $action], $item);
+    }
+
+    $parsedCount = count($API_BATCH_PROCESSORS);
+    $_GET = $originalGet;
+    $API_BATCH_MODE = false;
+    $API_BATCH_PROCESSORS = [];
+
+    sendResponse(200, "Batch processed", null, null, [
+        'count' => count($results),
+        'parsed_strings' => $parsedCount,
+        'results' => $results,
+    ]);
+}
+
+function batchItemPayload($code, $message, $string, $language, $data) {
+    return [
+        'response_code' => $code,
+        'message' => $message,
+        'string' => $string,
+        'language' => $language,
+        'success' => ($code >= 200 && $code < 300),
+        'result' => $data,
+        'error' => ($code >= 400) ? $message : null
+    ];
 }
 
 function handleCharacterAPIs($action) {
@@ -78,7 +204,7 @@ function handleCharacterAPIs($action) {
         return;
     }
     
-    $processor = new wordProcessor($string, $language);
+    $processor = getWordProcessor($string, $language);
     
     switch ($action) {
         case 'base':
@@ -143,7 +269,7 @@ function handleTextAPIs($action) {
         return;
     }
     
-    $processor = new wordProcessor($string, $language);
+    $processor = getWordProcessor($string, $language);
     
     switch ($action) {
         case 'length':
@@ -193,7 +319,7 @@ function handleAnalysisAPIs($action) {
         return;
     }
     
-    $processor = new wordProcessor($string, $language);
+    $processor = getWordProcessor($string, $language);
     
     switch ($action) {
         case 'is-palindrome':
@@ -276,7 +402,7 @@ function handleAnalysisAPIs($action) {
         case 'unique-intersecting-rank':
             $input2 = $_GET['input2'] ?? '';
             // Convert input2 to logical characters array for comparison
-            $processor2 = new wordProcessor($input2, $language);
+            $processor2 = getWordProcessor($input2, $language);
             $logicalChars2 = $processor2->getLogicalChars();
             $result = $processor->getUniqueIntersectingRank($logicalChars2);
             sendResponse(200, "Unique intersecting rank calculated", $string, $language, $result);
@@ -285,7 +411,7 @@ function handleAnalysisAPIs($action) {
         case 'unique-intersecting-chars':
             $input2 = $_GET['input2'] ?? '';
             // Convert input2 to logical characters array for comparison
-            $processor2 = new wordProcessor($input2, $language);
+            $processor2 = getWordProcessor($input2, $language);
             $logicalChars2 = $processor2->getLogicalChars();
             $result = $processor->getUniqueIntersectingLogicalChars($logicalChars2);
             sendResponse(200, "Unique intersecting logical characters calculated", $string, $language, $result);
@@ -322,7 +448,7 @@ function handleComparisonAPIs($action) {
         return;
     }
     
-    $processor = new wordProcessor($string, $language);
+    $processor = getWordProcessor($string, $language);
     
     switch ($action) {
         case 'equals':
@@ -368,7 +494,7 @@ function handleComparisonAPIs($action) {
                 return;
             }
 
-            $processor = new wordProcessor($string, $resolvedLanguage);
+            $processor = getWordProcessor($string, $resolvedLanguage);
             $result = $processor->indexOf($input2);
 
             sendResponse(200, "Index found", $string, $resolvedLanguage, $result);
@@ -387,7 +513,7 @@ function handleValidationAPIs($action) {
         return;
     }
     
-    $processor = new wordProcessor($string, $language);
+    $processor = getWordProcessor($string, $language);
 
     $parseInput2List = function (string $input2): array {
         if ($input2 === '') {
@@ -532,13 +658,13 @@ function handleUtilityAPIs($action) {
                 return;
             }
 
-            $processor = new wordProcessor($string, $resolvedLanguage);
+            $processor = getWordProcessor($string, $resolvedLanguage);
             $result = $processor->indexOf($input2);
 
             sendResponse(200, "Index found", $string, $resolvedLanguage, $result);
             return;
         case 'language':
-            $processor = new wordProcessor($string, '');
+            $processor = getWordProcessor($string, '');
             $result = $processor->getLangForString();
             sendResponse(200, "Language detected", $string, null, $result);
             break;
@@ -551,7 +677,7 @@ function handleUtilityAPIs($action) {
                 return;
             }
 
-            $processor = new wordProcessor($string, $resolvedLanguage);
+            $processor = getWordProcessor($string, $resolvedLanguage);
 
             if ($action === 'length-no-spaces') {
                 $result = $processor->getLengthNoSpaces($string);
@@ -685,6 +811,13 @@ function enforceRequestSizeLimits() {
 }
 
 function sendResponse($code, $message, $string, $language, $data) {
+    global $API_BATCH_MODE;
+
+    // Inside a batch, hand the response back to handleBatchAPI() instead of exiting
+    if ($API_BATCH_MODE) {
+        throw new ApiBatchItemResult(batchItemPayload($code, $message, $string, $language, $data));
+    }
+
     // Clean any previous output
     $output = ob_get_clean();
     
@@ -483,6 +483,20 @@ if ($selectedChoice === '' && $firstEnabledChoice !== '') {
                 animation-delay: 0.4s;
             }
 
+            .chat-tool-status {
+                font-size: 0.8rem;
+                color: #6b7280;
+                margin-bottom: 4px;
+            }
+
+            .chat-tool-status .done {
+                color: #2e7d32;
+            }
+
+            .chat-stream-text {
+                white-space: pre-wrap;
+            }
+
             @keyframes typing-bounce {
                 0%, 80%, 100% { transform: scale(0.6); opacity: 0.6; }
                 40% { transform: scale(1); opacity: 1; }
@@ -778,8 +778,39 @@ function moderate_outbound_answer($answer, $language = 'english') {
     return $answer;
 }
 
-function split_logical_units_via_ananya_api($word, $language = 'english') {
+function &logical_units_cache() {
     static $cache = [];
+    return $cache;
+}
+
+function logical_units_from_api_result($decoded) {
+    if (!is_array($decoded)) {
+        return [];
+    }
+
+    $raw = $decoded['result'] ?? ($decoded['data'] ?? null);
+    $units = [];
+
+    if (is_array($raw)) {
+        foreach ($raw as $item) {
+            if (is_string($item) && $item !== '') {
+                $units[] = $item;
+            }
+        }
+    } elseif (is_string($raw) && trim($raw) !== '') {
+        $parts = preg_split('/[\s,|]+/u', trim($raw));
+        foreach ($parts as $part) {
+            if ($part !== '') {
+                $units[] = $part;
+            }
+        }
+    }
+
+    return $units;
+}
+
+function split_logical_units_via_ananya_api($word, $language = 'english') {
+    $cache = &logical_units_cache();
 
     $text = trim((string)$word);
     if ($text === '') {
@@ -816,26 +847,51 @@ function split_logical_units_via_ananya_api($word, $language = 'english') {
         return [];
     }
 
-    $raw = $decoded['result'] ?? ($decoded['data'] ?? null);
-    $units = [];
+    $units = logical_units_from_api_result($decoded);
 
-    if (is_array($raw)) {
-        foreach ($raw as $item) {
-            if (is_string($item) && $item !== '') {
-                $units[] = $item;
-            }
-        }
-    } elseif (is_string($raw) && trim($raw) !== '') {
-        $parts = preg_split('/[\s,|]+/u', trim($raw));
-        foreach ($parts as $part) {
-            if ($part !== '') {
-                $units[] = $part;
-            }
+    $cache[$cacheKey] = $units;
+    return $units;
+}
+
+// Parse many words in one api.php/batch round-trip and warm the logical-units cache,
+// so the per-word lookups in sanitize_word_list()/build_word_find_puzzle() hit memory.
+function prefetch_logical_units_via_ananya_api($words, $language = 'english') {
+    $cache = &logical_units_cache();
+
+    $pending = [];
+    foreach ($words as $word) {
+        $text = trim((string)$word);
+        if ($text === '' || isset($cache[$language . '|' . $text])) {
+            continue;
         }
+        $pending[$text] = true;
+    }
+    if (empty($pending)) {
+        return;
     }
 
-    $cache[$cacheKey] = $units;
-    return $units;
+    $texts = array_keys($pending);
+    $operations = [];
+    foreach ($texts as $text) {
+        $operations[] = [
+            'category' => 'analysis',
+            'action' => 'parse-to-logical-chars',
+            'params' => ['string' => $text, 'language' => $language],
+        ];
+    }
+
+    $items = ananya_api_batch($operations);
+    if ($items === null) {
+        return; // fall back to per-word calls
+    }
+
+    foreach ($texts as $i => $text) {
+        $item = $items[$i] ?? null;
+        if (!is_array($item) || empty($item['success'])) {
+            continue;
+        }
+        $cache[$language . '|' . $text] = logical_units_from_api_result($item);
+    }
 }
 
 function split_word_units($word, $language = 'english') {
@@ -864,6 +920,14 @@ function split_word_units($word, $language = 'english') {
 function sanitize_word_list($words, $maxCount, $language = 'english', $maxLen = 16) {
     $seen = [];
     $clean = [];
+
+    if (normalize_supported_language($language) !== 'english') {
+        $normalized = [];
+        foreach ($words as $w) {
+            $normalized[] = normalize_word_for_grid($w, $language);
+        }
+        prefetch_logical_units_via_ananya_api($normalized, normalize_supported_language($language));
+    }
     foreach ($words as $w) {
         $nw = normalize_word_for_grid($w, $language);
         if ($nw === '' || is_inappropriate_text($nw, $language)) {
@@ -2036,6 +2100,44 @@ function get_tool_dispatch_map() {
     ];
 }
 
+// Run several api.php operations in one POST api.php/batch request.
+// $operations: list of ['category' => ..., 'action' => ..., 'params' => [...]].
+// Returns the per-operation results in order, or null if the batch call failed.
+function ananya_api_batch($operations, $apiBaseUrl = null) {
+    if (empty($operations)) {
+        return [];
+    }
+
+    $url = rtrim($apiBaseUrl ?: build_local_api_base_url(), '/') . '/batch';
+
+    $ch = curl_init($url);
+    curl_setopt_array($ch, [
+        CURLOPT_RETURNTRANSFER => true,
+        CURLOPT_POST => true,
+        CURLOPT_HTTPHEADER => ['Content-Type: application/json', 'Accept: application/json'],
+        CURLOPT_POSTFIELDS => json_encode(array_values($operations), JSON_UNESCAPED_UNICODE),
+        CURLOPT_TIMEOUT => (int)(getenv('LOCAL_API_TIMEOUT') ?: 15),
+        CURLOPT_CONNECTTIMEOUT => 5,
+    ]);
+
+    $response = curl_exec($ch);
+    $httpCode = curl_getinfo($ch, CURLINFO_HTTP_CODE);
+
+    if ($response === false || $httpCode < 200 || $httpCode >= 400) {
+        error_log('Batch API call failed (HTTP ' . $httpCode . '): ' . curl_error($ch));
+        return null;
+    }
+
+    $decoded = json_decode($response, true);
+    $results = $decoded['result']['results'] ?? null;
+    if (!is_array($results) || count($results) !== count($operations)) {
+        error_log('Batch API returned an invalid response');
+        return null;
+    }
+
+    return $results;
+}
+
 function tool_output_from_api_response($decoded) {
     if (!is_array($decoded)) {
         return 'Tool execution failed: invalid API JSON response.';
@@ -2238,20 +2340,56 @@ if (
 // MCP server currently uses its own runtime provider configuration.
 $useDirectLlm = ($llm_provider !== '' || $llm_model !== '');
 
+// The browser asks for progress events with {"stream": true} (or Accept: text/event-stream).
+// The response only switches to SSE once the MCP server starts streaming; every
+// other path (fallbacks, errors) still answers with plain JSON.
+$wantsStream = !empty($data['stream'])
+    || stripos((string)($_SERVER['HTTP_ACCEPT'] ?? ''), 'text/event-stream') !== false;
+$streamStarted = false;
+
 $mcp_result = null;
 if (!$useDirectLlm && !$isGenerationRequest) {
-    $mcp_result = call_mcp_server($MCP_SERVER_URL, $question, $language, $MCP_TIMEOUT, $llm_provider, $llm_model);
+    $onMcpEvent = null;
+    if ($wantsStream) {
+        $streamedText = '';
+        $suppressTokens = false;
+        $onMcpEvent = function ($event, $payload) use (&$streamStarted, &$streamedText, &$suppressTokens, $language) {
+            if ($event === 'token') {
+                // Stop relaying raw tokens as soon as the partial answer would be moderated;
+                // the final (moderated) answer still arrives in the done event.
+                if ($suppressTokens) return;
+                $streamedText .= (string)($payload['delta'] ?? '');
+                if (moderate_outbound_answer($streamedText, $language) !== $streamedText) {
+                    $suppressTokens = true;
+                    return;
+                }
+            }
+            chat_sse_start($streamStarted);
+            chat_sse_send($event, $payload);
+        };
+    }
+    $mcp_result = call_mcp_server($MCP_SERVER_URL, $question, $language, $MCP_TIMEOUT, $llm_provider, $llm_model, $onMcpEvent);
+
+    if ($mcp_result === null && $streamStarted) {
+        // Events were already sent, so the JSON fallback below can no longer be used
+        chat_sse_send('error', [
+            'error' => 'The assistant stopped responding. Please try again.',
+            'llm_consulted' => true,
+        ]);
+        exit;
+    }
 }
 
 if($mcp_result !== null) {
     // MCP server responded successfully
     if (is_array($mcp_result)) {
-        $mcp_result['llm_consulted'] = true;
+        // Fast-path answers (route=fast_path) are produced without any LLM call
+        $mcp_result['llm_consulted'] = ($mcp_result['llm_consulted'] ?? true) !== false;
         if (!empty($mcp_result['answer'])) {
             $mcp_result['answer'] = moderate_outbound_answer($mcp_result['answer'], $language);
         }
         if (!empty($mcp_result['answer']) && stripos($mcp_result['answer'], 'LLM consulted') === false) {
-            $mcp_result['answer'] .= "\n\nLLM consulted - Yes";
+            $mcp_result['answer'] .= "\n\nLLM consulted - " . ($mcp_result['llm_consulted'] ? 'Yes' : 'No');
         }
 
         $effective_llm_provider = $llm_provider ?: strtolower(getenv('LLM_PROVIDER') ?: 'gemini');
@@ -2268,6 +2406,11 @@ if($mcp_result !== null) {
             $mcp_result['llm_model'] = $effective_llm_model;
         }
     }
+    if ($wantsStream) {
+        chat_sse_start($streamStarted);
+        chat_sse_send('done', $mcp_result);
+        exit;
+    }
     echo json_encode($mcp_result);
     exit;
 }
@@ -2502,7 +2645,7 @@ echo json_encode([
 ]);
 
 // ── Helper: call the Python MCP server ─────────────────────────────
-function call_mcp_server($url, $question, $language, $timeout, $llm_provider = '', $llm_model = '') {
+function call_mcp_server($url, $question, $language, $timeout, $llm_provider = '', $llm_model = '', $onEvent = null) {
     $payloadData = [
         'question' => $question,
         'language' => $language,
@@ -2518,27 +2661,70 @@ function call_mcp_server($url, $question, $language, $timeout, $llm_provider = '
 
     $payload = json_encode($payloadData);
 
-    $ch = curl_init($url);
+    // With an event callback, use /chat/stream and hand every progress event
+    // (tool_started, tool_result, token) to $onEvent as it arrives.
+    $streaming = is_callable($onEvent);
+    $final = null;
+    $sseBuffer = '';
+
+    $ch = curl_init($streaming ? rtrim($url, '/') . '/stream' : $url);
     curl_setopt($ch, CURLOPT_RETURNTRANSFER, true);
     curl_setopt($ch, CURLOPT_POST, true);
     curl_setopt($ch, CURLOPT_HTTPHEADER, [
         'Content-Type: application/json',
-        'Accept: application/json',
+        'Accept: ' . ($streaming ? 'text/event-stream' : 'application/json'),
+        // How long we wait: the MCP server answers (partially if need be) before
+        // this runs out and stops its LLM/tool work once we hang up
+        'X-Request-Timeout: ' . (int)$timeout,
     ]);
     curl_setopt($ch, CURLOPT_POSTFIELDS, $payload);
     curl_setopt($ch, CURLOPT_TIMEOUT, $timeout);
     curl_setopt($ch, CURLOPT_CONNECTTIMEOUT, 5);
+    if ($streaming) {
+        curl_setopt($ch, CURLOPT_WRITEFUNCTION, function ($ch, $chunk) use (&$sseBuffer, &$final, $onEvent) {
+            $sseBuffer .= $chunk;
+            mcp_sse_consume_events($sseBuffer, function ($event, $data) use (&$final, $onEvent) {
+                if ($event === 'done') {
+                    $final = $data;
+                } elseif ($event === 'error' && isset($data['retry_after'])) {
+                    // Not admitted (server busy): show the busy answer rather than
+                    // falling back to a direct LLM call, which would add to the load
+                    $final = $data;
+                } elseif ($event === 'error') {
+                    error_log('MCP stream error: ' . ($data['answer'] ?? 'unknown'));
+                } else {
+                    $onEvent($event, $data);
+                }
+            });
+            return strlen($chunk);
+        });
+    }
 
     $result = curl_exec($ch);
     $httpCode = curl_getinfo($ch, CURLINFO_HTTP_CODE);
     $err = curl_error($ch);
 
+    if ($httpCode === 429) {
+        // Admission control rejected the request; the body is the busy answer
+        error_log("MCP server busy (HTTP 429)");
+        $busy = json_decode($streaming ? $sseBuffer : (string)$result, true);
+        return is_array($busy) ? $busy : null;
+    }
+
     if($result === false || $httpCode < 200 || $httpCode >= 500) {
         // MCP server is down or errored — trigger fallback
         error_log("MCP server unreachable ($url): $err (HTTP $httpCode)");
         return null;
     }
 
+    if ($streaming) {
+        if (!is_array($final)) {
+            error_log("MCP server stream ended without a final answer");
+            return null;
+        }
+        return $final;
+    }
+
     $decoded = json_decode($result, true);
     if(!is_array($decoded)) {
         error_log("MCP server returned invalid JSON");
@@ -2548,4 +2734,48 @@ function call_mcp_server($url, $question, $language, $timeout, $llm_provider = '
     return $decoded;
 }
 
+// Parse complete Server-Sent Events out of $buffer (leaving any partial event
+// in it) and call $handler($event, $decodedData) for each one.
+function mcp_sse_consume_events(&$buffer, $handler) {
+    $buffer = str_replace("\r\n", "\n", $buffer);
+    while (($pos = strpos($buffer, "\n\n")) !== false) {
+        $block = substr($buffer, 0, $pos);
+        $buffer = substr($buffer, $pos + 2);
+
+        $event = 'message';
+        $dataLines = [];
+        foreach (explode("\n", $block) as $line) {
+            if (strpos($line, 'event:') === 0) {
+                $event = trim(substr($line, 6));
+            } elseif (strpos($line, 'data:') === 0) {
+                $dataLines[] = ltrim(substr($line, 5));
+            }
+        }
+        if (empty($dataLines)) continue;
+
+        $data = json_decode(implode("\n", $dataLines), true);
+        if (is_array($data)) {
+            $handler($event, $data);
+        }
+    }
+}
+
+// Switch this response to Server-Sent Events (once, before the first event).
+function chat_sse_start(&$started) {
+    if ($started) return;
+    $started = true;
+    header('Content-Type: text/event-stream; charset=utf-8');
+    header('Cache-Control: no-cache');
+    header('X-Accel-Buffering: no');
+    while (ob_get_level() > 0) {
+        ob_end_flush();
+    }
+}
+
+function chat_sse_send($event, $data) {
+    echo 'event: ' . $event . "\n";
+    echo 'data: ' . json_encode($data) . "\n\n";
+    flush();
+}
+
 // End of file
@@ -829,6 +829,119 @@ document.addEventListener('DOMContentLoaded', function () {
         if (indicator) indicator.remove();
     }
 
+    // Placeholder bubble updated while /chat/stream events arrive
+    function appendLiveMessage() {
+        const row = document.createElement('div');
+        row.className = 'mb-2 d-flex justify-content-start';
+
+        const bubble = document.createElement('div');
+        bubble.className = 'chat-bubble assistant';
+        const status = document.createElement('div');
+        status.className = 'chat-tool-status';
+        const text = document.createElement('div');
+        text.className = 'chat-stream-text';
+        bubble.appendChild(status);
+        bubble.appendChild(text);
+        row.appendChild(bubble);
+        windowEl.appendChild(row);
+
+        const tools = {};
+        function scroll() {
+            windowEl.scrollTop = windowEl.scrollHeight;
+        }
+
+        return {
+            row: row,
+            addTool: function (id, name) {
+                const line = document.createElement('div');
+                line.textContent = '⏳ ' + name;
+                tools[id] = { line: line, name: name };
+                status.appendChild(line);
+                scroll();
+            },
+            finishTool: function (id) {
+                const tool = tools[id];
+                if (!tool) return;
+                tool.line.textContent = '✓ ' + tool.name;
+                tool.line.className = 'done';
+            },
+            appendText: function (delta) {
+                text.textContent += delta;
+                scroll();
+            }
+        };
+    }
+
+    // Read a text/event-stream response and call onEvent(name, data) per event
+    async function readEventStream(res, onEvent) {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+            let idx;
+            while ((idx = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, idx);
+                buffer = buffer.slice(idx + 2);
+                let event = 'message';
+                const dataLines = [];
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+                });
+                if (!dataLines.length) continue;
+                let data = null;
+                try {
+                    data = JSON.parse(dataLines.join('\n'));
+                } catch (parseErr) {
+                    continue;
+                }
+                onEvent(event, data);
+            }
+        }
+    }
+
+    function renderChatResult(json) {
+        if (json.error) {
+            appendMessage('assistant', '**Error:** ' + json.error);
+        } else {
+            const answer = json.answer || JSON.stringify(json, null, 2);
+            const source = json.source || 'mcp';
+            appendMessage('assistant', answer, source, json.llm_provider || '', json.llm_model || '');
+        }
+    }
+
+    async function handleStreamResponse(res) {
+        let live = null;
+        let finalJson = null;
+        let streamError = null;
+
+        await readEventStream(res, function (event, data) {
+            if (event === 'done') {
+                finalJson = data;
+                return;
+            }
+            if (event === 'error') {
+                streamError = data.error || data.answer || 'Unknown error';
+                return;
+            }
+            if (!live) live = appendLiveMessage();
+            if (event === 'tool_started') live.addTool(data.id, data.name);
+            else if (event === 'tool_result') live.finishTool(data.id);
+            else if (event === 'token') live.appendText(data.delta || '');
+        });
+
+        // Replace the live bubble with the final (moderated, fully rendered) answer
+        if (live) live.row.remove();
+        if (finalJson) {
+            renderChatResult(finalJson);
+        } else {
+            appendMessage('assistant', '**Error:** ' + (streamError || 'The response ended unexpectedly.'));
+        }
+    }
+
     async function sendQuestion() {
         const q = input.value.trim();
         if (!q) return;
@@ -857,12 +970,16 @@ document.addEventListener('DOMContentLoaded', function () {
 
             const res = await fetch('chat_api.php', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream, application/json'
+                },
                 body: JSON.stringify({
                     question: q,
                     language: langSelect ? langSelect.value : 'english',
                     llm_provider: llmProvider,
-                    llm_model: llmModel
+                    llm_model: llmModel,
+                    stream: true
                 })
             });
 
@@ -874,6 +991,14 @@ document.addEventListener('DOMContentLoaded', function () {
                 return;
             }
 
+            // chat_api.php streams progress when the MCP server does; otherwise plain JSON
+            const contentType = res.headers.get('Content-Type') || '';
+            if (contentType.includes('text/event-stream') && res.body) {
+                await handleStreamResponse(res);
+                updateSendAvailability();
+                return;
+            }
+
             const raw = await res.text();
             let json = null;
             try {
@@ -889,13 +1014,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 return;
             }
 
-            if (json.error) {
-                appendMessage('assistant', '**Error:** ' + json.error);
-            } else {
-                const answer = json.answer || JSON.stringify(json, null, 2);
-                const source = json.source || 'mcp';
-                appendMessage('assistant', answer, source, json.llm_provider || '', json.llm_model || '');
-            }
+            renderChatResult(json);
         } catch (err) {
             removeTypingIndicator();
             appendMessage('assistant', '**Connection failed.** Is the server running?\n\n`' + err.message + '`');
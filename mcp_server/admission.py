@@ -0,0 +1,170 @@
+"""
+Admission control for the /chat agent loop and rate limits for LLM providers.
+
+- AdmissionController: at most `max_in_flight` agent loops run at once. Up to
+  `max_queue` more wait for a slot, each for at most `queue_timeout` seconds.
+  Anything beyond that is rejected at once with AdmissionRejected, which the
+  endpoints turn into 429 + Retry-After. A request with a deadline (deadline.py)
+  waits no longer than it has left, and gets DeadlineExceeded (not a 429)
+  when that is what ended the wait.
+- TokenBucket: per-provider request rate (e.g. Gemini/Groq free-tier RPM), so
+  bursts are spread out locally instead of being refused by the provider.
+
+Queue depth, in-flight count, wait time and rejections are exported through
+metrics.py.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import deadline
+import metrics
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason} (retry after {retry_after:.0f}s)")
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class RateLimited(AdmissionRejected):
+    """A provider token bucket would make the caller wait longer than allowed."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__("rate_limited", retry_after)
+        self.provider = provider
+
+
+class AdmissionController:
+    """Bounded concurrency plus a bounded, deadline-limited wait queue."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+        self.deadline_expired = 0  # queued until the request's own deadline ran out
+        # Smoothed time an admitted request holds its slot, for Retry-After
+        self._service_seconds = 5.0
+
+    def retry_after(self) -> float:
+        """Rough time until a new request would get a slot."""
+        waves = (self.queued + 1) / self.max_in_flight
+        return max(1.0, self._service_seconds * waves)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        metrics.ADMISSION_REJECTED.inc(reason=reason)
+        return AdmissionRejected(reason, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold one in-flight slot; yields the seconds spent queued."""
+        start = time.monotonic()
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # a slot is free: returns without yielding
+        elif self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+        else:
+            self.queued += 1
+            metrics.ADMISSION_QUEUE_DEPTH.set(self.queued)
+            limit = deadline.timeout(self.queue_timeout)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=limit)
+            except asyncio.TimeoutError:
+                if limit < self.queue_timeout:
+                    # The client's own deadline ran out; a 429 "retry later" would mislead
+                    self.deadline_expired += 1
+                    raise deadline.DeadlineExceeded("deadline expired in the admission queue") from None
+                raise self._reject("queue_timeout") from None
+            finally:
+                self.queued -= 1
+                metrics.ADMISSION_QUEUE_DEPTH.set(self.queued)
+
+        waited = time.monotonic() - start
+        metrics.ADMISSION_WAIT.observe(waited)
+        self.admitted += 1
+        self.in_flight += 1
+        metrics.ADMISSION_IN_FLIGHT.set(self.in_flight)
+        held_from = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.in_flight -= 1
+            metrics.ADMISSION_IN_FLIGHT.set(self.in_flight)
+            self._semaphore.release()
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - held_from)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "deadline_expired": self.deadline_expired,
+            "retry_after_s": round(self.retry_after(), 1),
+        }
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`.
+
+    Tokens are reserved up front (the balance may go negative), so callers
+    are served in arrival order and each one knows its wait immediately.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self.waits = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token would be available (without taking it)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self, max_wait: Optional[float] = None) -> float:
+        """Take a token, sleeping until it is due. Returns the seconds waited.
+        Raises asyncio.TimeoutError if that would take longer than `max_wait`."""
+        wait = self.delay()
+        if max_wait is not None and wait > max_wait:
+            raise asyncio.TimeoutError(wait)
+        self.tokens -= 1
+        if wait > 0:
+            self.waits += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.tokens += 1  # give the reservation back
+                raise
+        return wait
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "requests_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "throttled": self.waits,
+        }
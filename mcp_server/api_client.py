@@ -1,20 +1,240 @@
 """
 HTTP client wrapper for the Ananya PHP Word Processor API.
 Makes async HTTP requests to api.php/{category}/{action}?params.
+
+A single httpx.AsyncClient (and its connection pool) is shared by every call.
+The server opens it in the Starlette lifespan and closes it on shutdown; when
+the client is used standalone it is opened lazily on the first call.
+
+Successful responses from deterministic endpoints are kept in a ResultCache
+(see cache.py; in memory or in a shared SQLite file) so repeated questions about the same word skip the backend,
+and concurrent identical calls are coalesced into one request (coalesce.py).
+
+With API_LOCAL_EVAL enabled, endpoints that only need logical-character
+segmentation are answered in-process (local_engine.py) without any HTTP call.
+
+Requests that do reach the backend go through a concurrency semaphore, a
+p99-derived timeout, jittered retries (GET only) and a circuit breaker that
+fails fast while api.php is unhealthy (resilience.py). Every HTTP attempt is
+timed into the backend latency histogram served at /metrics (metrics.py).
+Inside a /chat request with a deadline (deadline.py) each attempt's timeout
+is also cut to the time left. A timeout caused by that cut does not count
+against the breaker and is not retried. A coalesced call runs without any
+caller's deadline; each caller stops waiting at its own instead.
 """
 
+import asyncio
+import logging
+import time
 import httpx
 from typing import Any, Optional
-from config import API_BASE_URL
+from config import (
+    API_BASE_URL, API_TIMEOUT, API_MAX_CONNECTIONS,
+    API_MAX_KEEPALIVE_CONNECTIONS, API_KEEPALIVE_EXPIRY, API_HTTP2,
+    API_CACHE_ENABLED, API_CACHE_MAX_ENTRIES, API_CACHE_TTL, API_CACHE_TTL_OVERRIDES,
+    API_CACHE_BACKEND, API_CACHE_PATH,
+    API_COALESCE_ENABLED, API_BATCH_MAX_OPERATIONS, API_LOCAL_EVAL, API_MAX_CONCURRENCY, API_TIMEOUT_MIN, API_TIMEOUT_P99_MULTIPLIER,
+    API_LATENCY_WINDOW, API_RETRIES, API_RETRY_BACKOFF,
+    API_BREAKER_FAILURE_THRESHOLD, API_BREAKER_RESET_TIMEOUT,
+)
+from cache import ResultCache, create_result_cache, make_cache_key, is_cacheable, parse_ttl_overrides
+from coalesce import SingleFlight
+from resilience import LatencyTracker, CircuitBreaker, backoff_delay
+import deadline
+import local_engine
+import metrics
+
+logger = logging.getLogger("ananya-mcp")
+
+# Gateway errors worth retrying (a plain 500 is usually a bug, not a blip)
+RETRYABLE_STATUSES = (502, 503, 504)
+
+# Returned instead of calling api.php once the /chat request's deadline has passed
+_DEADLINE_ERROR = {
+    "success": False,
+    "error": "Request deadline exceeded before the Ananya API answered",
+    "error_type": "deadline",
+}
+
+# Single-word operations for batch_analyze_words(): name → (category, action)
+WORD_OPERATIONS = {
+    "palindrome": ("analysis", "is-palindrome"),
+    "length": ("text", "length"),
+    "length_no_spaces": ("utility", "length-no-spaces"),
+    "reverse": ("text", "reverse"),
+    "logical_chars": ("characters", "logical"),
+    "base_chars": ("characters", "base"),
+    "codepoints": ("characters", "codepoints"),
+    "codepoint_length": ("characters", "codepoint-length"),
+    "strength": ("analysis", "word-strength"),
+    "weight": ("analysis", "word-weight"),
+    "level": ("analysis", "word-level"),
+    "contains_space": ("validation", "contains-space"),
+    "detect_language": ("analysis", "detect-language"),
+}
 
 
 class AnanyaAPIClient:
     """Async HTTP client for the Ananya word-processing PHP API."""
 
-    def __init__(self, base_url: str = API_BASE_URL):
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        timeout: float = API_TIMEOUT,
+        max_connections: int = API_MAX_CONNECTIONS,
+        max_keepalive_connections: int = API_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = API_KEEPALIVE_EXPIRY,
+        http2: bool = API_HTTP2,
+        cache: Optional[ResultCache] = None,
+        max_concurrency: int = API_MAX_CONCURRENCY,
+        retries: int = API_RETRIES,
+        local_eval: bool = API_LOCAL_EVAL,
+    ):
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self._http2_active = False  # whether the open pool has HTTP/2 enabled (see open())
+        self._client: Optional[httpx.AsyncClient] = None
+        self._requests_total = 0
+        self._requests_in_flight = 0
+        if cache is None and API_CACHE_ENABLED:
+            cache = create_result_cache(
+                API_CACHE_BACKEND,
+                max_entries=API_CACHE_MAX_ENTRIES,
+                default_ttl=API_CACHE_TTL,
+                endpoint_ttls=parse_ttl_overrides(API_CACHE_TTL_OVERRIDES),
+                path=API_CACHE_PATH,
+            )
+        self.cache = cache
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if API_COALESCE_ENABLED else None
+        self.local_eval = local_eval
+        self.local_answers = 0
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.retries = retries
+        self.retry_count = 0
+        self.latency = LatencyTracker(
+            window=API_LATENCY_WINDOW,
+            multiplier=API_TIMEOUT_P99_MULTIPLIER,
+            min_timeout=API_TIMEOUT_MIN,
+            max_timeout=timeout,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=API_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=API_BREAKER_RESET_TIMEOUT,
+        )
+
+    # ── Connection pool lifecycle ─────────────────────────────────────────
+
+    async def open(self) -> None:
+        """Create the shared connection pool (no-op if already open)."""
+        if self._client is not None and not self._client.is_closed:
+            return
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401  (optional dependency of httpx[http2])
+            except ImportError:
+                logger.warning("API_HTTP2 is set but the 'h2' package is not installed — using HTTP/1.1")
+                http2 = False
+        self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=http2)
+        self._http2_active = http2
+        logger.info(
+            f"API connection pool opened (max_connections={self.limits.max_connections}, "
+            f"keepalive={self.limits.max_keepalive_connections}, http2={http2})"
+        )
+
+    async def close(self) -> None:
+        """Close the shared connection pool and release its sockets."""
+        flush = getattr(self.cache, "flush", None)  # SQLite cache: commit queued writes
+        if flush is not None:
+            await asyncio.to_thread(flush, 5.0)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("API connection pool closed")
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            await self.open()
+        return self._client
+
+    def pool_stats(self) -> dict:
+        """Snapshot of the connection pool for /health."""
+        stats = {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self._http2_active,  # False when h2 is missing, whatever API_HTTP2 says
+            "http2_requested": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "requests_total": self._requests_total,
+            "requests_in_flight": self._requests_in_flight,
+        }
+        # httpx does not expose pool internals publicly; read them defensively.
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+        return stats
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters of the result cache (for sizing it)."""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+    def coalesce_stats(self) -> dict:
+        """Counters for single-flight deduplication of concurrent identical calls."""
+        if self.single_flight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.single_flight.stats()}
 
     async def _call(self, category: str, action: str, params: dict) -> dict:
+        """
+        Return the parsed JSON response for an API call, served from the
+        result cache when possible. Concurrent identical calls share one
+        backend request.
+        """
+        if self.local_eval:
+            local = local_engine.evaluate(category, action, params)
+            if local is not None:
+                self.local_answers += 1
+                return local
+
+        if not is_cacheable(category, action):
+            return await self._fetch(category, action, params)
+
+        key = make_cache_key(category, action, params)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if self.single_flight is None:
+            return await self._fetch_and_store(key, category, action, params)
+        try:
+            return await self.single_flight.do(
+                key, lambda: self._fetch_and_store(key, category, action, params)
+            )
+        except deadline.DeadlineExceeded:
+            return _DEADLINE_ERROR.copy()
+
+    async def _fetch_and_store(self, key, category: str, action: str, params: dict) -> dict:
+        data = await self._fetch(category, action, params)
+        # Only successful answers are cached; errors may be transient.
+        if self.cache is not None and isinstance(data, dict) and data.get("success") is not False:
+            self.cache.set(key, data)
+        return data
+
+    async def _fetch(self, category: str, action: str, params: dict) -> dict:
         """
         Make a GET request to the PHP API and return the parsed JSON response.
         URL pattern: {base_url}/{category}/{action}?string=...&language=...
@@ -22,19 +242,209 @@ class AnanyaAPIClient:
         url = f"{self.base_url}/{category}/{action}"
         # Filter out None values
         clean_params = {k: v for k, v in params.items() if v is not None}
+        return await self._request("GET", url, params=clean_params)
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            try:
-                resp = await client.get(url, params=clean_params)
-                resp.raise_for_status()
-                data = resp.json()
-                return data
-            except httpx.HTTPStatusError as e:
-                return {"success": False, "error": f"HTTP {e.response.status_code}: {e.response.text}"}
-            except httpx.RequestError as e:
-                return {"success": False, "error": f"Request failed: {str(e)}"}
-            except Exception as e:
-                return {"success": False, "error": f"Unexpected error: {str(e)}"}
+    def local_eval_stats(self) -> dict:
+        return {"enabled": self.local_eval, "answered": self.local_answers}
+
+    def backend_stats(self) -> dict:
+        """Circuit breaker, latency and concurrency state for /health."""
+        return {
+            "circuit_breaker": self.breaker.stats(),
+            "latency": self.latency.stats(),
+            "max_concurrency": self.max_concurrency,
+            "retries": self.retry_count,
+        }
+
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        """
+        Send a request through the shared pool; errors come back as {success: False}.
+        Idempotent GETs are retried on connection errors and 502/503/504 (not on
+        other 5xx, which are rarely transient). The concurrency slot is held per
+        attempt, not across the backoff. No attempt outlives the request's deadline.
+        """
+        if not self.breaker.allow_request():
+            retry_after = round(self.breaker.retry_after(), 1)
+            return {
+                "success": False,
+                "error": f"Ananya API is unavailable (circuit open); retry in {retry_after}s",
+                "error_type": "circuit_open",
+                "retry_after": retry_after,
+            }
+
+        attempts = 1 + (self.retries if method == "GET" else 0)
+        # Metric labels: api.php/{category}/{action}, or "batch"
+        category, _, action = url[len(self.base_url):].strip("/").partition("/")
+        client = await self._get_client()
+        self._requests_total += 1
+        self._requests_in_flight += 1
+        recorded = False
+        try:
+            for attempt in range(1, attempts + 1):
+                if attempt > 1:
+                    # Back off without holding a concurrency slot
+                    self.retry_count += 1
+                    await asyncio.sleep(backoff_delay(attempt - 1, API_RETRY_BACKOFF))
+                async with self._semaphore:
+                    # Cut after the wait for a slot, so queueing counts against the deadline
+                    timeout = self.latency.timeout()
+                    budget = deadline.timeout(timeout)
+                    if budget <= 0:
+                        return _DEADLINE_ERROR.copy()
+                    start = time.monotonic()
+                    try:
+                        resp = await client.request(method, url, timeout=budget, **kwargs)
+                        elapsed = time.monotonic() - start
+                        self.latency.record(elapsed)
+                        metrics.BACKEND_LATENCY.observe(elapsed, category=category, action=action)
+                        resp.raise_for_status()
+                        data = resp.json()
+                        self.breaker.record_success()
+                        recorded = True
+                        return data
+                    except httpx.HTTPStatusError as e:
+                        metrics.BACKEND_ERRORS.inc(category=category, action=action)
+                        status = e.response.status_code
+                        if status in RETRYABLE_STATUSES and attempt < attempts:
+                            continue
+                        if status >= 500:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()  # 4xx: backend is up, request was bad
+                        recorded = True
+                        return {"success": False, "error": f"HTTP {status}: {e.response.text}"}
+                    except httpx.RequestError as e:
+                        if budget < timeout and isinstance(e, httpx.TimeoutException):
+                            return _DEADLINE_ERROR.copy()  # our deadline, not a slow backend
+                        # Timeouts are the slow tail, so they count towards latency too
+                        metrics.BACKEND_LATENCY.observe(time.monotonic() - start, category=category, action=action)
+                        if isinstance(e, httpx.TimeoutException):
+                            # Record at the timeout that expired, so p99 (and with it the
+                            # timeout) can rise when the backend slows down for good
+                            self.latency.record(timeout)
+                        metrics.BACKEND_ERRORS.inc(category=category, action=action)
+                        if attempt < attempts:
+                            continue
+                        self.breaker.record_failure()
+                        recorded = True
+                        return {"success": False, "error": f"Request failed: {str(e)}"}
+                    except Exception as e:
+                        self.breaker.record_failure()
+                        recorded = True
+                        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+        finally:
+            self._requests_in_flight -= 1
+            if not recorded:
+                self.breaker.release_probe()
+
+    # ── BATCH API ────────────────────────────────────────────────────────
+
+    async def batch(self, operations: list[dict]) -> list[dict]:
+        """
+        Run many operations through one POST to api.php/batch.
+
+        Each operation is {"category": ..., "action": ..., "params": {...}}.
+        Returns one response dict per operation, in order, each with its own
+        success/result/error fields. Cached answers are served locally and
+        only the misses are sent to the backend.
+        """
+        results: list[Optional[dict]] = [None] * len(operations)
+        pending: list[tuple[int, Any, dict]] = []
+
+        for i, op in enumerate(operations):
+            category, action = op.get("category", ""), op.get("action", "")
+            params = {k: v for k, v in (op.get("params") or {}).items() if v is not None}
+            key = None
+            if self.cache is not None and is_cacheable(category, action):
+                key = make_cache_key(category, action, params)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append((i, key, {"category": category, "action": action, "params": params}))
+
+        if pending:
+            data = await self._request(
+                "POST", f"{self.base_url}/batch", json=[op for _, _, op in pending]
+            )
+            items = (data.get("result") or {}).get("results") if data.get("success") is not False else None
+            if not isinstance(items, list) or len(items) != len(pending):
+                error = data.get("error") or "Invalid batch response"
+                for i, _, _ in pending:
+                    results[i] = {"success": False, "error": error}
+            else:
+                for (i, key, _), item in zip(pending, items):
+                    results[i] = item
+                    if key is not None and item.get("success") is not False:
+                        self.cache.set(key, item)
+
+        # Re-number so "index" always refers to the caller's operation list
+        return [{**item, "index": i} for i, item in enumerate(results)]
+
+    async def batch_analyze_words(self, words: list[str], operations: list[str], language: str = "english") -> dict:
+        """
+        Run every operation (names from WORD_OPERATIONS) on every word.
+
+        Local and cached answers skip the network; everything else goes to
+        api.php/batch in chunks of API_BATCH_MAX_OPERATIONS. If the batch
+        route itself fails, the calls are retried one by one, concurrently.
+        Returns {"operations": [...], "rows": [{"word", "results", "errors"}]}
+        with one row per distinct word, in order.
+        """
+        unknown = [op for op in operations if op not in WORD_OPERATIONS]
+        if unknown:
+            raise ValueError(
+                f"Unknown operation(s): {', '.join(unknown)}. "
+                f"Available: {', '.join(WORD_OPERATIONS)}"
+            )
+        words = list(dict.fromkeys(w.strip() for w in words if w and w.strip()))
+        operations = list(dict.fromkeys(operations))
+
+        cells = [(word, op) for word in words for op in operations]
+        responses: list[Optional[dict]] = [None] * len(cells)
+        remote: list[int] = []
+        for i, (word, op) in enumerate(cells):
+            category, action = WORD_OPERATIONS[op]
+            local = None
+            if self.local_eval:
+                local = local_engine.evaluate(category, action, self._word_params(word, op, language))
+            if local is not None:
+                self.local_answers += 1
+                responses[i] = local
+            else:
+                remote.append(i)
+
+        async def run_chunk(chunk: list[int]) -> None:
+            ops = []
+            for i in chunk:
+                word, op = cells[i]
+                category, action = WORD_OPERATIONS[op]
+                ops.append({"category": category, "action": action,
+                            "params": self._word_params(word, op, language)})
+            items = await self.batch(ops) if len(ops) > 1 else []
+            failed = {it.get("error") for it in items if it.get("success") is False}
+            if not items or (len(failed) == 1 and all(it.get("success") is False for it in items)):
+                # Single call, or the batch route failed as a whole (e.g. an
+                # older api.php without /batch): fall back to individual calls
+                items = await asyncio.gather(*(self._call(o["category"], o["action"], o["params"]) for o in ops))
+            for i, item in zip(chunk, items):
+                responses[i] = item
+
+        size = max(1, API_BATCH_MAX_OPERATIONS)
+        await asyncio.gather(*(run_chunk(remote[j:j + size]) for j in range(0, len(remote), size)))
+
+        rows = {word: {"word": word, "results": {}, "errors": {}} for word in words}
+        for (word, op), data in zip(cells, responses):
+            if data.get("success") is False:
+                rows[word]["errors"][op] = data.get("error") or "failed"
+            else:
+                rows[word]["results"][op] = data.get("result", data.get("data"))
+        return {"operations": operations, "rows": list(rows.values())}
+
+    @staticmethod
+    def _word_params(word: str, operation: str, language: str) -> dict:
+        # detect-language ignores the language (see analysis_detect_language)
+        return {"string": word, "language": "english" if operation == "detect_language" else language}
 
     def _extract_result(self, data: dict) -> Any:
         """Extract the meaningful result from an API response."""
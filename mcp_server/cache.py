@@ -0,0 +1,441 @@
+"""
+Result caches for AnanyaAPIClient.
+
+Most Ananya endpoints are pure functions of their parameters, so identical
+calls can be answered without the backend. Entries are keyed by
+(category, action, normalized params), evicted least-recently-used once the
+cache is full, and expire after a per-endpoint TTL. Endpoints whose output
+is random are never cached.
+
+ResultCache is also used by server.py for whole /chat answers, keyed by
+normalize_question().
+
+Two interchangeable backends:
+- ResultCache: in-process memory (default).
+- SQLiteResultCache: a WAL-mode SQLite file shared by every worker process on
+  the host, so warmed results survive restarts. Its writes go through a
+  background thread so the event loop never waits on a locked file.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger("ananya-mcp")
+
+# Endpoints that return a different answer on every call — never cache these.
+NON_DETERMINISTIC_ENDPOINTS = frozenset({
+    "text/randomize",
+    "characters/random-logical",
+    "characters/filler",
+})
+
+CacheKey = tuple
+
+
+def make_cache_key(category: str, action: str, params: dict) -> CacheKey:
+    """Build a hashable key from a call, ignoring None values and param order."""
+    normalized = []
+    for k, v in params.items():
+        if v is None:
+            continue
+        v = str(v)
+        if k == "language":
+            v = v.strip().lower()
+        normalized.append((k, v))
+    return (category, action, tuple(sorted(normalized)))
+
+
+def is_cacheable(category: str, action: str) -> bool:
+    """False for endpoints on the non-deterministic deny list."""
+    return f"{category}/{action}" not in NON_DETERMINISTIC_ENDPOINTS
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a chat question: NFC, single spaces, no trailing
+    punctuation. Case is kept: the palindrome, equals and compare endpoints
+    are case-sensitive, so "Racecar" and "racecar" can have different answers.
+
+    >>> normalize_question('Is "Racecar" a palindrome?') == normalize_question('Is "Racecar"  a palindrome')
+    True
+    >>> normalize_question('Is "Racecar" a palindrome?') == normalize_question('is "racecar" a palindrome')
+    False
+    """
+    q = unicodedata.normalize("NFC", question)
+    q = " ".join(q.split())
+    return q.rstrip("?.! ").strip()
+
+
+def parse_ttl_overrides(raw: str) -> dict[str, float]:
+    """Parse 'category/action=seconds,...' into a dict (bad entries are skipped)."""
+    overrides = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        endpoint, _, seconds = part.partition("=")
+        try:
+            overrides[endpoint.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return overrides
+
+
+class ResultCache:
+    """Size-bounded LRU cache with per-endpoint TTLs and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 2048, default_ttl: float = 7200.0,
+                 endpoint_ttls: Optional[dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = dict(endpoint_ttls or {})
+        self._entries: "OrderedDict[CacheKey, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, category: str, action: str) -> float:
+        return self.endpoint_ttls.get(f"{category}/{action}", self.default_ttl)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: CacheKey, value: Any) -> None:
+        category, action = key[0], key[1]
+        ttl = self.ttl_for(category, action)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: CacheKey) -> bool:
+        """Remove one entry; True if it was present."""
+        return self._entries.pop(key, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteResultCache:
+    """Persistent result cache in a WAL-mode SQLite file, with the same
+    get/set/delete/clear/len/stats interface as ResultCache.
+
+    get() runs on the caller's thread (the event loop), but it is only a
+    WAL read: it never waits on a writer and gives up on a locked file after
+    READ_TIMEOUT. Every write (new entries, expired-row deletes, the
+    accessed_at updates from hits, eviction) is queued to one writer thread,
+    which commits them in batches. Entries still in the queue are served from
+    memory, so a set() is visible to the next get() straight away.
+
+    Expiry uses wall-clock time so every process agrees on it. Hit/miss
+    counters are per process. Size is read from the shared file and may lag
+    the queued writes.
+    """
+
+    SCHEMA_VERSION = 1
+    # Check the row count (and evict) once every this many writes
+    EVICT_CHECK_INTERVAL = 64
+    # Seconds a read on the event loop may wait for a locked database
+    READ_TIMEOUT = 0.05
+    # Most queued writes committed in one transaction
+    WRITE_BATCH = 256
+
+    def __init__(self, path: str, max_entries: int = 50000, default_ttl: float = 7200.0,
+                 endpoint_ttls: Optional[dict[str, float]] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = dict(endpoint_ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.write_errors = 0
+        self._writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # The writer connection sets up the file; the reader only ever SELECTs
+        self._writer_conn = self._connect(timeout=5.0)
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        self._writer_conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._conn = self._connect(timeout=self.READ_TIMEOUT)
+
+        # key -> (value JSON, expires_at) queued for writing, or None for a queued delete
+        self._pending: dict[str, Optional[tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, timeout: float) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=timeout, check_same_thread=False, isolation_level=None)
+
+    def _init_schema(self) -> None:
+        conn = self._writer_conn
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = conn.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()
+        if row is not None and int(row[0]) == self.SCHEMA_VERSION:
+            return
+        # Unknown or older layout: results are only a cache, so start over.
+        if row is not None:
+            logger.info(f"Result cache schema {row[0]} -> {self.SCHEMA_VERSION}; clearing {self.path}")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have migrated the file while we waited for the lock
+            row = conn.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()
+            if row is not None and int(row[0]) == self.SCHEMA_VERSION:
+                conn.execute("COMMIT")
+                return
+            conn.execute("DROP TABLE IF EXISTS results")
+            conn.execute(
+                "CREATE TABLE results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('schema_version', ?)",
+                (str(self.SCHEMA_VERSION),),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _encode_key(key: CacheKey) -> str:
+        return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+    def ttl_for(self, category: str, action: str) -> float:
+        return self.endpoint_ttls.get(f"{category}/{action}", self.default_ttl)
+
+    def _lookup(self, k: str) -> Optional[tuple[str, float]]:
+        """(value JSON, expires_at) from the write queue or the file; None if absent.
+        Raises sqlite3.Error if the file cannot be read in time."""
+        with self._lock:
+            if k in self._pending:
+                return self._pending[k]
+        return self._conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (k,)).fetchone()
+
+    def _enqueue(self, op: tuple, k: Optional[str] = None, entry: Optional[tuple[str, float]] = None) -> None:
+        if k is not None:
+            with self._lock:
+                self._pending[k] = entry
+        self._queue.put(op)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        k = self._encode_key(key)
+        now = time.time()
+        try:
+            row = self._lookup(k)
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache read failed: {e}")
+            self.misses += 1
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            self._enqueue(("delete", k), k, None)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._queue.put(("touch", k, now))
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: CacheKey, value: Any) -> None:
+        ttl = self.ttl_for(key[0], key[1])
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        now = time.time()
+        k, encoded = self._encode_key(key), json.dumps(value, ensure_ascii=False)
+        self._enqueue(("set", k, encoded, now + ttl, now), k, (encoded, now + ttl))
+
+    def delete(self, key: CacheKey) -> bool:
+        """Remove one entry; True if it was present (and not expired)."""
+        k = self._encode_key(key)
+        try:
+            row = self._lookup(k)
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache read failed: {e}")
+            row = None
+        self._enqueue(("delete", k), k, None)
+        return row is not None and row[1] > time.time()
+
+    def __len__(self) -> int:
+        try:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+        self._queue.put(("clear",))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every write queued so far is committed (False on timeout)."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(timeout=10.0)
+        self._conn.close()
+
+    # ── writer thread ────────────────────────────────────────────────
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._write_batch([op for op in batch if op is not None])
+            if stop:
+                self._writer_conn.close()
+                return
+
+    def _write_batch(self, ops: list[tuple]) -> None:
+        conn = self._writer_conn
+        flushed = [op[1] for op in ops if op[0] == "flush"]
+        touches: dict[str, float] = {}
+        written: dict[str, Optional[tuple[str, float]]] = {}
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                kind = op[0]
+                if kind == "set":
+                    _, k, encoded, expires_at, now = op
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                        (k, encoded, expires_at, now),
+                    )
+                    written[k] = (encoded, expires_at)
+                    self._writes += 1
+                elif kind == "delete":
+                    conn.execute("DELETE FROM results WHERE key = ?", (op[1],))
+                    written[op[1]] = None
+                elif kind == "touch":
+                    touches[op[1]] = op[2]  # one UPDATE per key, with its latest hit
+                elif kind == "clear":
+                    conn.execute("DELETE FROM results")
+            if touches:
+                conn.executemany("UPDATE results SET accessed_at = ? WHERE key = ?",
+                                 [(now, k) for k, now in touches.items()])
+            if self._writes >= self.EVICT_CHECK_INTERVAL:
+                self._writes = 0
+                self._evict(time.time())
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            logger.warning(f"Result cache write failed ({len(ops)} queued change(s) dropped): {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        finally:
+            # Committed (or dropped) entries are read from the file from now on,
+            # unless a newer set/delete for the same key was queued meanwhile
+            with self._lock:
+                for k, entry in written.items():
+                    if self._pending.get(k, False) == entry:
+                        del self._pending[k]
+            for done in flushed:
+                done.set()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then the least recently used ones above max_entries."""
+        conn = self._writer_conn
+        cur = conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        self.expirations += max(cur.rowcount, 0)
+        size = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = size - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            size = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        except sqlite3.Error:
+            size = None
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "schema_version": self.SCHEMA_VERSION,
+            "size": size,
+            "max_entries": self.max_entries,
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "pending_writes": self._queue.qsize(),
+            "write_errors": self.write_errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_result_cache(backend: str, max_entries: int, default_ttl: float,
+                        endpoint_ttls: Optional[dict[str, float]] = None, path: str = ""):
+    """Build the configured cache backend ('memory' or 'sqlite')."""
+    if backend.lower() == "sqlite":
+        return SQLiteResultCache(path, max_entries=max_entries, default_ttl=default_ttl,
+                                 endpoint_ttls=endpoint_ttls)
+    return ResultCache(max_entries=max_entries, default_ttl=default_ttl, endpoint_ttls=endpoint_ttls)
@@ -0,0 +1,59 @@
+"""
+Single-flight request coalescing for AnanyaAPIClient.
+
+When several coroutines ask for the same (category, action, params) at the
+same time, only the first one (the "leader") reaches the PHP backend; the
+others await the leader's result. The backend call runs as its own task, so
+a cancelled caller never cancels the request other callers are waiting on.
+
+The shared task runs without a request deadline (deadline.py): it would
+otherwise inherit the leader's, and callers with more time (or none, like MCP
+tool calls) would fail on someone else's budget. Each caller instead stops
+waiting at its own deadline with DeadlineExceeded; the fetch keeps going for
+the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+import deadline
+
+
+class SingleFlight:
+    """Deduplicates concurrent identical calls and counts how many were shared."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per key at a time; concurrent callers share its result."""
+        task = self._inflight.get(key)
+        if task is None:
+            with deadline.scope(None):  # the task copies this context
+                task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        own = deadline.current()
+        if own is None:
+            return await asyncio.shield(task)
+        try:
+            async with asyncio.timeout_at(own.loop_time()) as cut:
+                return await asyncio.shield(task)
+        except TimeoutError:
+            if not cut.expired():
+                raise
+            raise deadline.DeadlineExceeded("request deadline passed while waiting for a shared call") from None
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
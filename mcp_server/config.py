@@ -10,6 +10,15 @@ from dotenv import load_dotenv
 _env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
 load_dotenv(_env_path)
 
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a true/false flag from the environment (1/true/yes/on)."""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 # LLM provider
 LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
@@ -34,9 +43,153 @@ if not LLM_MODEL:
 LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', '1200'))
 LLM_TEMPERATURE = float(os.getenv('LLM_TEMPERATURE', '0.2'))
 
+# Shared LLM clients: one connection pool per provider, reused across /chat requests.
+# Each provider can be tuned with LLM_TIMEOUT_<PROVIDER>, LLM_MAX_CONNECTIONS_<PROVIDER>
+# and LLM_MAX_KEEPALIVE_CONNECTIONS_<PROVIDER> (e.g. LLM_TIMEOUT_OLLAMA=180).
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '10'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+_LLM_DEFAULT_TIMEOUTS = {
+    'gemini': 60,
+    'groq': 60,
+    'openai': 600,  # openai library default
+    'ollama': 120,  # local Ollama: generous for cold starts + tool calls
+}
+# Client-side request rate per provider (requests per minute, 0 = unlimited), kept
+# under the free-tier quotas; override with LLM_RATE_LIMIT_<PROVIDER> and
+# LLM_RATE_BURST_<PROVIDER> (default: a quarter of the per-minute rate).
+_LLM_DEFAULT_RATE_LIMITS = {
+    'gemini': 15,
+    'groq': 30,
+    'openai': 0,
+    'ollama': 0,
+}
+# Longest an LLM call may wait for its provider's rate limit before the request gets a 429
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT', '30'))
+LLM_PROVIDER_LIMITS = {
+    provider: {
+        'timeout': float(os.getenv(f'LLM_TIMEOUT_{provider.upper()}', str(timeout))),
+        'max_connections': int(os.getenv(f'LLM_MAX_CONNECTIONS_{provider.upper()}', str(LLM_MAX_CONNECTIONS))),
+        'max_keepalive_connections': int(os.getenv(
+            f'LLM_MAX_KEEPALIVE_CONNECTIONS_{provider.upper()}', str(LLM_MAX_KEEPALIVE_CONNECTIONS))),
+        'requests_per_minute': float(os.getenv(
+            f'LLM_RATE_LIMIT_{provider.upper()}', str(_LLM_DEFAULT_RATE_LIMITS.get(provider, 0)))),
+        'burst': int(os.getenv(
+            f'LLM_RATE_BURST_{provider.upper()}', str(max(1, _LLM_DEFAULT_RATE_LIMITS.get(provider, 0) // 4)))),
+    }
+    for provider, timeout in _LLM_DEFAULT_TIMEOUTS.items()
+}
+
+# Local Ollama only: load LLM_MODEL at startup (the server waits up to
+# OLLAMA_PRELOAD_TIMEOUT seconds) and renew its keep_alive every
+# OLLAMA_PING_INTERVAL seconds (0 = preload only) so /chat never pays the cold start
+OLLAMA_PRELOAD = _env_bool('OLLAMA_PRELOAD', False)
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')  # Ollama duration; -1 = never unload
+OLLAMA_PING_INTERVAL = float(os.getenv('OLLAMA_PING_INTERVAL', '240'))
+OLLAMA_PRELOAD_TIMEOUT = float(os.getenv('OLLAMA_PRELOAD_TIMEOUT', str(LLM_PROVIDER_LIMITS['ollama']['timeout'])))
+
 # PHP API backend
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost/ananya/api.php')
 
+# Shared connection pool for AnanyaAPIClient (opened/closed by the app lifespan)
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '15'))
+API_MAX_CONNECTIONS = int(os.getenv('API_MAX_CONNECTIONS', '20'))
+API_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('API_MAX_KEEPALIVE_CONNECTIONS', '10'))
+API_KEEPALIVE_EXPIRY = float(os.getenv('API_KEEPALIVE_EXPIRY', '30'))
+API_HTTP2 = _env_bool('API_HTTP2', False)  # needs the optional 'h2' package
+
+# Backend protection: concurrency cap, adaptive timeouts, retries, circuit breaker
+API_MAX_CONCURRENCY = int(os.getenv('API_MAX_CONCURRENCY', '10'))
+API_TIMEOUT_MIN = float(os.getenv('API_TIMEOUT_MIN', '1'))
+API_TIMEOUT_P99_MULTIPLIER = float(os.getenv('API_TIMEOUT_P99_MULTIPLIER', '3'))
+API_LATENCY_WINDOW = int(os.getenv('API_LATENCY_WINDOW', '200'))
+API_RETRIES = int(os.getenv('API_RETRIES', '2'))  # GET only
+API_RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', '0.1'))
+API_BREAKER_FAILURE_THRESHOLD = int(os.getenv('API_BREAKER_FAILURE_THRESHOLD', '5'))
+API_BREAKER_RESET_TIMEOUT = float(os.getenv('API_BREAKER_RESET_TIMEOUT', '30'))
+
+# In-process result cache for deterministic API endpoints
+API_CACHE_ENABLED = _env_bool('API_CACHE_ENABLED', True)
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '2048'))
+API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '7200'))  # matches api.php Cache-Control
+# Per-endpoint overrides, e.g. "analysis/detect-language=600,text/length=86400"
+API_CACHE_TTL_OVERRIDES = os.getenv('API_CACHE_TTL_OVERRIDES', '')
+# 'memory' (per process) or 'sqlite' (one file shared by all workers on the host)
+API_CACHE_BACKEND = os.getenv('API_CACHE_BACKEND', 'memory')
+API_CACHE_PATH = os.getenv(
+    'API_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'api_results.sqlite3'),
+)
+
+# Answer segmentation-only endpoints (reverse, length, codepoints, ...) in-process
+API_LOCAL_EVAL = _env_bool('API_LOCAL_EVAL', False)
+
+# Share one backend request between concurrent identical API calls
+API_COALESCE_ENABLED = _env_bool('API_COALESCE_ENABLED', True)
+
+# Operations per POST api.php/batch (keep <= API_MAX_BATCH_OPERATIONS in api.php)
+API_BATCH_MAX_OPERATIONS = int(os.getenv('API_BATCH_MAX_OPERATIONS', '200'))
+
+# /chat tool selection: send only the best-matching tool schemas to the LLM
+CHAT_TOOL_SELECTION = _env_bool('CHAT_TOOL_SELECTION', True)
+CHAT_TOOL_TOP_K = int(os.getenv('CHAT_TOOL_TOP_K', '8'))
+CHAT_TOOL_TOKEN_BUDGET = int(os.getenv('CHAT_TOOL_TOKEN_BUDGET', '1500'))  # estimated tokens
+
+# Cache whole /chat answers by normalized (question, language, model)
+CHAT_CACHE_ENABLED = _env_bool('CHAT_CACHE_ENABLED', True)
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1000'))
+CHAT_CACHE_TTL = float(os.getenv('CHAT_CACHE_TTL', '3600'))
+# POST /chat/cache/invalidate needs this in an X-Admin-Token header; when unset it is
+# only accepted from localhost
+CHAT_CACHE_ADMIN_TOKEN = os.getenv('CHAT_CACHE_ADMIN_TOKEN', '')
+
+# Answer common single-tool questions with pattern templates and no LLM call
+CHAT_FAST_PATH = _env_bool('CHAT_FAST_PATH', True)
+
+# Opt-in: local learned router (learned_router.py) for questions the templates miss;
+# predictions below CHAT_ROUTER_MIN_CONFIDENCE go to the LLM agent loop. With
+# CHAT_ROUTER_LOG_PATH set, answered (question, tool) pairs are appended for retraining.
+CHAT_LEARNED_ROUTER = _env_bool('CHAT_LEARNED_ROUTER', False)
+CHAT_ROUTER_MODEL_PATH = os.getenv(
+    'CHAT_ROUTER_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'router_model.json'),
+)
+CHAT_ROUTER_MIN_CONFIDENCE = float(os.getenv('CHAT_ROUTER_MIN_CONFIDENCE', '0.85'))
+CHAT_ROUTER_LOG_PATH = os.getenv('CHAT_ROUTER_LOG_PATH', '')
+
+# Let the LLM return several tool calls per step and run independent ones concurrently
+CHAT_PARALLEL_TOOL_CALLS = _env_bool('CHAT_PARALLEL_TOOL_CALLS', True)
+CHAT_TOOL_CONCURRENCY = int(os.getenv('CHAT_TOOL_CONCURRENCY', '4'))
+
+# Reuse a tool result when the LLM repeats the same call within one /chat request
+CHAT_TOOL_MEMO = _env_bool('CHAT_TOOL_MEMO', True)
+
+# Opt-in: start the likely tool calls (quoted/Indic words × best-ranked tools)
+# while the first LLM request is in flight; unused ones are cancelled
+CHAT_PREFETCH = _env_bool('CHAT_PREFETCH', False)
+CHAT_PREFETCH_MAX_CALLS = int(os.getenv('CHAT_PREFETCH_MAX_CALLS', '4'))
+
+# Feed tool results back to the LLM as the bare `result` payload in minified JSON
+# (no envelope, no \uXXXX escapes); the estimated token savings are logged
+CHAT_COMPACT_TOOL_RESULTS = _env_bool('CHAT_COMPACT_TOOL_RESULTS', True)
+
+# Prompt budget for each agent-loop LLM call (estimated tokens incl. tool schemas, 0 = off):
+# older tool results are compacted, then the oldest tool turns are summarized
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv('CHAT_CONTEXT_TOKEN_BUDGET', '4000'))
+CHAT_CONTEXT_MAX_LIST_ITEMS = int(os.getenv('CHAT_CONTEXT_MAX_LIST_ITEMS', '20'))
+
+# Admission control: at most CHAT_MAX_IN_FLIGHT agent loops at once (0 = unlimited),
+# CHAT_MAX_QUEUE more wait up to CHAT_QUEUE_TIMEOUT seconds; the rest get 429 + Retry-After
+CHAT_MAX_IN_FLIGHT = int(os.getenv('CHAT_MAX_IN_FLIGHT', '8'))
+CHAT_MAX_QUEUE = int(os.getenv('CHAT_MAX_QUEUE', '32'))
+CHAT_QUEUE_TIMEOUT = float(os.getenv('CHAT_QUEUE_TIMEOUT', '20'))
+
+# Request deadline: chat_api.php sends X-Request-Timeout (seconds it will wait); LLM,
+# api.php and queue timeouts are cut to what is left, CHAT_DEADLINE_MARGIN seconds early,
+# and a partial answer is returned when it runs out. CHAT_DEFAULT_DEADLINE applies
+# without the header (0 = no deadline)
+CHAT_DEFAULT_DEADLINE = float(os.getenv('CHAT_DEFAULT_DEADLINE', '0'))
+CHAT_DEADLINE_MARGIN = float(os.getenv('CHAT_DEADLINE_MARGIN', '1.0'))
+
 # MCP Server
 MCP_HOST = os.getenv('MCP_HOST', 'localhost')
 MCP_PORT = int(os.getenv('MCP_PORT', '8000'))
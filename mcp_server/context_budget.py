@@ -0,0 +1,201 @@
+"""
+Prompt budgeting for the /chat agent loop.
+
+Every iteration resends the whole conversation, so tool-heavy questions grow
+the prompt with each step. Before each LLM call ContextBudget.fit() checks
+the estimated prompt size (messages + tool schemas) against a token budget
+and, only when it is over:
+
+1. compacts older tool results: the `result` payload only, minified JSON,
+   long lists cut to the first few items with a "+N more" marker;
+2. drops the oldest tool turns (assistant tool calls + their results) and
+   replaces them with a one-line-per-call summary, appended to the system
+   prompt (a separate message could put two assistant turns in a row, which
+   some providers reject).
+
+The instructions in the system prompt, the user's question and the latest
+tool exchange are never changed. Compacted tool messages carry a marker key;
+send sendable(messages) to the provider, not the list itself. Token counts are the same ~4 characters/token estimate used by
+tool_catalog.py.
+
+With CHAT_COMPACT_TOOL_RESULTS the agent loop feeds every tool result back
+through compact_tool_result() (without the list cut) in the first place, so
+step 1 then only shortens long lists.
+"""
+
+import json
+from typing import Any, Optional
+
+from tool_catalog import estimate_tokens
+
+SUMMARY_PREFIX = "Earlier tool results (condensed):"
+# Set on tool messages that were already compacted (stripped by sendable())
+COMPACTED_KEY = "_compacted"
+
+
+def _get(message, key: str, default=None):
+    if isinstance(message, dict):
+        return message.get(key, default)
+    return getattr(message, key, default)
+
+
+def _tool_calls(message) -> list[tuple[str, str, str]]:
+    """(id, name, arguments) of an assistant message's tool calls (dict or SDK object)."""
+    calls = []
+    for tc in _get(message, "tool_calls") or []:
+        if isinstance(tc, dict):
+            fn = tc.get("function") or {}
+            calls.append((tc.get("id", ""), fn.get("name", ""), fn.get("arguments") or ""))
+        else:
+            calls.append((tc.id, tc.function.name, tc.function.arguments or ""))
+    return calls
+
+
+def message_text(message) -> str:
+    """The parts of a message that count towards the prompt."""
+    parts = [_get(message, "content") or ""]
+    for _id, name, arguments in _tool_calls(message):
+        parts.append(name + arguments)
+    return "".join(parts)
+
+
+def sendable(messages: list) -> list:
+    """`messages` without the bookkeeping keys ContextBudget adds."""
+    return [{k: v for k, v in m.items() if k != COMPACTED_KEY} if isinstance(m, dict) and COMPACTED_KEY in m else m
+            for m in messages]
+
+
+def estimate_prompt_tokens(messages: list, tool_tokens: int = 0) -> int:
+    """Rough prompt size of one LLM call: message contents plus tool schemas."""
+    return estimate_tokens("".join(message_text(m) for m in messages)) + tool_tokens
+
+
+def _truncate_lists(value: Any, max_items: int) -> Any:
+    if isinstance(value, list):
+        items = [_truncate_lists(v, max_items) for v in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"+{len(value) - max_items} more")
+        return items
+    if isinstance(value, dict):
+        return {k: _truncate_lists(v, max_items) for k, v in value.items()}
+    return value
+
+
+def _unwrap_envelope(value: Any) -> Any:
+    """The payload of an api.php response envelope (or the value itself)."""
+    if not isinstance(value, dict):
+        return value
+    if value.get("success") is False and value.get("error"):
+        return f"error: {value['error']}"
+    if "result" in value:
+        return value["result"]
+    if "data" in value and ("success" in value or "response_code" in value):
+        return value["data"]
+    return value
+
+
+def compact_tool_result(text: str, max_list_items: Optional[int] = 20) -> str:
+    """Smaller rendering of a tool's text output with the same meaning: the
+    `result` payload only, strings unquoted, true/false/null and numbers as
+    JSON literals, lists and objects as minified JSON with Indic text
+    unescaped. Lists longer than `max_list_items` are cut (None = keep all)."""
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    value = _unwrap_envelope(value)
+    if max_list_items is not None:
+        value = _truncate_lists(value, max_list_items)
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class ContextBudget:
+    """Keeps one request's messages under `max_tokens` (0 = no limit)."""
+
+    def __init__(self, max_tokens: int, max_list_items: int = 20, summary_chars: int = 160):
+        self.max_tokens = max_tokens
+        self.max_list_items = max_list_items
+        self.summary_chars = summary_chars
+        self._system_prompt: Optional[str] = None  # before any summary was appended
+        self._summary_lines: list[str] = []
+
+    def _turns(self, messages: list) -> list[list[int]]:
+        """Indexes of each tool turn: an assistant message with tool calls and its tool results."""
+        turns, i = [], 0
+        while i < len(messages):
+            if _get(messages[i], "role") == "assistant" and _tool_calls(messages[i]):
+                turn = [i]
+                i += 1
+                while i < len(messages) and _get(messages[i], "role") == "tool":
+                    turn.append(i)
+                    i += 1
+                turns.append(turn)
+            else:
+                i += 1
+        return turns
+
+    def _summarize(self, messages: list, turn: list[int]) -> list[str]:
+        results = {_get(messages[i], "tool_call_id"): _get(messages[i], "content") or "" for i in turn[1:]}
+        lines = []
+        for call_id, name, arguments in _tool_calls(messages[turn[0]]):
+            try:
+                args = json.loads(arguments or "{}")
+                args = ", ".join(f"{k}={v}" for k, v in args.items()) if isinstance(args, dict) else arguments
+            except ValueError:
+                args = arguments
+            result = results.get(call_id, "").replace("\n", " ")  # already compacted in step 1
+            line = f"- {name}({args}) → {result}"
+            if len(line) > self.summary_chars:
+                line = line[: self.summary_chars - 1] + "…"
+            lines.append(line)
+        return lines
+
+    def fit(self, messages: list, tool_tokens: int = 0) -> dict:
+        """Compact/prune `messages` in place if the prompt is over budget.
+        Returns {"tokens", "before", "compacted", "dropped_turns"} for logging."""
+        before = tokens = estimate_prompt_tokens(messages, tool_tokens)
+        info = {"tokens": tokens, "before": before, "compacted": 0, "dropped_turns": 0}
+        if not self.max_tokens or tokens <= self.max_tokens:
+            return info
+
+        turns = self._turns(messages)
+        stale = turns[:-1]  # the latest exchange stays intact
+
+        # 1. Compact the results of older turns
+        for turn in stale:
+            for i in turn[1:]:
+                message = messages[i]
+                if message.get(COMPACTED_KEY):
+                    continue
+                compacted = compact_tool_result(message.get("content") or "", self.max_list_items)
+                messages[i] = {**message, "content": compacted, COMPACTED_KEY: True}
+                if compacted != message.get("content"):
+                    info["compacted"] += 1
+        tokens = estimate_prompt_tokens(messages, tool_tokens)
+
+        # 2. Replace the oldest turns with a summary until the prompt fits
+        dropped: list[int] = []
+        summary_lines: list[str] = []
+        for turn in stale:
+            if tokens <= self.max_tokens:
+                break
+            summary_lines.extend(self._summarize(messages, turn))
+            dropped.extend(turn)
+            removed = "".join(message_text(messages[i]) for i in turn)
+            tokens -= estimate_tokens(removed)
+            info["dropped_turns"] += 1
+        if dropped:
+            for i in sorted(dropped, reverse=True):
+                del messages[i]
+            system = messages[0]
+            if self._system_prompt is None:
+                self._system_prompt = _get(system, "content") or ""
+            self._summary_lines.extend(summary_lines)
+            summary = "\n".join([SUMMARY_PREFIX] + self._summary_lines)
+            messages[0] = {**system, "content": f"{self._system_prompt}\n\n{summary}"}
+            tokens = estimate_prompt_tokens(messages, tool_tokens)
+
+        info["tokens"] = tokens
+        return info
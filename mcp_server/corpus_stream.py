@@ -0,0 +1,242 @@
+"""
+Streaming corpus analysis through the Ananya API.
+
+Pushes a word list (any iterable, async iterable or file) through a set of
+operations with bounded concurrency and yields one record per word as soon as
+it can be emitted, either in input order or in completion order. Words are read
+lazily and only a fixed window of them is ever held in memory, so memory use
+stays flat regardless of corpus size.
+
+Usage:
+    python corpus_stream.py ../test_data/telugu_omdb.txt \\
+        --ops analysis/is-palindrome,text/length,analysis/word-strength \\
+        --language telugu --concurrency 8 > results.ndjson
+
+Each output line is a JSON object:
+    {"index": 0, "word": "...", "results": {"text/length": 4, ...}, "errors": {}}
+Throughput and error statistics are written to stderr at the end.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+from urllib.parse import parse_qsl
+
+from api_client import AnanyaAPIClient
+from resilience import percentile
+
+Words = Union[Iterable[str], AsyncIterable[str]]
+
+
+@dataclass(frozen=True)
+class Operation:
+    """One API call to run per word: category/action plus extra params."""
+    category: str
+    action: str
+    params: tuple = ()
+
+    @property
+    def name(self) -> str:
+        return f"{self.category}/{self.action}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Operation":
+        """Parse 'category/action' or 'category/action?input2=x'."""
+        path, _, query = spec.strip().partition("?")
+        category, _, action = path.strip("/").partition("/")
+        if not category or not action:
+            raise ValueError(f"Invalid operation '{spec}' (expected category/action)")
+        return cls(category, action, tuple(parse_qsl(query)))
+
+
+@dataclass
+class CorpusStats:
+    """Throughput and error counters for one streaming run."""
+    words: int = 0
+    operations: int = 0
+    errors: int = 0
+    words_with_errors: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = 0.0
+    # Bounded sample of per-word latencies for percentiles (keeps memory flat)
+    _latencies: deque = field(default_factory=lambda: deque(maxlen=2000))
+
+    def record(self, latency: float, op_count: int, error_count: int) -> None:
+        self.words += 1
+        self.operations += op_count
+        self.errors += error_count
+        if error_count:
+            self.words_with_errors += 1
+        self._latencies.append(latency)
+
+    def summary(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        p50 = percentile(self._latencies, 50)
+        p95 = percentile(self._latencies, 95)
+        return {
+            "words": self.words,
+            "operations": self.operations,
+            "errors": self.errors,
+            "words_with_errors": self.words_with_errors,
+            "elapsed_s": round(elapsed, 3),
+            "words_per_s": round(self.words / elapsed, 2) if elapsed > 0 else None,
+            "operations_per_s": round(self.operations / elapsed, 2) if elapsed > 0 else None,
+            "word_latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "word_latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+async def _aiter_words(words: Words) -> AsyncIterator[str]:
+    if hasattr(words, "__aiter__"):
+        async for word in words:
+            yield word
+    else:
+        for word in words:
+            yield word
+
+
+async def _enumerate(aiterable: AsyncIterator[str]) -> AsyncIterator[tuple[int, str]]:
+    index = 0
+    async for item in aiterable:
+        yield index, item
+        index += 1
+
+
+def iter_words_file(path: str) -> Iterable[str]:
+    """Lazily yield stripped, non-empty lines from a file ('-' for stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            word = line.strip()
+            if word:
+                yield word
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+async def _analyze_word(api: AnanyaAPIClient, index: int, word: str,
+                        operations: list[Operation], language: str) -> tuple[dict, float]:
+    start = time.monotonic()
+    calls = [
+        api._call(op.category, op.action, {"string": word, "language": language, **dict(op.params)})
+        for op in operations
+    ]
+    responses = await asyncio.gather(*calls, return_exceptions=True)
+    results, errors = {}, {}
+    for op, data in zip(operations, responses):
+        if isinstance(data, BaseException):
+            errors[op.name] = str(data)
+        elif isinstance(data, dict) and data.get("success") is False:
+            errors[op.name] = data.get("error") or "Unknown API error"
+        else:
+            results[op.name] = data.get("result", data.get("data")) if isinstance(data, dict) else data
+    record = {"index": index, "word": word, "results": results, "errors": errors}
+    return record, time.monotonic() - start
+
+
+async def stream_corpus(
+    api: AnanyaAPIClient,
+    words: Words,
+    operations: list[Operation],
+    language: str = "english",
+    concurrency: int = 8,
+    ordered: bool = True,
+    stats: CorpusStats = None,
+) -> AsyncIterator[dict]:
+    """Yield one result record per word.
+
+    At most `concurrency` words are in flight, and at most 4 × concurrency
+    words are buffered waiting to be yielded. The producer blocks when
+    either limit is reached, so a slow consumer slows down reading.
+    """
+    stats = stats if stats is not None else CorpusStats()
+    in_flight = asyncio.Semaphore(concurrency)
+    window = asyncio.Semaphore(concurrency * 4)
+    done: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def run(index: int, word: str) -> None:
+        try:
+            record, latency = await _analyze_word(api, index, word, operations, language)
+            stats.record(latency, len(operations), len(record["errors"]))
+        finally:
+            in_flight.release()
+        await done.put(record)
+
+    async def produce() -> None:
+        try:
+            async for index, word in _enumerate(_aiter_words(words)):
+                await window.acquire()
+                await in_flight.acquire()
+                task = asyncio.create_task(run(index, word))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await done.put(finished)
+
+    tasks: set[asyncio.Task] = set()
+    producer = asyncio.create_task(produce())
+    pending: dict[int, dict] = {}
+    next_index = 0
+    try:
+        while True:
+            record = await done.get()
+            if record is finished:
+                break
+            if not ordered:
+                window.release()
+                yield record
+                continue
+            pending[record["index"]] = record
+            while next_index in pending:
+                window.release()
+                yield pending.pop(next_index)
+                next_index += 1
+        await producer  # surface producer errors (e.g. unreadable file)
+    finally:
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
+        stats.finished_at = time.monotonic()
+
+
+async def _main(args) -> int:
+    operations = [Operation.parse(spec) for spec in args.ops.split(",") if spec.strip()]
+    api = AnanyaAPIClient()
+    stats = CorpusStats()
+    out = sys.stdout
+    try:
+        async for record in stream_corpus(
+            api, iter_words_file(args.words_file), operations,
+            language=args.language, concurrency=args.concurrency,
+            ordered=(args.order == "input"), stats=stats,
+        ):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        await api.close()
+    print(json.dumps(stats.summary()), file=sys.stderr)
+    return 1 if stats.errors else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream a word list through Ananya API operations as NDJSON.")
+    parser.add_argument("words_file", help="one word per line ('-' for stdin)")
+    parser.add_argument("--ops", required=True,
+                        help="comma-separated category/action list, e.g. analysis/is-palindrome,text/length")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--order", choices=("input", "completion"), default="input")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
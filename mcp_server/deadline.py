@@ -0,0 +1,97 @@
+"""
+Per-request deadlines for /chat and /chat/stream.
+
+chat_api.php waits MCP_TIMEOUT seconds for the MCP server and then answers
+on its own, but the agent loop could keep going far longer (up to 5 LLM
+calls with 60–600 s timeouts, plus the tool calls). Everything after PHP gave
+up only burns LLM quota and api.php capacity. So call_mcp_server() sends the
+time it will wait in an X-Request-Timeout header (in seconds). The endpoints
+turn that into a Deadline, set CHAT_DEADLINE_MARGIN seconds earlier so the
+answer still arrives in time. Without the header, CHAT_DEFAULT_DEADLINE
+applies (0 = no deadline).
+
+The deadline is kept in a context variable, so the tool tasks a request
+starts inherit it. Every downstream wait is cut to the time left:
+
+- each LLM completion's timeout (and the provider rate-limit wait);
+- each api.php attempt in AnanyaAPIClient, which also skips retries that
+  could not finish in time;
+- the admission queue wait.
+
+When the deadline runs out, the agent loop stops and answers with the tool
+results it has so far. A queue or rate-limit wait that the deadline cut short
+raises DeadlineExceeded instead of the usual 429, since retrying would not help.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+HEADER = "X-Request-Timeout"
+
+
+class DeadlineExceeded(Exception):
+    """A wait was cut short by the request's own deadline (not by server load)."""
+
+
+class Deadline:
+    """A point in time (monotonic clock) by which the request must be answered."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def loop_time(self) -> float:
+        """The deadline on the event loop's clock, for asyncio.timeout_at()."""
+        return asyncio.get_running_loop().time() + (self.expires - time.monotonic())
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    """The deadline of the request being served, if it has one."""
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make `deadline` the current one for this task (and the tasks it starts)."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def timeout(default: float) -> float:
+    """`default` cut to the current request's remaining time (unchanged without a deadline)."""
+    deadline = _current.get()
+    return default if deadline is None else min(default, deadline.remaining())
+
+
+def from_header(value: Optional[str], default: float = 0.0, margin: float = 0.0) -> Optional[Deadline]:
+    """Deadline from an X-Request-Timeout value (seconds), `margin` seconds early.
+    A missing or invalid header (not a finite number > 0) falls back to `default`;
+    a default of 0 means no deadline."""
+    seconds = default
+    if value:
+        try:
+            parsed = float(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None and math.isfinite(parsed) and parsed > 0:
+            seconds = parsed
+    if not seconds or not math.isfinite(seconds) or seconds <= 0:
+        return None
+    # Keep at least a little time even for a tiny budget, or nothing could run
+    return Deadline(max(seconds - margin, min(seconds, 0.5)))
@@ -0,0 +1,206 @@
+"""
+Deterministic fast path for common single-tool questions.
+
+Questions like "is racecar a palindrome?" or "అమ్మ length ఎంత?" map to one
+tool with obvious arguments, so /chat can answer them without any LLM call.
+Each template is a fully anchored pattern for one tool: a question only takes
+the fast path when the whole question matches and every argument was
+extracted. Anything else goes to the agent loop.
+
+Words may be bare or quoted. The language of a word is taken from its script
+(Telugu, Hindi, Gujarati, Malayalam); Latin words are treated as English. The
+request language is used only when a word's script is unknown.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Bare word: letters/digits plus Indic combining marks and ZWJ/ZWNJ
+_TOKEN = r"[\w\u0900-\u0D7F\u200c\u200d'-]+"
+_QUOTES = [('"', '"'), ("'", "'"), ("“", "”"), ("‘", "’")]
+# Bare word for QW slots: Indic script only (a Latin word there must be quoted)
+_INDIC_TOKEN = r"[\u0900-\u0D7F\u200c\u200d]+"
+
+# Optional politeness/lead-in before the question proper
+_PRE = (r"^\s*(?:(?:please|kindly|can you|could you|tell me|check|check if|check whether|"
+        r"find|find out|let me know)\s+)*")
+_END = r"(?:\s+(?:please|చెప్పండి|చెప్పు|చెప్పగలరా))?\s*[?.!]*\s*$"
+_THE_WORD = r"(?:the\s+)?(?:word\s+|string\s+|text\s+)?"
+
+# Unicode blocks → API language
+_SCRIPTS = [
+    ((0x0C00, 0x0C7F), "telugu"),
+    ((0x0900, 0x097F), "hindi"),
+    ((0x0A80, 0x0AFF), "gujarati"),
+    ((0x0D00, 0x0D7F), "malayalam"),
+]
+
+# Captures that are almost certainly not the word the user means
+# (checked for word slots only; X may legitimately be "a")
+_NOT_A_WORD = frozenset({
+    "it", "this", "that", "these", "those", "word", "words", "a", "an", "the",
+    "string", "text", "something", "anything", "what", "which",
+})
+
+
+def _slot(name: str, bare: str = _TOKEN) -> str:
+    """Regex for one argument: a quoted string or a bare token."""
+    options = [
+        f"{re.escape(open_q)}(?P<{name}__{i}>[^{re.escape(close_q)}]+){re.escape(close_q)}"
+        for i, (open_q, close_q) in enumerate(_QUOTES)
+    ]
+    options.append(f"(?P<{name}__bare>{bare})")
+    return "(?:" + "|".join(options) + ")"
+
+
+def script_language(text: str) -> Optional[str]:
+    """Language implied by the first script character in `text` (None if unknown)."""
+    for ch in text:
+        cp = ord(ch)
+        for (lo, hi), lang in _SCRIPTS:
+            if lo <= cp <= hi:
+                return lang
+        if ch.isascii() and ch.isalpha():
+            return "english"
+    return None
+
+
+@dataclass(frozen=True)
+class FastRoute:
+    tool: str
+    params: dict
+    template: str
+
+
+class _Template:
+    def __init__(self, tool: str, pattern: str, args: dict, language_arg: Optional[str] = "language"):
+        self.tool = tool
+        self.source = pattern
+        # args: tool parameter name → slot name used in the pattern
+        self.args = args
+        self.language_arg = language_arg
+        expanded = pattern.format(
+            PRE=_PRE, END=_END, THE=_THE_WORD,
+            **{slot: _slot(slot, _INDIC_TOKEN if slot.startswith("Q") else _TOKEN) for slot in set(args.values())},
+        )
+        self.regex = re.compile(expanded, re.IGNORECASE | re.UNICODE)
+
+    def match(self, question: str, language: str) -> Optional[FastRoute]:
+        m = self.regex.match(question)
+        if not m:
+            return None
+        params = {}
+        for param, slot in self.args.items():
+            value = next((v for k, v in m.groupdict().items()
+                          if v is not None and k.split("__")[0] == slot), None)
+            if value is None or not value.strip():
+                return None
+            if slot != "X" and value.strip().lower() in _NOT_A_WORD:
+                return None
+            params[param] = value.strip()
+        if self.language_arg:
+            first = params[next(iter(self.args))]
+            params[self.language_arg] = script_language(first) or language or "english"
+        return FastRoute(self.tool, params, self.source)
+
+
+# (tool, pattern, {tool param: slot}) — slots W, W2 and X are filled by _slot().
+# QW is a word that must be quoted or in an Indic script, for phrasings that are
+# also everyday questions ("how long is Ramadan?").
+# Order matters: more specific templates come first.
+_TEMPLATES = [
+    # ── text ──
+    ("reverse_text", r"{PRE}(?:what is |what's )?(?:the )?reverse (?:of )?{THE}{W}{END}", {"word": "W"}),
+    ("reverse_text", r"{PRE}(?:reverse|spell) {THE}{W}(?: backwards?)?{END}", {"word": "W"}),
+    ("reverse_text", r"{PRE}{THE}{W} (?:reversed|backwards?){END}", {"word": "W"}),
+    ("reverse_text", r"{PRE}{W}\s*(?:ని |ను )?(?:reverse|రివర్స్|తిరగేసి రాయి|తిరగేయి|తిరగేయండి)"
+                     r"(?: చేయండి| చెయ్యి| చేయి| చేసి చూపించు)?{END}", {"word": "W"}),
+    ("get_length_no_spaces", r"{PRE}(?:what is |what's )?(?:the )?length of {THE}{W} without spaces{END}",
+     {"word": "W"}),
+    ("get_text_length", r"{PRE}(?:what is |what's )?(?:the )?length of {THE}{W}{END}", {"word": "W"}),
+    ("get_text_length", r"{PRE}how long is (?:the )?(?:word|string|text) {W}{END}", {"word": "W"}),
+    ("get_text_length", r"{PRE}how long is {QW}{END}", {"word": "QW"}),
+    ("get_text_length", r"{PRE}how many (?:logical )?(?:characters|letters) (?:are )?(?:in|does) {THE}{W}"
+                        r"(?: have)?{END}", {"word": "W"}),
+    ("get_text_length", r"{PRE}{W}\s*(?:యొక్క )?(?:length|పొడవు)(?: ఎంత| ఏమిటి| ఎంతా)?{END}", {"word": "W"}),
+    ("get_text_length", r"{PRE}{W}\s*(?:లో )?ఎన్ని అక్షరాలు(?: ఉన్నాయి)?{END}", {"word": "W"}),
+    # ── characters ──
+    ("get_logical_characters", r"{PRE}(?:what are |show |list |get )?(?:the )?logical char(?:acter)?s (?:of|in) "
+                               r"{THE}{W}{END}", {"word": "W"}),
+    ("get_code_points", r"{PRE}(?:what are |show |list |get )?(?:the )?(?:unicode )?code ?points (?:of|for|in) "
+                        r"{THE}{W}{END}", {"word": "W"}),
+    ("get_base_characters", r"{PRE}(?:what are |show |list |get )?(?:the )?base char(?:acter)?s (?:of|in) "
+                            r"{THE}{W}{END}", {"word": "W"}),
+    # ── analysis ──
+    ("check_palindrome", r"{PRE}(?:is|whether) {THE}{W} (?:is )?a palindrome{END}", {"word": "W"}),
+    ("check_palindrome", r"{PRE}{THE}{W} (?:is )?(?:a )?palindrome\s*(?:or not)?{END}", {"word": "W"}),
+    ("check_palindrome", r"{PRE}{W}\s*(?:ఒక )?(?:palindrome|పాలిండ్రోమ్|పాలిండ్రోమా)"
+                         r"(?:\s*(?:ఆ|నా|ఏనా|అవునా|కాదా))?{END}", {"word": "W"}),
+    ("check_anagram", r"{PRE}are {THE}{W} and {THE}{W2} anagrams(?: of each other)?{END}",
+     {"word1": "W", "word2": "W2"}),
+    ("check_anagram", r"{PRE}(?:is|whether) {THE}{W} (?:is )?an anagram of {THE}{W2}{END}",
+     {"word1": "W", "word2": "W2"}),
+    ("check_anagram", r"{PRE}{W}\s*(?:మరియు|,|and)\s*{W2}\s*(?:anagrams?|అనగ్రామ్‌?లు|అనగ్రామ్)"
+                      r"(?:\s*(?:ఆ|నా|అవునా|కాదా))?{END}", {"word1": "W", "word2": "W2"}),
+    ("can_make_word", r"{PRE}can (?:i|you|we|one) (?:make|form|spell|create) {THE}{W2} (?:from|using|with|out of) "
+                      r"(?:the letters (?:of|in) )?{THE}{W}{END}", {"source_word": "W", "target_word": "W2"}),
+    ("get_word_strength", r"{PRE}(?:what is |what's )?(?:the )?(?:word )?strength of {THE}{W}{END}", {"word": "W"}),
+    ("get_word_weight", r"{PRE}(?:what is |what's )?(?:the )?(?:word )?weight of {THE}{W}{END}", {"word": "W"}),
+    ("get_word_level", r"{PRE}(?:what is |what's )?(?:the )?(?:word |difficulty )?level of {THE}{W}{END}",
+     {"word": "W"}),
+    ("detect_language", r"{PRE}(?:what|which) language is {THE}{W}(?: in| written in)?{END}", {"text": "W"}, None),
+    ("detect_language", r"{PRE}detect (?:the )?language (?:of )?{THE}{W}{END}", {"text": "W"}, None),
+    ("detect_language", r"{PRE}{W}\s*ఏ భాష(?:\s*(?:లో ఉంది|ది))?{END}", {"text": "W"}, None),
+    # ── comparison / validation ──
+    ("check_starts_with", r"{PRE}does {THE}{W} (?:start|begin) with {X}{END}", {"word": "W", "prefix": "X"}),
+    ("check_starts_with", r"{PRE}{W}\s*{X}\s*తో (?:మొదలవుతుందా|ప్రారంభమవుతుందా){END}", {"word": "W", "prefix": "X"}),
+    ("check_ends_with", r"{PRE}does {THE}{W} end with {X}{END}", {"word": "W", "suffix": "X"}),
+    ("check_ends_with", r"{PRE}{W}\s*{X}\s*తో ముగుస్తుందా{END}", {"word": "W", "suffix": "X"}),
+    ("check_equals", r"{PRE}(?:is|are) {THE}{W} (?:and|equal to|the same as) {THE}{W2}(?: equal| the same)?{END}",
+     {"word1": "W", "word2": "W2"}),
+    ("check_contains_char", r"{PRE}does {THE}{W} (?:contain|have|include) (?:the |a )?(?:letter|character|char) "
+                            r"{X}{END}", {"word": "W", "char": "X"}),
+    ("check_contains_string", r"{PRE}does {THE}{W} (?:contain|include) {X}{END}", {"word": "W", "substring": "X"}),
+    ("check_contains_string", r"{PRE}{W}\s*లో\s*{X}\s*(?:ఉందా|ఉన్నదా|ఉన్నాయా){END}", {"word": "W", "substring": "X"}),
+    ("check_contains_space", r"{PRE}does {THE}{W} (?:contain|have) (?:a |any )?spaces?{END}", {"word": "W"}),
+    ("check_is_vowel", r"{PRE}is {X} a vowel{END}", {"character": "X"}),
+    ("check_is_consonant", r"{PRE}is {X} a consonant{END}", {"character": "X"}),
+]
+
+
+class FastPathRouter:
+    """Matches a question against the templates and counts fast-path coverage."""
+
+    def __init__(self, categories: dict):
+        known = {t for info in categories.values() for t in info["tools"]}
+        self.templates = []
+        for entry in _TEMPLATES:
+            tool, pattern, args = entry[:3]
+            if tool not in known:
+                raise ValueError(f"Fast-path template for unknown tool '{tool}'")
+            language_arg = entry[3] if len(entry) > 3 else "language"
+            self.templates.append(_Template(tool, pattern, args, language_arg))
+        self.requests = 0
+        self.hits = 0
+        self.fallbacks = 0  # matched, but the tool failed so the agent loop answered
+
+    def route(self, question: str, language: str = "english") -> Optional[FastRoute]:
+        """The tool and arguments for `question`, or None if it needs the LLM."""
+        self.requests += 1
+        question = " ".join(question.split())
+        for template in self.templates:
+            route = template.match(question, language)
+            if route is not None:
+                self.hits += 1
+                return route
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "templates": len(self.templates),
+            "requests": self.requests,
+            "hits": self.hits,
+            "tool_failures": self.fallbacks,
+            "coverage": round(self.hits / self.requests, 4) if self.requests else 0.0,
+        }
@@ -0,0 +1,175 @@
+"""
+Python port of the PHP logical-character parsers.
+
+Mirrors telugu_parser.php, hindi_parser.php, gujarati_parser.php and
+malayalam_parser.php as they are used by word_processor.php, so the MCP server
+can segment words without a round-trip to api.php. The port is deliberately
+literal, quirks included:
+
+- English (and any unknown language) goes through the Telugu parser, exactly
+  like wordProcessor does.
+- The PHP parsers walk json_encode() output, so characters outside the
+  script's block are split into the bytes of their escape sequence
+  (e.g. "/" becomes "\\", "/" and "é" becomes "\\", "u", "0", "0", "e", "9").
+- The Telugu parser drops the first zero-width non-joiner (U+200C).
+"""
+
+import json
+from dataclasses import dataclass
+
+ZWNJ = 0x200C
+
+
+@dataclass(frozen=True)
+class ScriptRules:
+    """Unicode ranges used by one PHP parser."""
+    block: tuple[int, int]
+    consonants: tuple[int, int]
+    dependent_vowels: tuple[int, int]
+    dependents: frozenset
+    vowels: tuple[int, int]
+    halant: int
+    two_part_vowels: tuple[int, int] = (1, 0)   # empty range unless Malayalam
+    drops_zwnj: bool = False                    # telugu_parser.php only
+
+    def is_char(self, ch: int) -> bool:
+        return self.block[0] <= ch <= self.block[1] or ch == ZWNJ
+
+    def is_consonant(self, ch: int) -> bool:
+        return self.consonants[0] <= ch <= self.consonants[1]
+
+    def is_dependent_vowel(self, ch: int) -> bool:
+        return (self.dependent_vowels[0] <= ch <= self.dependent_vowels[1]
+                or self.two_part_vowels[0] <= ch <= self.two_part_vowels[1])
+
+    def is_dependent(self, ch: int) -> bool:
+        return ch in self.dependents
+
+    def is_vowel(self, ch: int) -> bool:
+        return self.vowels[0] <= ch <= self.vowels[1]
+
+    def is_halant(self, ch: int) -> bool:
+        return ch == self.halant
+
+
+TELUGU = ScriptRules(
+    block=(0x0C00, 0x0C7F), consonants=(0x0C15, 0x0C39), dependent_vowels=(0x0C3E, 0x0C4C),
+    dependents=frozenset({0x0C01, 0x0C02, 0x0C03}), vowels=(0x0C05, 0x0C14), halant=0x0C4D,
+    drops_zwnj=True,
+)
+HINDI = ScriptRules(
+    block=(0x0900, 0x097F), consonants=(0x0915, 0x0939), dependent_vowels=(0x093E, 0x094C),
+    dependents=frozenset({0x0900, 0x0901, 0x0902, 0x0903}), vowels=(0x0904, 0x0914), halant=0x094D,
+)
+GUJARATI = ScriptRules(
+    block=(0x0A80, 0x0AFF), consonants=(0x0A95, 0x0AB9), dependent_vowels=(0x0ABE, 0x0ACC),
+    dependents=frozenset({0x0A81, 0x0A82, 0x0A83}), vowels=(0x0A85, 0x0A94), halant=0x0ACD,
+)
+MALAYALAM = ScriptRules(
+    block=(0x0D00, 0x0D7F), consonants=(0x0D15, 0x0D3A), dependent_vowels=(0x0D3E, 0x0D48),
+    dependents=frozenset({0x0D01, 0x0D02, 0x0D03}), vowels=(0x0D05, 0x0D14), halant=0x0D4D,
+    two_part_vowels=(0x0D4A, 0x0D4C),
+)
+
+SUPPORTED_LANGUAGES = ("english", "telugu", "hindi", "gujarati", "malayalam")
+
+
+def normalize_language(language) -> str:
+    """Same rules as wordProcessor::normalizeLanguage (unknown → telugu)."""
+    if not isinstance(language, str):
+        return "telugu"
+    lang = language.strip().lower()
+    return lang if lang in SUPPORTED_LANGUAGES else "telugu"
+
+
+def rules_for(language) -> ScriptRules:
+    lang = normalize_language(language)
+    return {"hindi": HINDI, "gujarati": GUJARATI, "malayalam": MALAYALAM}.get(lang, TELUGU)
+
+
+def _php_json_encode(word: str) -> str:
+    """json_encode() with PHP's default flags (ASCII output, escaped slashes)."""
+    return json.dumps(word, ensure_ascii=True).replace("/", "\\/")
+
+
+def explode(word: str, rules: ScriptRules) -> list[int]:
+    """Port of explode_telugu()/hindi_explode()/...: script code points plus
+    the raw bytes of everything else in the JSON-encoded word."""
+    encoded = _php_json_encode(word)
+    exploded = []
+    pos = 0
+    while pos < len(encoded) - 1:
+        ch = encoded[pos]
+        if ch == '"':
+            pos += 1
+            continue
+        if ch == "\\" and encoded[pos + 1] == "u":
+            try:
+                code = int(encoded[pos + 2:pos + 6], 16)
+            except ValueError:
+                code = None
+            if code is not None and rules.is_char(code):
+                exploded.append(code)
+                pos += 6
+                continue
+        exploded.append(ord(ch))
+        pos += 1
+
+    if rules.drops_zwnj:
+        if ZWNJ in exploded:
+            exploded.remove(ZWNJ)
+        exploded = [c for c in exploded if c]
+    return exploded
+
+
+def parse_to_code_points(word: str, language="english") -> list[list[int]]:
+    """Group code points into logical characters (port of parseToCodePoints)."""
+    rules = rules_for(language)
+    chars = explode(word, rules)
+    n = len(chars)
+    logical: list[list[int]] = []
+    buffer: list[int] = []
+    i = 0
+    while i < n:
+        current = chars[i]
+        i += 1
+        buffer.append(current)
+        if i == n:
+            logical.append(buffer)
+            continue
+        nxt = chars[i]
+        if rules.is_dependent(nxt):
+            buffer.append(nxt)
+            i += 1
+            logical.append(buffer)
+            buffer = []
+            continue
+        if rules.is_halant(current):
+            if rules.is_consonant(nxt):
+                continue
+        elif rules.is_consonant(current):
+            if rules.is_halant(nxt) or rules.is_dependent_vowel(nxt):
+                continue
+        elif rules.is_vowel(current):
+            if rules.is_dependent_vowel(nxt):
+                buffer.append(nxt)
+                i += 1
+        logical.append(buffer)
+        buffer = []
+    return logical
+
+
+def code_points_to_character(cluster: list[int], rules: ScriptRules) -> str:
+    """Port of parseToCharacter(): the first non-script value wins as a byte."""
+    out = []
+    for code in cluster:
+        if not rules.is_char(code):
+            return chr(code % 256)
+        out.append(chr(code))
+    return "".join(out)
+
+
+def parse_to_logical_chars(word: str, language="english") -> list[str]:
+    """Split a word into logical characters the way wordProcessor does."""
+    rules = rules_for(language)
+    return [code_points_to_character(c, rules) for c in parse_to_code_points(word, language)]
@@ -0,0 +1,370 @@
+"""
+Local learned router: picks the tool for a /chat question without an LLM call.
+
+A multinomial logistic regression over sparse binary features: lower-cased
+word unigrams and bigrams plus character 2-4-grams of every word (with
+word-boundary markers), so English and Indic-script phrasings ("palindromic",
+"ఎన్ని అక్షరాలు") both carry signal. Quoted strings are masked first because
+they are arguments, not intent. It is trained offline with plain SGD from
+JSONL (question, tool) pairs and saved as a JSON file of non-zero weights.
+A prediction is a few hundred dict lookups (well under a millisecond) and
+comes with its softmax probability.
+
+Labels are tool names plus "multi" (several tool calls) and "direct" (no
+tool), as in the Stage 1 router prompt in server.py. The server acts only on
+confident predictions of single-argument tools whose argument it can find
+(see LearnedRouter.route); everything else goes to the LLM agent loop.
+
+Training data is router_seed.jsonl plus the pairs the server appends to
+CHAT_ROUTER_LOG_PATH for answered questions:
+
+    python learned_router.py train --data router_seed.jsonl --data ../logs/router.jsonl
+    python learned_router.py predict "does racecar read the same backwards"
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+from fast_router import FastRoute, script_language
+from prefetch import candidate_words
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_model.json")
+MODEL_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[\w\u0900-\u0D7F\u200c\u200d']+")
+_QUOTED_RE = re.compile(r'"[^"\n]{1,60}"|“[^”\n]{1,60}”|‘[^’\n]{1,60}’|(?:^|(?<=\s))\'[^\'\n]{1,60}\'(?=[\s?.!,;:]|$)')
+_MASK = "qqarg"
+
+# Never taken as the argument, even if they were rare in the training data
+_STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "of", "in", "for", "to", "me", "my", "it", "this", "that",
+    "what", "whats", "what's", "which", "how", "does", "do", "can", "you", "please", "tell", "word",
+    "string", "text", "letter", "letters", "and", "or", "not", "i", "be", "by", "with", "about",
+})
+
+# Parameters the router can fill from one word of the question
+_ARGUMENT_PARAMS = ("word", "text", "character")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def features(question: str) -> list[str]:
+    """Sparse binary features of a question (quoted arguments masked)."""
+    tokens = _tokens(_QUOTED_RE.sub(f" {_MASK} ", question))
+    feats = {f"w:{t}" for t in tokens}
+    feats.update(f"b:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for t in tokens:
+        if t == _MASK:
+            continue
+        padded = f"<{t}>"
+        for n in (2, 3, 4):
+            feats.update(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    return sorted(feats)
+
+
+def _softmax(scores: list[float]) -> list[float]:
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class RouterModel:
+    """Label set, bias and sparse per-feature weights, plus the intent vocabulary."""
+
+    def __init__(self, labels: list[str], bias: list[float], weights: dict[str, dict[int, float]],
+                 vocabulary: Iterable[str] = (), meta: Optional[dict] = None):
+        self.labels = labels
+        self.bias = bias
+        self.weights = weights
+        # Tokens that express intent in the training data (never an argument)
+        self.vocabulary = frozenset(vocabulary)
+        self.meta = meta or {}
+
+    def scores(self, question: str) -> list[float]:
+        scores = list(self.bias)
+        for feat in features(question):
+            for i, w in self.weights.get(feat, {}).items():
+                scores[i] += w
+        return scores
+
+    def predict(self, question: str) -> tuple[str, float]:
+        """(label, probability) of the most likely label."""
+        probs = _softmax(self.scores(question))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    def argument(self, question: str) -> Optional[str]:
+        """The one word the question is about: a single quoted string, or
+        the single token that is neither intent vocabulary nor a stopword."""
+        quoted = candidate_words(question, max_words=2)
+        if quoted and _QUOTED_RE.search(question):
+            return quoted[0] if len(quoted) == 1 else None
+        unknown = [t for t in _TOKEN_RE.findall(question)
+                   if t.lower() not in self.vocabulary and t.lower() not in _STOPWORDS]
+        return unknown[0] if len(set(unknown)) == 1 else None
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MODEL_VERSION,
+            "labels": self.labels,
+            "bias": [round(b, 3) for b in self.bias],
+            "weights": {f: {str(i): round(w, 3) for i, w in ws.items()} for f, ws in sorted(self.weights.items())},
+            "vocabulary": sorted(self.vocabulary),
+            "meta": self.meta,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "RouterModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported router model version {data.get('version')} in {path}")
+        weights = {f: {int(i): w for i, w in ws.items()} for f, ws in data["weights"].items()}
+        return cls(data["labels"], data["bias"], weights, data.get("vocabulary", ()), data.get("meta"))
+
+
+# ── Training ────────────────────────────────────────────────────────────
+
+def load_records(paths: Iterable[str]) -> list[dict]:
+    """(question, tool[, word]) records from JSONL files; malformed lines are skipped."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("question") and record.get("tool"):
+                    records.append(record)
+    return records
+
+
+# Tool parameters that hold the words a question is about
+_RECORD_WORD_PARAMS = ("word", "word1", "word2", "source_word", "target_word", "text", "character")
+
+
+def record_word(arguments: Optional[dict]) -> Optional[str]:
+    """The word(s) a tool call was about, space-separated, for append_record():
+    without them, retraining would learn the user's words as intent vocabulary."""
+    words = []
+    for param in _RECORD_WORD_PARAMS:
+        value = (arguments or {}).get(param)
+        if isinstance(value, str) and value.strip() and value.strip() not in words:
+            words.append(value.strip())
+    return " ".join(words) or None
+
+
+def append_record(path: str, question: str, tool: str, word: Optional[str] = None) -> None:
+    """Log one answered question for the next training run."""
+    record = {"question": question, "tool": tool}
+    if word:
+        record["word"] = word
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _vocabulary(records: list[dict], min_count: int = 2) -> set[str]:
+    """Tokens seen at least `min_count` times outside the recorded argument."""
+    as_intent, as_argument = Counter(), Counter()
+    for r in records:
+        argument = {t for t in _tokens(r.get("word") or "")}
+        for t in set(_tokens(_QUOTED_RE.sub(" ", r["question"]))):
+            (as_argument if t in argument else as_intent)[t] += 1
+    return {t for t, n in as_intent.items() if n >= min_count and n > as_argument[t]}
+
+
+def train(records: list[dict], epochs: int = 30, learning_rate: float = 0.5,
+          l2: float = 1e-4, seed: int = 0, min_weight: float = 0.05) -> RouterModel:
+    """Softmax regression by SGD; weights below `min_weight` are pruned,
+    which keeps the model file small at no measurable accuracy cost."""
+    labels = sorted({r["tool"] for r in records})
+    index = {label: i for i, label in enumerate(labels)}
+    examples = [(features(r["question"]), index[r["tool"]]) for r in records]
+    bias = [0.0] * len(labels)
+    weights: dict[str, list[float]] = {}
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(examples)
+        rate = learning_rate / (1 + epoch * 0.2)
+        for feats, target in examples:
+            scale = 1.0 / math.sqrt(len(feats) or 1)
+            rows = [weights.setdefault(f, [0.0] * len(labels)) for f in feats]
+            scores = list(bias)
+            for row in rows:
+                for i, w in enumerate(row):
+                    scores[i] += w
+            probs = _softmax(scores)
+            for i, p in enumerate(probs):
+                grad = p - (1.0 if i == target else 0.0)
+                bias[i] -= rate * grad
+                step = rate * grad * scale
+                for row in rows:
+                    row[i] -= step + rate * l2 * row[i]
+    sparse = {}
+    for feat, row in weights.items():
+        kept = {i: w for i, w in enumerate(row) if abs(w) >= min_weight}
+        if kept:
+            sparse[feat] = kept
+    meta = {"examples": len(records), "labels": dict(Counter(r["tool"] for r in records)),
+            "epochs": epochs, "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    return RouterModel(labels, bias, sparse, _vocabulary(records), meta)
+
+
+def evaluate(model: RouterModel, records: list[dict], min_confidence: float) -> dict:
+    """Accuracy overall, and coverage/accuracy of the predictions above `min_confidence`."""
+    correct = confident = confident_correct = 0
+    for r in records:
+        label, confidence = model.predict(r["question"])
+        correct += label == r["tool"]
+        if confidence >= min_confidence:
+            confident += 1
+            confident_correct += label == r["tool"]
+    n = len(records) or 1
+    return {
+        "examples": len(records),
+        "accuracy": round(correct / n, 4),
+        "coverage": round(confident / n, 4),
+        "confident_accuracy": round(confident_correct / confident, 4) if confident else None,
+    }
+
+
+# ── Serving ─────────────────────────────────────────────────────────────
+
+class LearnedRouter:
+    """Serves RouterModel predictions as fast-path routes and counts outcomes."""
+
+    def __init__(self, model: RouterModel, catalog, min_confidence: float = 0.8):
+        self.model = model
+        self.min_confidence = min_confidence
+        # Tools the router may call directly: exactly one required parameter it can fill
+        self.argument_param: dict[str, str] = {}
+        self.language_param: dict[str, bool] = {}
+        for entry in catalog.entries:
+            params = entry.schema["function"].get("parameters") or {}
+            required = params.get("required") or []
+            if len(required) == 1 and required[0] in _ARGUMENT_PARAMS:
+                self.argument_param[entry.name] = required[0]
+                self.language_param[entry.name] = "language" in (params.get("properties") or {})
+        self.requests = 0
+        self.routed = 0
+        self.low_confidence = 0
+        self.not_single_tool = 0
+        self.no_argument = 0
+        self.fallbacks = 0  # routed, but the tool failed so the agent loop answered
+        self._seconds = 0.0
+
+    @classmethod
+    def from_file(cls, path: str, catalog, min_confidence: float = 0.8) -> "LearnedRouter":
+        return cls(RouterModel.load(path), catalog, min_confidence)
+
+    def route(self, question: str, language: str = "english") -> Optional[FastRoute]:
+        """The tool and arguments for `question`, or None if the LLM should decide."""
+        start = time.perf_counter()
+        try:
+            self.requests += 1
+            label, confidence = self.model.predict(question)
+            if confidence < self.min_confidence:
+                self.low_confidence += 1
+                return None
+            param = self.argument_param.get(label)
+            if param is None:
+                self.not_single_tool += 1  # multi, direct or a multi-argument tool
+                return None
+            word = self.model.argument(question)
+            if word is None:
+                self.no_argument += 1
+                return None
+            params = {param: word}
+            if self.language_param[label]:
+                params["language"] = script_language(word) or language or "english"
+            self.routed += 1
+            return FastRoute(label, params, f"learned:{confidence:.2f}")
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "labels": len(self.model.labels),
+            "trained_on": self.model.meta.get("examples"),
+            "min_confidence": self.min_confidence,
+            "requests": self.requests,
+            "routed": self.routed,
+            "low_confidence": self.low_confidence,
+            "not_single_tool": self.not_single_tool,
+            "no_argument": self.no_argument,
+            "tool_failures": self.fallbacks,
+            "avg_route_ms": round(self._seconds / self.requests * 1000, 3) if self.requests else 0.0,
+        }
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────
+
+def _cmd_train(args) -> int:
+    records = load_records(args.data)
+    if not records:
+        print("No training records found", file=sys.stderr)
+        return 1
+    if args.holdout > 0:
+        shuffled = list(records)
+        random.Random(args.seed).shuffle(shuffled)
+        cut = int(len(shuffled) * (1 - args.holdout))
+        trial = train(shuffled[:cut], epochs=args.epochs, seed=args.seed, min_weight=args.min_weight)
+        report = evaluate(trial, shuffled[cut:], args.min_confidence)
+        print(f"holdout ({args.holdout:.0%}): {json.dumps(report)}", file=sys.stderr)
+    model = train(records, epochs=args.epochs, seed=args.seed, min_weight=args.min_weight)
+    model.save(args.out)
+    print(f"trained on {len(records)} examples, {len(model.labels)} labels, "
+          f"{len(model.weights)} features → {args.out} ({os.path.getsize(args.out) // 1024} KiB)", file=sys.stderr)
+    return 0
+
+
+def _cmd_predict(args) -> int:
+    model = RouterModel.load(args.model)
+    for question in args.question:
+        start = time.perf_counter()
+        label, confidence = model.predict(question)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(json.dumps({"question": question, "tool": label, "confidence": round(confidence, 4),
+                          "argument": model.argument(question), "ms": round(elapsed, 3)}, ensure_ascii=False))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train or query the local /chat tool router.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train", help="train a model from JSONL (question, tool) records")
+    p_train.add_argument("--data", action="append", required=True, help="JSONL file (repeatable)")
+    p_train.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    p_train.add_argument("--epochs", type=int, default=30)
+    p_train.add_argument("--holdout", type=float, default=0.2, help="fraction held out for the accuracy report")
+    p_train.add_argument("--min-confidence", type=float, default=0.8)
+    p_train.add_argument("--min-weight", type=float, default=0.05, help="prune smaller weights")
+    p_train.add_argument("--seed", type=int, default=0)
+    p_predict = sub.add_parser("predict", help="print the predicted tool for each question")
+    p_predict.add_argument("question", nargs="+")
+    p_predict.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+    sys.exit(_cmd_train(args) if args.command == "train" else _cmd_predict(args))
+
+
+if __name__ == "__main__":
+    main()
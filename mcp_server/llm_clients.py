@@ -0,0 +1,152 @@
+"""
+Shared OpenAI-compatible clients for the LLM providers.
+
+Creating an openai.AsyncOpenAI per /chat request also creates a new HTTP
+pool, so every request paid for a fresh TLS handshake. LLMClientRegistry keeps
+one client per (provider, base URL), each with its own connection limits and
+timeout from config.LLM_PROVIDER_LIMITS. It is shared by all requests and
+closed by the Starlette lifespan.
+
+Providers with a requests_per_minute limit also get a TokenBucket;
+`await registry.throttle(provider)` before each completion keeps us under
+the provider's quota instead of waiting for its 429s. Both the rate-limit
+wait and timeout(provider) are cut to the request's deadline (deadline.py).
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+import openai
+
+from config import (
+    LLM_PROVIDER, GEMINI_API_KEY, OPENAI_API_KEY, GROQ_API_KEY, OLLAMA_URL,
+    LLM_PROVIDER_LIMITS, LLM_KEEPALIVE_EXPIRY, LLM_RATE_LIMIT_MAX_WAIT,
+)
+from admission import RateLimited, TokenBucket
+import deadline
+import metrics
+
+logger = logging.getLogger("ananya-mcp")
+
+
+def provider_endpoint(provider: str) -> tuple[str, Optional[str]]:
+    """(api_key, base_url) for a provider; base_url None means the OpenAI default."""
+    if provider == "gemini":
+        return GEMINI_API_KEY, "https://generativelanguage.googleapis.com/v1beta/openai/"
+    if provider == "groq":
+        return GROQ_API_KEY, "https://api.groq.com/openai/v1"
+    if provider == "ollama":
+        return "ollama", OLLAMA_URL.rstrip("/") + "/v1"
+    if provider == "openai":
+        return OPENAI_API_KEY, None
+    raise ValueError(f"Unknown LLM_PROVIDER in config: {provider}")
+
+
+class LLMClientRegistry:
+    """One long-lived AsyncOpenAI (and connection pool) per provider/base URL."""
+
+    def __init__(self, limits: Optional[dict] = None, keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY):
+        self.limits = limits if limits is not None else LLM_PROVIDER_LIMITS
+        self.keepalive_expiry = keepalive_expiry
+        self._clients: dict[tuple[str, Optional[str]], openai.AsyncOpenAI] = {}
+        self._lookups: dict[tuple[str, Optional[str]], int] = {}
+        self._buckets: dict[str, Optional[TokenBucket]] = {}
+
+    def get(self, provider: Optional[str] = None) -> openai.AsyncOpenAI:
+        """Return the shared client for `provider` (default LLM_PROVIDER), creating it once."""
+        provider = (provider or LLM_PROVIDER).lower()
+        api_key, base_url = provider_endpoint(provider)
+        key = (provider, base_url)
+        self._lookups[key] = self._lookups.get(key, 0) + 1
+        client = self._clients.get(key)
+        if client is None:
+            client = self._create(provider, api_key, base_url)
+            self._clients[key] = client
+        return client
+
+    def _bucket(self, provider: str) -> Optional[TokenBucket]:
+        if provider not in self._buckets:
+            settings = self.limits.get(provider, {})
+            rpm = settings.get("requests_per_minute") or 0
+            self._buckets[provider] = TokenBucket(rpm / 60.0, settings.get("burst", 1)) if rpm > 0 else None
+        return self._buckets[provider]
+
+    async def throttle(self, provider: Optional[str] = None,
+                       max_wait: float = LLM_RATE_LIMIT_MAX_WAIT) -> float:
+        """Wait for the provider's rate limit (if any). Returns the seconds waited.
+        Raises RateLimited when the wait would exceed `max_wait`, or DeadlineExceeded
+        when it would outlast the request's deadline."""
+        provider = (provider or LLM_PROVIDER).lower()
+        limit = deadline.timeout(max_wait)
+        bucket = self._bucket(provider)
+        if bucket is None:
+            return 0.0
+        try:
+            waited = await bucket.acquire(limit)
+        except asyncio.TimeoutError:
+            if limit < max_wait:
+                raise deadline.DeadlineExceeded(f"LLM rate limit wait ({provider})") from None
+            metrics.ADMISSION_REJECTED.inc(reason="rate_limited")
+            raise RateLimited(provider, bucket.delay()) from None
+        metrics.LLM_RATE_LIMIT_WAIT.observe(waited, provider=provider)
+        if waited > 0:
+            logger.info(f"LLM rate limit ({provider}): waited {waited:.2f}s")
+        return waited
+
+    def timeout(self, provider: Optional[str] = None) -> float:
+        """The provider's completion timeout, cut to the current request's deadline."""
+        provider = (provider or LLM_PROVIDER).lower()
+        return deadline.timeout(self.limits.get(provider, {}).get("timeout", 60.0))
+
+    def _create(self, provider: str, api_key: str, base_url: Optional[str]) -> openai.AsyncOpenAI:
+        settings = self.limits.get(provider, {})
+        timeout = settings.get("timeout", 60.0)
+        max_connections = settings.get("max_connections", 20)
+        max_keepalive = settings.get("max_keepalive_connections", 10)
+        http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            follow_redirects=True,
+        )
+        logger.info(
+            f"LLM client created for {provider} ({base_url or 'default endpoint'}, "
+            f"timeout={timeout}s, max_connections={max_connections})"
+        )
+        kwargs = {"api_key": api_key, "timeout": timeout, "http_client": http_client}
+        if base_url:
+            kwargs["base_url"] = base_url
+        return openai.AsyncOpenAI(**kwargs)
+
+    async def close(self) -> None:
+        """Close every client and its connection pool."""
+        clients, self._clients = self._clients, {}
+        for (provider, _base_url), client in clients.items():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Closing LLM client for {provider} failed: {e}")
+        if clients:
+            logger.info(f"Closed {len(clients)} LLM client(s)")
+
+    def stats(self) -> dict:
+        """Open clients and how often each was reused (for /health)."""
+        return {
+            "clients": [
+                {
+                    "provider": provider,
+                    "base_url": base_url,
+                    "timeout": self.limits.get(provider, {}).get("timeout"),
+                    "max_connections": self.limits.get(provider, {}).get("max_connections"),
+                    "requests": self._lookups.get((provider, base_url), 0),
+                }
+                for provider, base_url in self._clients
+            ],
+            "rate_limits": {provider: bucket.stats()
+                            for provider, bucket in self._buckets.items() if bucket is not None},
+        }
@@ -0,0 +1,314 @@
+"""
+Offline load test for /chat.
+
+Starts the mock LLM and mock api.php (mock_backends.py) and an MCP server
+pointed at them, then drives POST /chat at a fixed concurrency and reports
+throughput, latency percentiles and a per-stage breakdown taken from the
+server's /metrics histograms (LLM, tool, api.php and end-to-end time).
+No real LLM quota or PHP install is needed.
+
+Usage:
+    python loadtest.py --concurrency 16 --requests 400 --llm-latency 800
+    python loadtest.py --save-baseline loadtest_baseline.json
+    python loadtest.py --baseline loadtest_baseline.json --tolerance 0.2
+    python loadtest.py --llm-load-ms 8000 --warmup 0 --env OLLAMA_PRELOAD=true
+
+With --baseline the run exits with status 1 when p95 latency or throughput
+is worse than the baseline by more than the tolerance, or the error rate
+rises. --url benchmarks an already running server instead (its LLM and
+api.php are then whatever it is configured with). --llm-load-ms makes the
+mock LLM pay an Ollama-style model load on first use, to compare cold starts
+with and without OLLAMA_PRELOAD.
+
+The /chat answer cache, the api.php result cache and API_LOCAL_EVAL are off
+unless --chat-cache, --api-cache or --local-eval is given, so every tool call
+reaches the mock api.php and the backend stage is actually measured.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Optional
+
+import httpx
+
+from mock_backends import load_scenarios
+from resilience import percentile
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name{labels} value  →  (name, value); labels are summed over
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{[^}]*\})?\s+(\S+)$")
+
+# /metrics histograms used for the per-stage breakdown
+_STAGES = {
+    "chat": "ananya_chat_request_duration_seconds",
+    "llm": "ananya_llm_request_duration_seconds",
+    "tool": "ananya_tool_duration_seconds",
+    "backend": "ananya_backend_request_duration_seconds",
+}
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    """Sum every _sum/_count series in a Prometheus text page by metric name."""
+    totals: dict[str, float] = defaultdict(float)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = _SAMPLE_RE.match(line)
+        if m and (m.group(1).endswith("_sum") or m.group(1).endswith("_count")):
+            try:
+                totals[m.group(1)] += float(m.group(2))
+            except ValueError:
+                pass
+    return dict(totals)
+
+
+def stage_breakdown(before: dict, after: dict, requests: int) -> dict:
+    """Per-request and per-call time for each stage between two /metrics scrapes."""
+    breakdown = {}
+    for stage, name in _STAGES.items():
+        seconds = after.get(f"{name}_sum", 0.0) - before.get(f"{name}_sum", 0.0)
+        calls = after.get(f"{name}_count", 0.0) - before.get(f"{name}_count", 0.0)
+        breakdown[stage] = {
+            "calls": int(calls),
+            "calls_per_request": round(calls / requests, 2) if requests else None,
+            "ms_per_request": round(seconds * 1000 / requests, 1) if requests else None,
+            "ms_per_call": round(seconds * 1000 / calls, 1) if calls else None,
+        }
+    chat_ms = breakdown["chat"]["ms_per_request"]
+    if chat_ms is not None:
+        # Tools may run concurrently, so this underestimates the server's own overhead
+        breakdown["other_ms_per_request"] = round(
+            chat_ms - breakdown["llm"]["ms_per_request"] - breakdown["tool"]["ms_per_request"], 1)
+    return breakdown
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url, timeout=1.0)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+def _start(args: list[str], env: dict, log) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=_HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def _stop(proc: Optional[subprocess.Popen]) -> None:
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def drive(url: str, questions: list[str], total: int, concurrency: int,
+                language: str = "english", timeout: float = 300.0) -> dict:
+    """POST `total` questions (round-robin) with `concurrency` workers."""
+    latencies: list[float] = []
+    errors: dict[str, int] = defaultdict(int)
+    routes: dict[str, int] = defaultdict(int)
+    next_index = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal next_index
+            while next_index < total:
+                question = questions[next_index % len(questions)]
+                next_index += 1
+                start = time.monotonic()
+                try:
+                    resp = await client.post(f"{url}/chat", json={"question": question, "language": language})
+                    elapsed = time.monotonic() - start
+                    if resp.status_code != 200:
+                        errors[f"HTTP {resp.status_code}"] += 1
+                        continue
+                    body = resp.json()
+                    routes["cache" if body.get("cached") else body.get("route", "unknown")] += 1
+                    latencies.append(elapsed)
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    def ms(pct: float) -> Optional[float]:
+        value = percentile(latencies, pct)
+        return round(value * 1000, 1) if value is not None else None
+
+    error_count = sum(errors.values())
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": dict(errors),
+        "error_rate": round(error_count / total, 4) if total else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": ms(50), "p95": ms(95), "p99": ms(99),
+            "max": round(max(latencies) * 1000, 1) if latencies else None,
+        },
+        "routes": dict(routes),
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages (empty when the run is within tolerance)."""
+    problems = []
+    base_p95 = (baseline.get("latency_ms") or {}).get("p95")
+    p95 = report["latency_ms"]["p95"]
+    if base_p95 and p95 is not None and p95 > base_p95 * (1 + tolerance):
+        problems.append(f"p95 latency {p95} ms > baseline {base_p95} ms (+{tolerance:.0%})")
+    base_rps = baseline.get("throughput_rps")
+    rps = report["throughput_rps"]
+    if base_rps and rps is not None and rps < base_rps * (1 - tolerance):
+        problems.append(f"throughput {rps} req/s < baseline {base_rps} req/s (-{tolerance:.0%})")
+    base_errors = baseline.get("error_rate", 0.0)
+    if report["error_rate"] > base_errors + 0.01:
+        problems.append(f"error rate {report['error_rate']:.2%} > baseline {base_errors:.2%}")
+    return problems
+
+
+def _server_env(args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LLM_PROVIDER": "ollama",
+        "LLM_MODEL": "mock",
+        "OLLAMA_URL": f"http://{args.host}:{args.llm_port}",
+        "API_BASE_URL": f"http://{args.host}:{args.api_port}/api.php",
+        "MCP_HOST": args.host,
+        "MCP_PORT": str(args.port),
+        # Otherwise every repeat of a question is a cache hit and the loop is never measured
+        "CHAT_CACHE_ENABLED": "true" if args.chat_cache else "false",
+        # Likewise for tool calls: answered in-process, they never reach (mock) api.php
+        "API_CACHE_ENABLED": "true" if args.api_cache else "false",
+        "API_LOCAL_EVAL": "true" if args.local_eval else "false",
+    })
+    for item in args.env or []:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+async def _main(args) -> int:
+    scenarios = load_scenarios(args.scenarios)
+    questions = [s["question"] for s in scenarios]
+    url = (args.url or f"http://{args.host}:{args.port}").rstrip("/")
+
+    procs: list[subprocess.Popen] = []
+    log = open(args.log, "a") if args.log else subprocess.DEVNULL
+    try:
+        if not args.url:
+            mock_args = ["mock_backends.py", "--host", args.host,
+                         "--llm-port", str(args.llm_port), "--api-port", str(args.api_port),
+                         "--llm-latency", str(args.llm_latency), "--llm-jitter", str(args.llm_jitter),
+                         "--api-latency", str(args.api_latency), "--api-jitter", str(args.api_jitter),
+                         "--llm-load-ms", str(args.llm_load_ms)]
+            if args.scenarios:
+                mock_args += ["--scenarios", args.scenarios]
+            procs.append(_start(mock_args, dict(os.environ), log))
+            await _wait_ready(f"http://{args.host}:{args.llm_port}/_stats")
+            await _wait_ready(f"http://{args.host}:{args.api_port}/_stats")
+            procs.append(_start(["server.py"], _server_env(args), log))
+            # With OLLAMA_PRELOAD the server only answers once the mock model is loaded
+            await _wait_ready(f"{url}/health", timeout=30.0 + args.llm_load_ms / 1000.0)
+
+        if args.warmup:
+            await drive(url, questions, args.warmup, min(args.concurrency, args.warmup), args.language)
+
+        mocks = {} if args.url else {
+            "mock_llm": f"http://{args.host}:{args.llm_port}/_stats",
+            "mock_api": f"http://{args.host}:{args.api_port}/_stats",
+        }
+        async with httpx.AsyncClient() as client:
+            before = parse_metrics((await client.get(f"{url}/metrics")).text)
+            mocks_before = {name: (await client.get(u)).json() for name, u in mocks.items()}
+            report = await drive(url, questions, args.requests, args.concurrency, args.language)
+            after = parse_metrics((await client.get(f"{url}/metrics")).text)
+            for name, u in mocks.items():
+                counts = (await client.get(u)).json()
+                report[name] = {k: v - mocks_before[name].get(k, 0) for k, v in counts.items()}
+        report["stages"] = stage_breakdown(before, after, report["succeeded"])
+        report["settings"] = {
+            "llm_latency_ms": args.llm_latency, "api_latency_ms": args.api_latency,
+            "chat_cache": args.chat_cache, "api_cache": args.api_cache, "local_eval": args.local_eval,
+            "scenarios": len(scenarios), "url": args.url,
+        }
+    finally:
+        for proc in reversed(procs):
+            _stop(proc)
+        if log is not subprocess.DEVNULL:
+            log.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare_to_baseline(report, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        if problems:
+            return 1
+        print("No regression against baseline", file=sys.stderr)
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline /chat load test with a mock LLM and mock api.php.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10, help="requests sent before measuring")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--scenarios", help="JSON file of {question, steps} scenarios (see mock_backends.py)")
+    parser.add_argument("--llm-latency", type=float, default=500.0, help="mean mock LLM delay in ms")
+    parser.add_argument("--llm-jitter", type=float, default=100.0)
+    parser.add_argument("--llm-load-ms", type=float, default=0.0,
+                        help="simulated Ollama model load on first use, in ms")
+    parser.add_argument("--api-latency", type=float, default=10.0, help="mean mock api.php delay in ms")
+    parser.add_argument("--api-jitter", type=float, default=5.0)
+    parser.add_argument("--chat-cache", action="store_true", help="keep the /chat answer cache enabled")
+    parser.add_argument("--api-cache", action="store_true", help="keep the api.php result cache enabled")
+    parser.add_argument("--local-eval", action="store_true", help="answer simple endpoints in-process (API_LOCAL_EVAL)")
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE",
+                        help="extra environment for the MCP server (repeatable)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100, help="port for the MCP server under test")
+    parser.add_argument("--llm-port", type=int, default=8101)
+    parser.add_argument("--api-port", type=int, default=8102)
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--log", help="append mock and server output to this file")
+    parser.add_argument("--baseline", help="fail (exit 1) on regression against this report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="write this run's report as the new baseline")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+In-process evaluation of the Ananya endpoints that only need segmentation.
+
+When API_LOCAL_EVAL is enabled, AnanyaAPIClient answers these endpoints from
+indic_parser.py instead of calling api.php:
+
+    text/reverse, text/length, characters/codepoints,
+    validation/contains-space, comparison/equals, comparison/compare-to
+
+Responses use the same envelope as sendResponse() in api.php. Inputs that
+api.php would reject (missing string/language) are left to the backend so
+error messages stay identical.
+
+Differential test mode compares local answers against the PHP API:
+    python local_engine.py --diff ../test_data/telugu_omdb.txt --language telugu
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Callable, Optional
+
+from indic_parser import parse_to_code_points, parse_to_logical_chars
+
+
+def _php_empty(value) -> bool:
+    """PHP empty() for a query-string value ("" and "0" are empty)."""
+    return value is None or str(value) in ("", "0")
+
+
+def _php_strcmp(a: str, b: str) -> int:
+    """strcmp() as returned by PHP 8.2+: -1, 0 or 1 over UTF-8 bytes."""
+    a_bytes, b_bytes = a.encode("utf-8"), b.encode("utf-8")
+    return (a_bytes > b_bytes) - (a_bytes < b_bytes)
+
+
+def _envelope(message: str, string: str, language: str, result: Any) -> dict:
+    return {
+        "response_code": 200,
+        "message": message,
+        "string": string,
+        "language": language,
+        "data": result,
+        "success": True,
+        "result": result,
+        "error": None,
+        "local": True,
+    }
+
+
+# category/action → (success message from api.php, needs non-empty language, evaluator)
+LOCAL_ENDPOINTS: dict[str, tuple[str, bool, Callable[[str, str, str], Any]]] = {
+    "text/reverse": (
+        "Text reversed", False,
+        lambda s, lang, _: "".join(reversed(parse_to_logical_chars(s, lang))),
+    ),
+    "text/length": (
+        "Length calculated", False,
+        lambda s, lang, _: len(parse_to_code_points(s, lang)),
+    ),
+    "characters/codepoints": (
+        "Code points processed", True,
+        lambda s, lang, _: parse_to_code_points(s, lang),
+    ),
+    "validation/contains-space": (
+        "Space check completed", False,
+        lambda s, lang, _: " " in parse_to_logical_chars(s, lang),
+    ),
+    "comparison/equals": (
+        "Equality check completed", True,
+        lambda s, _lang, other: s == other,
+    ),
+    "comparison/compare-to": (
+        "Comparison completed", True,
+        lambda s, _lang, other: _php_strcmp(s, other),
+    ),
+}
+
+
+def can_evaluate(category: str, action: str) -> bool:
+    return f"{category}/{action}" in LOCAL_ENDPOINTS
+
+
+def evaluate(category: str, action: str, params: dict) -> Optional[dict]:
+    """Answer a call locally, or return None if it must go to api.php."""
+    endpoint = LOCAL_ENDPOINTS.get(f"{category}/{action}")
+    if endpoint is None:
+        return None
+    message, needs_language, fn = endpoint
+
+    string = params.get("string")
+    language = params.get("language")
+    if _php_empty(string) or (needs_language and _php_empty(language)):
+        return None
+    if language is None:
+        language = "telugu"  # api.php's default for text/validation handlers
+    other = params.get("input2")
+    other = "" if other is None else str(other)
+
+    return _envelope(message, str(string), str(language), fn(str(string), str(language), other))
+
+
+# ── Differential test mode ─────────────────────────────────────────────
+
+def _same(endpoint: str, local: Any, remote: Any) -> bool:
+    if endpoint == "comparison/compare-to" and isinstance(remote, int):
+        # PHP < 8.2 returns the byte difference rather than -1/1
+        return (remote > 0) - (remote < 0) == local
+    return local == remote
+
+
+def _read_words(path: str, limit: int) -> list[str]:
+    words = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if word:
+                words.append(word)
+            if limit and len(words) >= limit:
+                break
+    return words
+
+
+async def run_differential(path: str, language: str, limit: int = 0, chunk: int = 100) -> int:
+    """Compare every local endpoint with api.php for each word in `path`.
+    Returns the number of mismatches (and backend errors)."""
+    from api_client import AnanyaAPIClient
+
+    api = AnanyaAPIClient()
+    api.cache = None  # always ask the backend
+    words = _read_words(path, limit)
+
+    operations = []
+    for i, word in enumerate(words):
+        other = words[i - 1] if i else word
+        for endpoint in LOCAL_ENDPOINTS:
+            category, action = endpoint.split("/")
+            operations.append({
+                "category": category, "action": action,
+                "params": {"string": word, "input2": other, "language": language},
+            })
+
+    mismatches = errors = 0
+    try:
+        for start in range(0, len(operations), chunk):
+            ops = operations[start:start + chunk]
+            remote_items = await api.batch(ops)
+            for op, item in zip(ops, remote_items):
+                endpoint = f"{op['category']}/{op['action']}"
+                local = evaluate(op["category"], op["action"], op["params"])
+                if not item.get("success"):
+                    errors += 1
+                    print(f"ERROR    {endpoint} {op['params']['string']!r}: {item.get('error')}")
+                    continue
+                local_result = local["result"] if local else None
+                if not _same(endpoint, local_result, item.get("result")):
+                    mismatches += 1
+                    print(json.dumps({
+                        "endpoint": endpoint, "params": op["params"],
+                        "local": local_result, "php": item.get("result"),
+                    }, ensure_ascii=False))
+    finally:
+        await api.close()
+
+    total = len(operations)
+    print(f"\n{len(words)} words, {total} comparisons: "
+          f"{total - mismatches - errors} match, {mismatches} mismatch, {errors} backend errors")
+    return mismatches + errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare local evaluation with the PHP API.")
+    parser.add_argument("--diff", metavar="WORDS_FILE", required=True,
+                        help="word list, one word per line (e.g. ../test_data/telugu_omdb.txt)")
+    parser.add_argument("--language", default="telugu")
+    parser.add_argument("--limit", type=int, default=0, help="only test the first N words")
+    args = parser.parse_args()
+    failures = asyncio.run(run_differential(args.diff, args.language, args.limit))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
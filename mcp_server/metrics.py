@@ -0,0 +1,276 @@
+"""
+Prometheus metrics for the MCP server, without the prometheus_client dependency.
+
+Counters, gauges and histograms are kept in process memory and rendered in
+the Prometheus text exposition format by GET /metrics. The server records:
+
+- LLM call latency by provider/model, and whether a preloaded Ollama model is warm
+- MCP tool latency by tool name, repeated calls and speculative prefetches
+- PHP backend (api.php) latency by category/action
+- agent loop iterations per request and /chat latency by route, and requests
+  cut short by their deadline, a provider rate limit or a client disconnect
+- cache hits, misses and hit ratios (refreshed when /metrics is scraped)
+- admission queue depth, in-flight loops, queue wait and rejections, and
+  time spent waiting on the per-provider LLM rate limit
+
+All updates happen on the event loop, so no locking is needed. Label values
+must come from a bounded set (tool names, endpoints, configured models); tool
+names come from the LLM, so pass them through tool_label() first.
+"""
+
+import math
+from typing import Container, Iterable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the LLM buckets go further because provider timeouts are 60–600 s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def tool_label(name: str, known: Container[str]) -> str:
+    """`name` if it is a real tool, else "unknown" (hallucinated names would
+    each start a new time series)."""
+    return name if name in known else "unknown"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (set when /metrics is scraped, or live)."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts plus _sum and _count, per label set."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # label key → [per-bucket counts (non-cumulative) + overflow, sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Named metrics rendered together in registration order."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "ananya_llm_request_duration_seconds", "LLM chat completion latency.",
+    ("provider", "model"), buckets=LLM_LATENCY_BUCKETS,
+))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "ananya_llm_errors_total", "LLM chat completion calls that raised.", ("provider", "model"),
+))
+LLM_MODEL_WARM = REGISTRY.register(Gauge(
+    "ananya_llm_model_warm", "1 while the preloaded local model is resident (Ollama warm-keeping).", ("model",),
+))
+TOOL_LATENCY = REGISTRY.register(Histogram(
+    "ananya_tool_duration_seconds", "MCP tool call latency, including the backend call.", ("tool",),
+))
+TOOL_ERRORS = REGISTRY.register(Counter(
+    "ananya_tool_errors_total", "MCP tool calls that returned an error.", ("tool",),
+))
+TOOL_DUPLICATES = REGISTRY.register(Counter(
+    "ananya_tool_duplicate_calls_total", "Repeated identical tool calls within one /chat request.", ("tool",),
+))
+PREFETCHES = REGISTRY.register(Counter(
+    "ananya_prefetch_total", "Speculative tool prefetches by outcome (used or unused).", ("outcome",),
+))
+BACKEND_LATENCY = REGISTRY.register(Histogram(
+    "ananya_backend_request_duration_seconds", "api.php HTTP request latency per attempt.",
+    ("category", "action"),
+))
+BACKEND_ERRORS = REGISTRY.register(Counter(
+    "ananya_backend_errors_total", "api.php requests that failed (HTTP error, timeout or connection error).",
+    ("category", "action"),
+))
+AGENT_ITERATIONS = REGISTRY.register(Histogram(
+    "ananya_agent_iterations", "LLM iterations per agent loop run.",
+    buckets=(1, 2, 3, 4, 5, 10),
+))
+CHAT_LATENCY = REGISTRY.register(Histogram(
+    "ananya_chat_request_duration_seconds", "End-to-end /chat answer latency by route.",
+    ("route",), buckets=LLM_LATENCY_BUCKETS,
+))
+CHAT_CUT_SHORT = REGISTRY.register(Counter(
+    "ananya_chat_cut_short_total", "/chat requests stopped early, by reason (deadline, rate_limited or disconnect).", ("reason",),
+))
+CACHE_HITS = REGISTRY.register(Gauge(
+    "ananya_cache_hits", "Cache hits since start.", ("cache",),
+))
+CACHE_MISSES = REGISTRY.register(Gauge(
+    "ananya_cache_misses", "Cache misses since start.", ("cache",),
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "ananya_cache_hit_ratio", "Cache hits / lookups since start.", ("cache",),
+))
+TOOL_RESULT_TOKENS_SAVED = REGISTRY.register(Counter(
+    "ananya_tool_result_tokens_saved_total",
+    "Estimated prompt tokens saved by compacting tool results fed back to the LLM.", ("tool",),
+))
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "ananya_llm_prompt_tokens", "Estimated prompt tokens per agent-loop LLM call (after budgeting).",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+))
+ADMISSION_IN_FLIGHT = REGISTRY.register(Gauge(
+    "ananya_admission_in_flight", "Agent loops currently running.",
+))
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "ananya_admission_queue_depth", "Requests waiting for an agent loop slot.",
+))
+ADMISSION_WAIT = REGISTRY.register(Histogram(
+    "ananya_admission_wait_seconds", "Time admitted requests spent queued for a slot.",
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "ananya_admission_rejected_total", "Requests rejected with 429 by reason.", ("reason",),
+))
+LLM_RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "ananya_llm_rate_limit_wait_seconds", "Time LLM calls waited for the provider token bucket.",
+    ("provider",),
+))
+
+
+def record_cache(name: str, stats: dict) -> None:
+    """Copy a cache's stats() counters into the cache gauges."""
+    hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+    CACHE_HITS.set(hits, cache=name)
+    CACHE_MISSES.set(misses, cache=name)
+    lookups = hits + misses
+    CACHE_HIT_RATIO.set(hits / lookups if lookups else 0.0, cache=name)
@@ -0,0 +1,340 @@
+"""
+Local stand-ins for the LLM provider and api.php, for offline benchmarks.
+
+- Mock LLM: an OpenAI-compatible POST /v1/chat/completions that replays a
+  scripted conversation per question (tool calls first, then a final answer)
+  after a configurable delay. Point the MCP server at it with
+  LLM_PROVIDER=ollama and OLLAMA_URL=http://127.0.0.1:<llm port>.
+  With --llm-load-ms it also behaves like Ollama's model residency: the
+  first use of a model pays the load time, POST /api/generate (no prompt)
+  loads it and renews keep_alive, and GET /api/ps lists loaded models.
+- Mock api.php: GET /api.php/{category}/{action} and POST /api.php/batch
+  returning the usual response envelope with plausible results.
+
+Both record request counts at GET /_stats. loadtest.py starts this module in
+a subprocess; it can also be run on its own:
+
+    python mock_backends.py --llm-port 8101 --api-port 8102 --llm-latency 800
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Each scenario: a question and the LLM's scripted replies, one per agent-loop
+# iteration. A reply is either a list of tool calls or the final answer text.
+# Questions with no steps are expected to be answered by the fast path.
+DEFAULT_SCENARIOS = [
+    {
+        "question": "Reverse the word hello and tell me whether the result is a palindrome",
+        "steps": [
+            [{"name": "reverse_text", "arguments": {"word": "hello", "language": "english"}}],
+            [{"name": "check_palindrome", "arguments": {"word": "olleh", "language": "english"}}],
+            "The reverse of hello is olleh, and olleh is not a palindrome.",
+        ],
+    },
+    {
+        "question": "Which of level, rotor and apple are palindromes?",
+        "steps": [
+            [
+                {"name": "check_palindrome", "arguments": {"word": "level", "language": "english"}},
+                {"name": "check_palindrome", "arguments": {"word": "rotor", "language": "english"}},
+                {"name": "check_palindrome", "arguments": {"word": "apple", "language": "english"}},
+            ],
+            "level and rotor are palindromes; apple is not.",
+        ],
+    },
+    {
+        "question": "Compare the strength and weight of అమ్మ and నాన్న",
+        "steps": [
+            [
+                {"name": "get_word_strength", "arguments": {"word": "అమ్మ", "language": "telugu"}},
+                {"name": "get_word_strength", "arguments": {"word": "నాన్న", "language": "telugu"}},
+                {"name": "get_word_weight", "arguments": {"word": "అమ్మ", "language": "telugu"}},
+                {"name": "get_word_weight", "arguments": {"word": "నాన్న", "language": "telugu"}},
+            ],
+            "Both words have similar strength; నాన్న is slightly heavier.",
+        ],
+    },
+    {
+        "question": "Suggest three words that can be made from the letters of minneapolis",
+        "steps": [
+            [
+                {"name": "can_make_word", "arguments": {"source_word": "minneapolis", "target_word": "lime"}},
+                {"name": "can_make_word", "arguments": {"source_word": "minneapolis", "target_word": "snail"}},
+                {"name": "can_make_word", "arguments": {"source_word": "minneapolis", "target_word": "plane"}},
+            ],
+            "lime, snail and plane can all be made from minneapolis.",
+        ],
+    },
+    {
+        "question": "Say hello to the class",
+        "steps": ["Hello, class! Ask me anything about words."],
+    },
+    {"question": "is racecar a palindrome?", "steps": []},
+    {"question": "what is the length of అమ్మ?", "steps": []},
+]
+
+
+def load_scenarios(path: Optional[str]) -> list[dict]:
+    """Scenarios from a JSON file (same shape as DEFAULT_SCENARIOS), or the defaults."""
+    if not path:
+        return DEFAULT_SCENARIOS
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    if not isinstance(scenarios, list) or not all("question" in s for s in scenarios):
+        raise ValueError(f"{path}: expected a list of {{question, steps}} objects")
+    return scenarios
+
+
+class _Latency:
+    """Delay in seconds: `mean_ms` ± uniform `jitter_ms`."""
+
+    def __init__(self, mean_ms: float, jitter_ms: float = 0.0):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+
+    async def wait(self) -> None:
+        delay = self.mean_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+
+# ── Mock LLM ────────────────────────────────────────────────────────────
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _keep_alive_seconds(value) -> float:
+    """Ollama keep_alive ("5m", "1h", "30s", seconds; negative = forever) in seconds."""
+    if value is None:
+        return 300.0
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        unit = next((u for u in ("ms", "s", "m", "h") if text.endswith(u)), "")
+        seconds = float(text[: len(text) - len(unit)] or 0) * _DURATION_UNITS.get(unit, 1)
+    return float("inf") if seconds < 0 else seconds
+
+
+class _ModelResidency:
+    """Which models are "loaded" and until when, with a simulated load time."""
+
+    def __init__(self, load_ms: float):
+        self.load_ms = load_ms
+        self.expires: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    def loaded(self, model: str) -> bool:
+        return self.expires.get(model, 0.0) > time.monotonic()
+
+    async def use(self, model: str, keep_alive=None) -> float:
+        """Load `model` if needed and renew its keep_alive. Returns the load seconds paid."""
+        if self.load_ms <= 0:
+            return 0.0
+        load_seconds = 0.0
+        async with self._lock:  # Ollama loads one model at a time
+            if not self.loaded(model):
+                await asyncio.sleep(self.load_ms / 1000.0)
+                load_seconds = self.load_ms / 1000.0
+            self.expires[model] = time.monotonic() + _keep_alive_seconds(keep_alive)
+        return load_seconds
+
+
+def create_llm_app(scenarios: list[dict], latency: _Latency, load_ms: float = 0.0) -> Starlette:
+    """OpenAI-compatible chat/completions replaying `scenarios`, plus Ollama's
+    /api/generate and /api/ps when `load_ms` simulates model loading."""
+    by_question = {s["question"].strip(): s.get("steps") or [] for s in scenarios}
+    counter = itertools.count(1)
+    stats = {"requests": 0, "tool_call_replies": 0, "final_replies": 0, "unscripted": 0,
+             "cold_requests": 0, "model_loads": 0, "keep_alive_pings": 0}
+    residency = _ModelResidency(load_ms)
+
+    def reply_for(messages: list[dict]) -> tuple[Optional[str], list[dict]]:
+        question = next((m.get("content") or "" for m in messages if m.get("role") == "user"), "")
+        steps = by_question.get(question.strip())
+        if steps is None:
+            stats["unscripted"] += 1
+            return f"(mock) I cannot help with: {question[:80]}", []
+        step_index = sum(1 for m in messages if m.get("role") == "assistant")
+        if step_index >= len(steps) or isinstance(steps[step_index], str):
+            text = steps[step_index] if step_index < len(steps) else "(mock) done"
+            return text, []
+        calls = [
+            {
+                "id": f"call_{next(counter)}",
+                "type": "function",
+                "function": {"name": c["name"], "arguments": json.dumps(c.get("arguments", {}), ensure_ascii=False)},
+            }
+            for c in steps[step_index]
+        ]
+        return None, calls
+
+    async def chat_completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        stats["requests"] += 1
+        if await residency.use(body.get("model", "mock")):
+            stats["cold_requests"] += 1
+            stats["model_loads"] += 1
+        await latency.wait()
+        content, tool_calls = reply_for(body.get("messages") or [])
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+            stats["tool_call_replies"] += 1
+        else:
+            stats["final_replies"] += 1
+        prompt_chars = len(json.dumps(body.get("messages") or [], ensure_ascii=False)) + \
+            len(json.dumps(body.get("tools") or [], ensure_ascii=False))
+        return JSONResponse({
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": 20,
+                      "total_tokens": prompt_chars // 4 + 20},
+        })
+
+    async def generate(request: Request) -> JSONResponse:
+        body = await request.json()
+        model = body.get("model", "mock")
+        stats["keep_alive_pings"] += 1
+        load_seconds = await residency.use(model, body.get("keep_alive"))
+        if load_seconds:
+            stats["model_loads"] += 1
+        return JSONResponse({"model": model, "response": "", "done": True,
+                             "load_duration": int(load_seconds * 1e9)})
+
+    async def ps(request: Request) -> JSONResponse:
+        now, wall = time.monotonic(), time.time()
+        models = []
+        for model, expires in residency.expires.items():
+            if expires > now:
+                until = "never" if expires == float("inf") else time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(wall + expires - now))
+                models.append({"name": model, "model": model, "expires_at": until})
+        return JSONResponse({"models": models})
+
+    async def stats_endpoint(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/ps", ps, methods=["GET"]),
+        Route("/_stats", stats_endpoint, methods=["GET"]),
+    ])
+
+
+# ── Mock api.php ────────────────────────────────────────────────────────
+
+def _mock_result(category: str, action: str, params: dict):
+    word = params.get("string", "")
+    if action == "reverse":
+        return word[::-1]
+    if action in ("length", "codepoint-length", "length-no-spaces", "length-alternative"):
+        return len(word)
+    if action == "is-palindrome":
+        return bool(word) and word == word[::-1]
+    if action.startswith(("is-", "are-", "can-", "contains-", "starts-", "ends-")) or action in ("equals", "reverse-equals"):
+        return len(word) % 2 == 0
+    if action in ("logical", "base", "codepoints", "parse-to-logical-chars", "split-into-chunks"):
+        return list(word)
+    if action in ("word-strength", "word-weight", "word-level", "index-of", "compare-to"):
+        return len(word) + 1
+    if action == "detect-language":
+        return "english" if word.isascii() else "telugu"
+    return word
+
+
+def _envelope(category: str, action: str, params: dict) -> dict:
+    return {
+        "response_code": 200,
+        "message": "Success",
+        "string": params.get("string", ""),
+        "language": params.get("language", "english"),
+        "data": None,
+        "success": True,
+        "result": _mock_result(category, action, params),
+        "error": None,
+    }
+
+
+def create_api_app(latency: _Latency) -> Starlette:
+    """Stand-in for api.php/{category}/{action} and api.php/batch."""
+    stats = {"requests": 0, "batch_requests": 0}
+
+    async def endpoint(request: Request) -> JSONResponse:
+        stats["requests"] += 1
+        await latency.wait()
+        category, action = request.path_params["category"], request.path_params["action"]
+        return JSONResponse(_envelope(category, action, dict(request.query_params)))
+
+    async def batch(request: Request) -> JSONResponse:
+        stats["batch_requests"] += 1
+        await latency.wait()
+        ops = await request.json()
+        results = [_envelope(op.get("category", ""), op.get("action", ""), op.get("params") or {})
+                   for op in ops]
+        return JSONResponse({"success": True, "result": {"results": results}})
+
+    async def stats_endpoint(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/api.php/batch", batch, methods=["POST"]),
+        Route("/api.php/{category}/{action}", endpoint, methods=["GET"]),
+        Route("/_stats", stats_endpoint, methods=["GET"]),
+    ])
+
+
+async def serve(host: str, llm_port: int, api_port: int, llm_latency: _Latency,
+                api_latency: _Latency, scenarios: list[dict], llm_load_ms: float = 0.0) -> None:
+    """Run both mocks until cancelled."""
+    servers = [
+        uvicorn.Server(uvicorn.Config(create_llm_app(scenarios, llm_latency, llm_load_ms), host=host, port=llm_port,
+                                      log_level="warning", access_log=False)),
+        uvicorn.Server(uvicorn.Config(create_api_app(api_latency), host=host, port=api_port,
+                                      log_level="warning", access_log=False)),
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM and api.php for offline benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--llm-port", type=int, default=8101)
+    parser.add_argument("--api-port", type=int, default=8102)
+    parser.add_argument("--llm-latency", type=float, default=500.0, help="mean LLM delay in ms")
+    parser.add_argument("--llm-jitter", type=float, default=100.0, help="± uniform LLM jitter in ms")
+    parser.add_argument("--llm-load-ms", type=float, default=0.0,
+                        help="simulated Ollama model load time in ms (0 = always loaded)")
+    parser.add_argument("--api-latency", type=float, default=10.0, help="mean api.php delay in ms")
+    parser.add_argument("--api-jitter", type=float, default=5.0, help="± uniform api.php jitter in ms")
+    parser.add_argument("--scenarios", help="JSON file of {question, steps} scenarios")
+    args = parser.parse_args()
+    asyncio.run(serve(
+        args.host, args.llm_port, args.api_port,
+        _Latency(args.llm_latency, args.llm_jitter), _Latency(args.api_latency, args.api_jitter),
+        load_scenarios(args.scenarios), args.llm_load_ms,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Keeps the local Ollama model loaded so /chat never pays its cold start.
+
+Ollama loads a model on its first request (many seconds for Mistral on a
+laptop, see test_ollama_tools.py) and unloads it once its keep_alive runs out
+(5 minutes by default, renewed by every request). With OLLAMA_PRELOAD enabled
+and LLM_PROVIDER=ollama, OllamaWarmer:
+
+- loads LLM_MODEL at startup with POST /api/generate (no prompt, so nothing
+  is generated); the server lifespan waits for it, up to OLLAMA_PRELOAD_TIMEOUT;
+- repeats that request every OLLAMA_PING_INTERVAL seconds with
+  keep_alive=OLLAMA_KEEP_ALIVE, which renews the model's residency or reloads
+  it if Ollama evicted it anyway;
+- checks GET /api/ps after each ping, so /health can report warm/cold and
+  when the model would expire.
+
+Point OLLAMA_URL at mock_backends.py started with --llm-load-ms to try it
+without Ollama.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+import metrics
+
+logger = logging.getLogger("ananya-mcp")
+
+# A ping whose load_duration is at least this long had to load the model
+COLD_LOAD_SECONDS = 0.5
+# Retry delay after a failed ping (e.g. Ollama not started yet)
+RETRY_SECONDS = 15.0
+
+
+def _same_model(name: str, model: str) -> bool:
+    """Ollama reports "mistral:latest" for a model requested as "mistral"."""
+    return name == model or (":" not in model and name == f"{model}:latest")
+
+
+class OllamaWarmer:
+    """Preloads one Ollama model and pings it so it stays resident."""
+
+    def __init__(self, base_url: str, model: str, keep_alive: str = "30m",
+                 interval: float = 240.0, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        # Ollama takes a duration string ("30m") or a number of seconds (-1 = forever)
+        self.keep_alive = int(keep_alive) if str(keep_alive).lstrip("-").isdigit() else keep_alive
+        self.interval = interval
+        self.timeout = timeout
+        self.status = "cold"  # cold | loading | warm | error
+        self.expires_at: Optional[str] = None
+        self.last_ping: Optional[float] = None
+        self.last_load_seconds: Optional[float] = None
+        self.pings = 0
+        self.loads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._first_ping: Optional[asyncio.Future] = None
+
+    def _set_status(self, status: str) -> None:
+        self.status = status
+        metrics.LLM_MODEL_WARM.set(1 if status == "warm" else 0, model=self.model)
+
+    async def ping(self) -> bool:
+        """Load the model or renew its keep_alive. Returns True if it is resident."""
+        if self.status != "warm":
+            self._set_status("loading")
+        start = time.monotonic()
+        try:
+            resp = await self._client.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": self.keep_alive},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json() if resp.content else {}
+        except (httpx.HTTPError, ValueError) as e:
+            self.failures += 1
+            self.last_error = str(e) or type(e).__name__
+            self._set_status("error")
+            logger.warning(f"Ollama keep-alive for {self.model} failed: {self.last_error}")
+            return False
+
+        self.pings += 1
+        self.last_ping = time.time()
+        self.last_error = None
+        load_seconds = (data.get("load_duration") or 0) / 1e9 if isinstance(data, dict) else 0.0
+        if load_seconds >= COLD_LOAD_SECONDS:
+            self.loads += 1
+            self.last_load_seconds = round(load_seconds, 2)
+            logger.info(f"Ollama model {self.model} loaded in {load_seconds:.1f}s "
+                        f"(request {time.monotonic() - start:.1f}s, keep_alive={self.keep_alive})")
+        self._set_status("warm")
+        await self._check_resident()
+        return True
+
+    async def _check_resident(self) -> None:
+        """Record the model's expiry from /api/ps; a missing model means cold."""
+        try:
+            resp = await self._client.get(f"{self.base_url}/api/ps", timeout=5.0)
+            resp.raise_for_status()
+            models = resp.json().get("models") or []
+        except (httpx.HTTPError, ValueError):
+            return  # /api/ps is informational; the ping already succeeded
+        entry = next((m for m in models if _same_model(m.get("name") or m.get("model") or "", self.model)), None)
+        if entry is None:
+            self.expires_at = None
+            self._set_status("cold")
+        else:
+            self.expires_at = entry.get("expires_at")
+
+    async def _safe_ping(self) -> bool:
+        """ping(), counting any unexpected error (e.g. an odd JSON shape) as a failed
+        ping, so the keep-alive loop never dies with it."""
+        try:
+            return await self.ping()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            self._set_status("error")
+            logger.warning(f"Ollama keep-alive for {self.model} failed unexpectedly: {self.last_error}")
+            return False
+
+    async def _run(self) -> None:
+        try:
+            ok = await self._safe_ping()
+        finally:
+            if not self._first_ping.done():
+                self._first_ping.set_result(None)
+        while True:
+            delay = self.interval if ok else RETRY_SECONDS
+            if delay <= 0:
+                return  # preload only
+            await asyncio.sleep(delay)
+            ok = await self._safe_ping()
+
+    async def start(self, wait: float) -> None:
+        """Start preloading and pinging; wait up to `wait` seconds for the first load."""
+        self._client = httpx.AsyncClient()
+        self._first_ping = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Preloading Ollama model {self.model} (keep_alive={self.keep_alive}, "
+                    f"ping every {self.interval:.0f}s)")
+        try:
+            await asyncio.wait_for(asyncio.shield(self._first_ping), timeout=wait)
+        except asyncio.TimeoutError:
+            logger.warning(f"Ollama model {self.model} still loading after {wait:.0f}s; serving anyway")
+
+    async def stop(self) -> None:
+        """Stop pinging (the model stays loaded until its keep_alive runs out)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "model": self.model,
+            "status": self.status,
+            "keep_alive": self.keep_alive,
+            "ping_interval_s": self.interval,
+            "expires_at": self.expires_at,
+            "last_ping_age_s": round(time.time() - self.last_ping, 1) if self.last_ping else None,
+            "last_load_s": self.last_load_seconds,
+            "pings": self.pings,
+            "loads": self.loads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
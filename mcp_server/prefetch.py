@@ -0,0 +1,70 @@
+"""
+Guessing the tool calls a question will need, for speculative prefetch.
+
+While the first LLM request of the agent loop is in flight, the server can
+already run the api.php calls the model is most likely to ask for (see
+ToolMemo.prefetch in tool_runner.py). The guess is deliberately narrow:
+
+- words: quoted strings in the question, then words in an Indic script;
+- tools: the best-ranked single-word tools from the ToolCatalog, and only
+  when a category keyword matched (the same keywords as
+  _keyword_match_categories in server.py).
+
+No words or no confident tool means no prefetch.
+"""
+
+import re
+from typing import Iterable
+
+from fast_router import script_language
+from tool_catalog import ToolCatalog
+
+_QUOTED = [
+    re.compile(r'"([^"\n]{1,60})"'),
+    re.compile(r"“([^”\n]{1,60})”"),
+    re.compile(r"‘([^’\n]{1,60})’"),
+    # single quotes only around a word, so "what's" and "it's" are not matched
+    re.compile(r"(?:^|(?<=\s))'([^'\s][^'\n]{0,59}?)'(?=[\s?.!,;:]|$)"),
+]
+_INDIC_WORD = re.compile(r"[\u0900-\u0D7F\u200c\u200d]+")
+
+
+def candidate_words(question: str, max_words: int = 3) -> list[str]:
+    """Quoted strings first, then Indic-script words, without duplicates."""
+    found: list[tuple[int, str]] = []
+    for pattern in _QUOTED:
+        found.extend((m.start(), m.group(1).strip()) for m in pattern.finditer(question))
+    words = [w for _, w in sorted(found) if w]
+    if not words:
+        words = [m.group(0) for m in _INDIC_WORD.finditer(question) if m.group(0).strip("\u200c\u200d")]
+    unique = list(dict.fromkeys(words))
+    return unique[:max_words]
+
+
+def _single_word_tool(schema: dict) -> bool:
+    params = schema["function"].get("parameters") or {}
+    return params.get("required") == ["word"]
+
+
+def predict_tool_calls(
+    question: str,
+    language: str,
+    catalog: ToolCatalog,
+    max_calls: int = 4,
+    max_tools: int = 2,
+    skip: Iterable[str] = (),
+) -> list[tuple[str, dict]]:
+    """Likely (tool name, arguments) pairs for `question`, most likely first."""
+    words = candidate_words(question)
+    if not words or max_calls <= 0:
+        return []
+    skip = set(skip)
+    tools = [
+        entry.name for score, entry in catalog.rank(question)
+        if score >= catalog.CATEGORY_KEYWORD and entry.name not in skip and _single_word_tool(entry.schema)
+    ][:max_tools]
+    calls = []
+    for name in tools:
+        for word in words:
+            calls.append((name, {"word": word, "language": script_language(word) or language or "english"}))
+    return calls[:max_calls]
@@ -0,0 +1,124 @@
+"""
+Backend protection helpers for AnanyaAPIClient.
+
+- LatencyTracker: rolling window of response times; derives a timeout from p99.
+- CircuitBreaker: fails fast while api.php keeps failing, then lets one probe
+  request through to check whether it has recovered.
+- backoff_delay: capped exponential backoff with full jitter for retries.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Optional
+
+
+def percentile(samples, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a sequence (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 2.0) -> float:
+    """Full-jitter delay before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class LatencyTracker:
+    """Keeps the last `window` latencies and turns their p99 into a timeout."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20,
+                 multiplier: float = 3.0, min_timeout: float = 1.0, max_timeout: float = 15.0):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def timeout(self) -> float:
+        """p99 × multiplier, clamped to [min_timeout, max_timeout].
+        Uses max_timeout until enough samples have been seen."""
+        if len(self.samples) < self.min_samples:
+            return self.max_timeout
+        p99 = percentile(self.samples, 99)
+        return max(self.min_timeout, min(self.max_timeout, p99 * self.multiplier))
+
+    def stats(self) -> dict:
+        p50 = percentile(self.samples, 50)
+        p99 = percentile(self.samples, 99)
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "timeout_s": round(self.timeout(), 3),
+        }
+
+
+class CircuitBreaker:
+    """closed → open after `failure_threshold` consecutive failures;
+    open → half_open after `reset_timeout` seconds; one probe then decides."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN and self.retry_after() <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Forget an unfinished probe (e.g. its request was cancelled)."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_after_s": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
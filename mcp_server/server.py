@@ -7,6 +7,17 @@ word-processing PHP APIs as LLM-callable tools.
 Also provides a /chat HTTP endpoint for the PHP frontend to call,
 which handles the full LLM orchestration loop:
     user question → LLM provider (with tools) → tool calls → PHP API → final answer
+/chat/stream runs the same loop and reports progress as Server-Sent Events
+(tool_started, tool_result, token deltas, done).
+/metrics serves per-stage latency histograms in Prometheus text format.
+Agent loops go through admission control (admission.py): when all slots and
+the wait queue are taken, /chat answers 429 with Retry-After.
+Each request runs against the deadline chat_api.php sends in X-Request-Timeout
+(deadline.py): downstream timeouts shrink to the time left, an unfinished
+agent loop answers with the tool results so far, and a client disconnect
+cancels the work.
+With a local Ollama model, OLLAMA_PRELOAD loads it before the server starts
+answering and keeps it resident (ollama_warmup.py).
 
 Usage:
     python server.py            # starts MCP (SSE) + /chat on port 8000
@@ -14,21 +25,36 @@ Usage:
 
 import json
 import asyncio
+import hmac
 import logging
 import re
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
 
 from mcp.server.fastmcp import FastMCP
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.routing import Route, Mount
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 import openai
 
 from config import *  # Import all config variables for easy access
+from admission import AdmissionController, AdmissionRejected, RateLimited
 from api_client import AnanyaAPIClient
+from cache import ResultCache, normalize_question
+from context_budget import ContextBudget, compact_tool_result, sendable
+import deadline
+from fast_router import FastPathRouter, FastRoute
+from learned_router import LearnedRouter, append_record, record_word
+from prefetch import predict_tool_calls
+import metrics
+from llm_clients import LLMClientRegistry
+from ollama_warmup import OllamaWarmer
+from tool_catalog import ToolCatalog, estimate_tokens
+from tool_runner import ToolCall, ToolMemo, run_tool_calls
 
 # ── Logging ─────────────────────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -45,6 +71,7 @@ mcp = FastMCP(
 )
 
 api = AnanyaAPIClient(API_BASE_URL)
+llm_clients = LLMClientRegistry()
 
 # ═══════════════════════════════════════════════════════════════════════
 # TEXT TOOLS
@@ -280,7 +307,7 @@ async def check_intersecting(word1: str, word2: str, language: str = "english")
         word2: The second word.
         language: Language of the text. Defaults to english.
     """
-    result = await api.analysis_is_intersecting(word1, word2, language)
+    result = await api.comparison_is_intersecting(word1, word2, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -349,7 +376,7 @@ async def check_starts_with(word: str, prefix: str, language: str = "english") -
         prefix: The prefix to look for.
         language: Language of the text. Defaults to english.
     """
-    result = await api.comparison_starts_with(word, prefix, language)
+    result = await api.validation_starts_with(word, prefix, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -362,7 +389,7 @@ async def check_ends_with(word: str, suffix: str, language: str = "english") ->
         suffix: The suffix to look for.
         language: Language of the text. Defaults to english.
     """
-    result = await api.comparison_ends_with(word, suffix, language)
+    result = await api.validation_ends_with(word, suffix, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -376,7 +403,7 @@ async def compare_words(word1: str, word2: str, language: str = "english") -> st
         word2: The second word.
         language: Language of the text. Defaults to english.
     """
-    result = await api.comparison_compare(word1, word2, language)
+    result = await api.comparison_compare_to(word1, word2, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -415,7 +442,7 @@ async def find_index_of(word: str, search: str, language: str = "english") -> st
         search: The substring to find.
         language: Language of the text. Defaults to english.
     """
-    result = await api.comparison_index_of(word, search, language)
+    result = await api.utility_index_of(word, search, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -457,7 +484,7 @@ async def check_is_consonant(character: str, language: str = "english") -> str:
         character: The character to check.
         language: Language context. Defaults to english.
     """
-    result = await api.validation_is_consonant(character, language)
+    result = await api.analysis_is_consonant(character, language)
     return json.dumps(result) if not isinstance(result, str) else result
 
 
@@ -501,6 +528,55 @@ async def get_length_no_spaces(word: str, language: str = "english") -> str:
     return json.dumps(result) if not isinstance(result, str) else result
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# MULTI-WORD TOOLS
+# ═══════════════════════════════════════════════════════════════════════
+
+def _table_cell(value) -> str:
+    """One compact table cell: true/false, numbers and strings as-is, lists as minified JSON."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value.replace("\n", " ").replace("|", "/")
+
+
+def _format_word_table(table: dict) -> str:
+    """Render batch_analyze_words() output as a pipe-separated table, one row per word."""
+    operations = table["operations"]
+    lines = ["|".join(["word", *operations])]
+    for row in table["rows"]:
+        cells = [_table_cell(row["word"])]
+        for op in operations:
+            if op in row["errors"]:
+                cells.append("error: " + _table_cell(row["errors"][op]))
+            else:
+                cells.append(_table_cell(row["results"].get(op)))
+        lines.append("|".join(cells))
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def batch_analyze_words(words: list[str], operations: list[str], language: str = "english") -> str:
+    """Run several single-word operations on a list of words in one call and return a table.
+    Use this to verify candidate word lists instead of calling one tool per word.
+
+    Args:
+        words: The words to analyze.
+        operations: Any of palindrome, length, length_no_spaces, reverse, logical_chars,
+            base_chars, codepoints, codepoint_length, strength, weight, level,
+            contains_space, detect_language.
+        language: Language of the words. Defaults to english.
+    """
+    try:
+        table = await api.batch_analyze_words(words, operations, language)
+    except ValueError as e:
+        return f"Error: {e}"
+    return _format_word_table(table)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # CHAT ORCHESTRATION ENDPOINT (non-MCP, for PHP frontend)
 # ═══════════════════════════════════════════════════════════════════════
@@ -552,6 +628,11 @@ TOOL_CATEGORIES = {
         "keywords": ["length no space", "without space"],
         "tools": ["get_length_no_spaces"],
     },
+    "multi_word": {
+        "keywords": ["these words", "following words", "each word", "each of",
+                     "which of", "list of words", "candidate", "all of them"],
+        "tools": ["batch_analyze_words"],
+    },
 }
 
 # Maps every tool name to its category for quick lookup
@@ -600,6 +681,83 @@ def _build_compact_tool_list() -> str:
     return "\n".join(lines)
 
 
+# Built once after every @mcp.tool() above has been registered
+TOOL_CATALOG = ToolCatalog(_build_openai_tools(), TOOL_CATEGORIES)
+_COMPACT_TOOL_LIST = _build_compact_tool_list()
+FAST_ROUTER = FastPathRouter(TOOL_CATEGORIES)
+
+
+def _load_learned_router() -> Optional[LearnedRouter]:
+    if not CHAT_LEARNED_ROUTER:
+        return None
+    try:
+        router = LearnedRouter.from_file(CHAT_ROUTER_MODEL_PATH, TOOL_CATALOG, CHAT_ROUTER_MIN_CONFIDENCE)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Learned router disabled: cannot load {CHAT_ROUTER_MODEL_PATH}: {e}")
+        return None
+    logger.info(f"Learned router loaded: {len(router.model.labels)} labels, "
+                f"min confidence {CHAT_ROUTER_MIN_CONFIDENCE}")
+    return router
+
+
+LEARNED_ROUTER = _load_learned_router()
+
+# Tools whose output changes on every call — answers that used them are never cached
+NON_DETERMINISTIC_TOOLS = frozenset({"randomize_text", "get_random_logical_chars"})
+
+# /chat answers keyed by (normalized question, language, provider, model)
+CHAT_CACHE = (
+    ResultCache(max_entries=CHAT_CACHE_MAX_ENTRIES, default_ttl=CHAT_CACHE_TTL)
+    if CHAT_CACHE_ENABLED else None
+)
+
+
+# Caps concurrent agent loops (cache hits and the fast path are not limited)
+ADMISSION = (
+    AdmissionController(CHAT_MAX_IN_FLIGHT, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT)
+    if CHAT_MAX_IN_FLIGHT > 0 else None
+)
+
+# Keeps the local Ollama model resident (started and stopped by the lifespan)
+OLLAMA_WARMER = (
+    OllamaWarmer(OLLAMA_URL, LLM_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_PING_INTERVAL,
+                 LLM_PROVIDER_LIMITS["ollama"]["timeout"])
+    if OLLAMA_PRELOAD and LLM_PROVIDER.lower() == "ollama" else None
+)
+
+
+def _chat_cache_key(question: str, language: str) -> tuple:
+    return ("chat", "answer", (normalize_question(question), language.strip().lower(),
+                               LLM_PROVIDER.lower(), LLM_MODEL or ""))
+
+
+def _is_cacheable_answer(payload: dict, tools_used: set) -> bool:
+    """Only complete answers that did not depend on a random tool. Partial
+    answers and answers written around failed tool calls (breaker open, API
+    error, deadline) are not kept, so an outage is not served after it ends."""
+    if payload.get("source") not in ("fast_path", "learned_router", "mcp_agent") or not payload.get("answer"):
+        return False
+    if payload.get("partial") or payload.get("tool_errors"):
+        return False
+    return not (tools_used & NON_DETERMINISTIC_TOOLS)
+
+
+def _select_tools(question: str) -> tuple[list[dict], int]:
+    """Tool schemas to send with this question and their estimated token count
+    (see tool_catalog.py)."""
+    if not CHAT_TOOL_SELECTION:
+        return TOOL_CATALOG.tools, TOOL_CATALOG.total_tokens
+    tools, info = TOOL_CATALOG.select(question, CHAT_TOOL_TOP_K, CHAT_TOOL_TOKEN_BUDGET)
+    if info["fallback"]:
+        logger.info(f"Tool selection: no match, sending all {info['total']} tools (~{info['tool_tokens']} tokens)")
+    else:
+        logger.info(
+            f"Tool selection: {info['selected']}/{info['total']} tools "
+            f"(~{info['tool_tokens']} tokens, saved ~{info['saved_tokens']}): {', '.join(info['tools'])}"
+        )
+    return tools, info["tool_tokens"]
+
+
 async def _identify_intent_and_tool(
     client: openai.AsyncOpenAI, question: str, language: str
 ) -> dict:
@@ -612,7 +770,7 @@ async def _identify_intent_and_tool(
     Uses a compact prompt (~120 token budget for response) so it stays fast (~3-5s).
     This replaces all regex-based intent routing — the LLM handles all languages.
     """
-    tool_list = _build_compact_tool_list()
+    tool_list = _COMPACT_TOOL_LIST
 
     prompt = f"""You are a request router for a word-processing API.
 
@@ -720,38 +878,129 @@ async def _execute_tool(name: str, arguments: dict) -> str:
         return json.dumps({"error": str(e)})
 
 
-def _create_llm_client() -> openai.AsyncOpenAI:
-    """Create an OpenAI-compatible client for Gemini, Groq, OpenAI, or Ollama."""
-    provider = LLM_PROVIDER.lower()
-    if provider == "gemini":
-        return openai.AsyncOpenAI(
-            api_key=GEMINI_API_KEY,
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-            timeout=60.0,
-        )
-    
-    if provider == "groq":
-        return openai.AsyncOpenAI(
-            api_key=GROQ_API_KEY,
-            base_url="https://api.groq.com/openai/v1",
-            timeout=60.0,
-        )
-    
-    if provider == "ollama":
-        base_url = OLLAMA_URL.rstrip("/") + "/v1"
-        return openai.AsyncOpenAI(
-            api_key="ollama",
-            base_url=base_url,
-            timeout=120.0,  # Local Ollama: generous for cold starts + tool calls
-        )
-    if provider == "openai":
-        return openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-    raise ValueError(f"Unknown LLM_PROVIDER in config: {provider}")
+async def _call_tool_text(name: str, arguments: dict) -> str:
+    """Run an MCP tool for the agent loop and return its text output."""
+    start = time.monotonic()
+    try:
+        result = await mcp.call_tool(name, arguments)
+    except Exception:
+        metrics.TOOL_ERRORS.inc(tool=metrics.tool_label(name, TOOL_CATALOG))
+        raise
+    finally:
+        metrics.TOOL_LATENCY.observe(time.monotonic() - start, tool=metrics.tool_label(name, TOOL_CATALOG))
+    # FastMCP returns (content blocks, structured output) or just the blocks
+    content = result[0] if isinstance(result, tuple) else result
+    if isinstance(content, (list, tuple)):
+        text = "\n".join(getattr(item, "text", str(item)) for item in content)
+    else:
+        text = str(result)
+    if _is_tool_error(text):
+        metrics.TOOL_ERRORS.inc(tool=metrics.tool_label(name, TOOL_CATALOG))
+    return text
+
+
+def _create_llm_client(provider: str = None) -> openai.AsyncOpenAI:
+    """Shared OpenAI-compatible client for Gemini, Groq, OpenAI, or Ollama."""
+    return llm_clients.get(provider)
+
+
+def _is_tool_error(tool_result: str) -> bool:
+    """True when a tool's text output is an error rather than an answer."""
+    if tool_result.startswith(("API Error:", "Error executing tool")):
+        return True
+    try:
+        parsed = json.loads(tool_result)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and bool(parsed.get("error"))
+
+
+def _finish_tool_memo(memo: Optional[ToolMemo]) -> None:
+    """Cancel unused prefetches and report prefetch hits and repeated identical
+    tool calls (useful when tuning the system prompt)."""
+    if memo is None:
+        return
+    unused = memo.finish_prefetches()
+    if memo.prefetch_hits or unused:
+        metrics.PREFETCHES.inc(memo.prefetch_hits, outcome="used")
+        metrics.PREFETCHES.inc(unused, outcome="unused")
+        logger.info(f"Prefetch: {memo.prefetch_hits} used, {unused} unused (cancelled)")
+    if memo.duplicate_count:
+        for name, count in memo.duplicates.items():
+            metrics.TOOL_DUPLICATES.inc(count, tool=metrics.tool_label(name, TOOL_CATALOG))
+        repeated = ", ".join(f"{name}×{count}" for name, count in memo.duplicates.most_common())
+        logger.info(f"Tool memo: {memo.duplicate_count} of {memo.calls} tool call(s) were repeats ({repeated})")
+
+
+# Streaming callback: emit(event_name, data) → one SSE event on /chat/stream
+Emit = Callable[[str, dict], Awaitable[None]]
+
+
+async def _try_fast_path(question: str, language: str, tools_used: set,
+                         emit: Optional[Emit] = None) -> Optional[dict]:
+    """Answer a single-tool question without the LLM, or None to use the agent loop."""
+    route = FAST_ROUTER.route(question, language)
+    if route is None:
+        return None
+    logger.info(f"Fast path: {route.tool} {route.params}")
+    return await _answer_with_route(route, FAST_ROUTER, "fast_path", question, tools_used, emit)
+
+
+async def _try_learned_router(question: str, language: str, tools_used: set,
+                              emit: Optional[Emit] = None) -> Optional[dict]:
+    """Answer with the learned router's confident single-tool prediction, or None."""
+    route = LEARNED_ROUTER.route(question, language)
+    if route is None:
+        return None
+    logger.info(f"Learned router: {route.tool} {route.params} ({route.template})")
+    return await _answer_with_route(route, LEARNED_ROUTER, "learned_router", question, tools_used, emit)
+
+
+async def _answer_with_route(route: FastRoute, router, source: str, question: str, tools_used: set,
+                             emit: Optional[Emit] = None) -> Optional[dict]:
+    """Run the routed tool and format its answer; None (and router.fallbacks += 1) if it failed."""
+    tools_used.add(route.tool)
+    if emit is not None:
+        await emit("tool_started", {"id": source, "name": route.tool, "arguments": route.params})
+    start = time.monotonic()
+    try:
+        tool_result = await _call_tool_text(route.tool, route.params)
+    except Exception as e:
+        # e.g. the arguments did not validate; the agent loop may still answer
+        tool_result = f"Error executing tool: {e}"
+    if emit is not None:
+        await emit("tool_result", {"id": source, "name": route.tool, "result": tool_result,
+                                   "seconds": round(time.monotonic() - start, 3)})
+    if _is_tool_error(tool_result):
+        router.fallbacks += 1
+        logger.warning(f"{source} tool {route.tool} failed ({tool_result[:200]}) — using the agent loop")
+        return None
+    return {
+        "answer": _format_direct_answer(route.tool, route.params, tool_result, question),
+        "llm_consulted": False,
+        "source": source,
+        "route": source,
+        "tool": route.tool,
+        "arguments": route.params,
+    }
 
 
 def _format_direct_answer(tool_name: str, params: dict, tool_result: str, question: str) -> str:
-    """Convert a direct single-tool result into a human-readable answer."""
+    """Convert a direct single-tool result into a human-readable answer.
+
+    Every fast-path template's arguments show up in its reply (detect_language
+    only names the language):
+
+    >>> from fast_router import _TEMPLATES
+    >>> for tool, _, args, *_ in _TEMPLATES:
+    ...     params = {name: f"<{name}>" for name in args}
+    ...     answer = _format_direct_answer(tool, params, "true", "")
+    ...     missing = [v for v in params.values() if v not in answer]
+    ...     if missing and tool != "detect_language":
+    ...         print(tool, missing)
+    >>> _format_direct_answer("check_anagram", {"word1": "listen", "word2": "silent"}, "true", "")
+    '"listen" and "silent" are anagrams.'
+    """
     # Parse raw JSON result from the tool
     value = tool_result
     try:
@@ -770,7 +1019,7 @@ def _format_direct_answer(tool_name: str, params: dict, tool_result: str, questi
     if isinstance(value, str) and value.startswith("API Error:"):
         return f"Sorry, I couldn't complete that: {value}"
 
-    word  = params.get("word",  params.get("source_word", params.get("text", "")))
+    word  = params.get("word",  params.get("word1", params.get("source_word", params.get("text", ""))))
     word2 = params.get("word2", params.get("target_word", ""))
     lang  = params.get("language", "english")
     lang_note = f" ({lang})" if lang != "english" else ""
@@ -830,6 +1079,7 @@ For example:
 - To check if a word is a palindrome, use the check_palindrome tool.
 - To check if a word can be formed from letters of another word, use the can_make_word tool.
 - To check prefixes or suffixes, use check_starts_with or check_ends_with.
+- To check or measure many words at once, use batch_analyze_words with all the words and operations.
 
 For questions about generating words (like rhyming words, words with a prefix, or words from letters),
 use your own knowledge to generate candidate words, then verify them with the tools when appropriate.
@@ -840,118 +1090,472 @@ Always provide clear, concise answers. If a tool returns data, interpret it for
 Do not show raw JSON to the user unless they specifically ask for it."""
 
 
+async def _stream_llm_step(client: openai.AsyncOpenAI, request_args: dict, emit: Emit) -> tuple[str, list[dict]]:
+    """One streamed completion: emits a token event per content delta and
+    reassembles the tool calls. Returns (content, tool_calls as dicts)."""
+    stream = await client.chat.completions.create(**request_args, stream=True)
+    content_parts: list[str] = []
+    tool_calls: dict[int, dict] = {}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content_parts.append(delta.content)
+            await emit("token", {"delta": delta.content})
+        for tc in delta.tool_calls or []:
+            index = tc.index if tc.index is not None else len(tool_calls)
+            entry = tool_calls.setdefault(index, {"id": "", "type": "function",
+                                                  "function": {"name": "", "arguments": ""}})
+            if tc.id and not entry["id"]:
+                entry["id"] = tc.id
+            if tc.function is not None:
+                if tc.function.name and not entry["function"]["name"]:
+                    entry["function"]["name"] = tc.function.name
+                if tc.function.arguments:
+                    entry["function"]["arguments"] += tc.function.arguments
+    return "".join(content_parts), [tool_calls[i] for i in sorted(tool_calls)]
+
+
+async def _run_agent_loop(question: str, language: str, tools_used: set,
+                          emit: Optional[Emit] = None, tool_calls: Optional[list[ToolCall]] = None) -> dict:
+    """Agentic execution loop supporting multi-step tool calling.
+    With `emit`, the LLM is streamed and tool/token events are emitted.
+    Stops at the request's deadline with a partial answer (deadline.py).
+    Every call the loop makes is appended to `tool_calls`."""
+    # Per-request tool memo: repeated identical calls reuse the first result,
+    # and speculative prefetches wait in it until the LLM asks for them
+    memo = None
+    if CHAT_TOOL_MEMO or CHAT_PREFETCH:
+        memo = ToolMemo(_call_tool_text, skip=NON_DETERMINISTIC_TOOLS,
+                        keep=lambda result: not _is_tool_error(result),
+                        defaults=TOOL_CATALOG.defaults, reuse=CHAT_TOOL_MEMO)
+    try:
+        if CHAT_PREFETCH:
+            predicted = predict_tool_calls(question, language, TOOL_CATALOG, CHAT_PREFETCH_MAX_CALLS,
+                                           skip=NON_DETERMINISTIC_TOOLS)
+            started = [f"{name}({args['word']})" for name, args in predicted if memo.prefetch(name, args)]
+            if started:
+                logger.info(f"Prefetch: started {len(started)} call(s): {', '.join(started)}")
+        request_deadline = deadline.current()
+        if tool_calls is None:
+            tool_calls = []  # every call the loop made, for a partial answer
+        try:
+            async with asyncio.timeout_at(request_deadline.loop_time() if request_deadline else None):
+                return await _agent_loop(question, language, tools_used, emit, memo, tool_calls)
+        except (TimeoutError, openai.APITimeoutError):
+            if request_deadline is None or request_deadline.remaining() > 0.5:
+                raise  # a slow provider or tool, not our deadline
+            return _partial_answer(tool_calls, "deadline")
+        except deadline.DeadlineExceeded:
+            return _partial_answer(tool_calls, "deadline")
+        except RateLimited:
+            if not _finished_calls(tool_calls):
+                raise  # nothing gathered yet: the 429 + Retry-After is the better answer
+            return _partial_answer(tool_calls, "rate_limited")
+    finally:
+        _finish_tool_memo(memo)
+
+
+# Why an agent loop stopped early → (what to tell the user, payload source)
+_PARTIAL_REASONS = {
+    "deadline": ("I ran out of time", "mcp_agent_deadline"),
+    "rate_limited": ("I reached the AI provider's rate limit", "mcp_agent_rate_limited"),
+}
+
+
+def _finished_calls(tool_calls: list[ToolCall]) -> list[ToolCall]:
+    return [call for call in tool_calls if call.result is not None and not _is_tool_error(call.result)]
+
+
+def _partial_answer(tool_calls: list[ToolCall], reason: str, llm_consulted: bool = True) -> dict:
+    """The tool results found before the loop had to stop (see _PARTIAL_REASONS), as the answer."""
+    finished = _finished_calls(tool_calls)
+    cause, source = _PARTIAL_REASONS[reason]
+    metrics.CHAT_CUT_SHORT.inc(reason=reason)
+    logger.warning(f"Agent loop stopped early ({reason}): "
+                   f"{len(finished)} of {len(tool_calls)} tool call(s) finished")
+    if not finished:
+        answer = f"Sorry, {cause} before I could answer. Please try again or ask a simpler question."
+    else:
+        lines = [f"{cause} before I could finish. Here is what I found so far:"]
+        for call in finished:
+            args = ", ".join(f"{k}={v}" for k, v in (call.arguments or {}).items() if k != "language")
+            result = compact_tool_result(call.result).replace("\n", " ")
+            if len(result) > 200:
+                result = result[:199] + "…"
+            lines.append(f"- {call.name}({args}): {result}")
+        answer = "\n".join(lines)
+    return {
+        "answer": answer,
+        "llm_consulted": llm_consulted,
+        "source": source,
+        "route": "agent",
+        "partial": True,
+    }
+
+
+async def _agent_loop(question: str, language: str, tools_used: set,
+                      emit: Optional[Emit], memo: Optional[ToolMemo], tool_calls: list[ToolCall]) -> dict:
+    client = _create_llm_client()
+
+    # 1. Initialize the conversation history
+    messages = [
+        {
+            "role": "system", 
+            "content": (
+                "You are an AI assistant for the Ananya word processor. "
+                "You have access to a suite of text manipulation tools. "
+                "Independent checks (for example the same test on several words) "
+                "can be requested together in one step. If a step needs the result "
+                "of an earlier tool (like reversing a word, then appending a character), "
+                "wait for that result before calling the next tool. "
+                f"The user's preferred language is {language}."
+            )
+        },
+        {"role": "user", "content": question}
+    ]
+
+    # 1. Pick the tool schemas for this question from the startup catalog
+    available_tools, tool_tokens = _select_tools(question)
+    budget = ContextBudget(CHAT_CONTEXT_TOKEN_BUDGET, CHAT_CONTEXT_MAX_LIST_ITEMS)
+    execute = memo or _call_tool_text
+
+    # 2. Start the Agentic Loop
+    max_iterations = 5
+    iterations = 0
+
+    while iterations < max_iterations:
+        iterations += 1
+        # Keep the prompt under budget (system prompt, question and latest exchange stay intact)
+        context = budget.fit(messages, tool_tokens)
+        metrics.PROMPT_TOKENS.observe(context["tokens"])
+        if context["before"] != context["tokens"]:
+            logger.info(
+                f"Agent Loop Iteration: {iterations} (prompt ~{context['tokens']} tokens, "
+                f"was ~{context['before']}: compacted {context['compacted']} tool result(s), "
+                f"summarized {context['dropped_turns']} earlier turn(s))"
+            )
+        else:
+            logger.info(f"Agent Loop Iteration: {iterations} (prompt ~{context['tokens']} tokens)")
+
+        # Call the LLM (after the provider's rate limit, if any)
+        await llm_clients.throttle()
+        iteration_start = time.monotonic()
+        request_args = dict(
+            model=LLM_MODEL,
+            messages=sendable(messages),  # without ContextBudget's marker keys
+            tools=available_tools,
+            tool_choice="auto",
+            parallel_tool_calls=CHAT_PARALLEL_TOOL_CALLS,
+            timeout=llm_clients.timeout(),  # provider timeout, cut to the request's deadline
+        )
+        try:
+            if emit is None:
+                response = await client.chat.completions.create(**request_args)
+                usage = getattr(response, "usage", None)
+                if getattr(usage, "prompt_tokens", None):
+                    logger.info(f"Iteration {iterations}: provider reported {usage.prompt_tokens} prompt tokens")
+                response_message = response.choices[0].message
+                messages.append(response_message)
+                content, raw_tool_calls = response_message.content, response_message.tool_calls
+            else:
+                content, raw_tool_calls = await _stream_llm_step(client, request_args, emit)
+                assistant_message = {"role": "assistant", "content": content or None}
+                if raw_tool_calls:
+                    assistant_message["tool_calls"] = raw_tool_calls
+                messages.append(assistant_message)
+        except Exception:
+            metrics.LLM_ERRORS.inc(provider=LLM_PROVIDER, model=LLM_MODEL)
+            raise
+        finally:
+            llm_seconds = time.monotonic() - iteration_start
+            metrics.LLM_LATENCY.observe(llm_seconds, provider=LLM_PROVIDER, model=LLM_MODEL)
+
+        # 3. Check if the LLM decided to call any tools
+        if not raw_tool_calls:
+            logger.info(f"Iteration {iterations}: LLM {llm_seconds:.2f}s, final answer. Exiting loop.")
+            metrics.AGENT_ITERATIONS.observe(iterations)
+            return {
+                "answer": content,
+                "llm_consulted": True,
+                "source": "mcp_agent",
+                "route": "agent",
+                "iterations": iterations,
+                "tool_errors": sum(1 for call in tool_calls if call.result is None or _is_tool_error(call.result)),
+            }
+
+        # 4. If tools WERE called, execute them (independent calls concurrently)
+        calls = [ToolCall.from_openai(tc) for tc in raw_tool_calls]
+        tool_calls.extend(calls)
+        for call in calls:
+            logger.info(f"Executing Tool: {call.name} with args {call.arguments}")
+        tools_used.update(call.name for call in calls)
+        tools_start = time.monotonic()
+        if emit is None:
+            await run_tool_calls(calls, execute, CHAT_TOOL_CONCURRENCY)
+        else:
+            async def on_start(call: ToolCall, arguments: dict) -> None:
+                await emit("tool_started", {"id": call.id, "name": call.name, "arguments": arguments})
+
+            async def on_done(call: ToolCall) -> None:
+                await emit("tool_result", {"id": call.id, "name": call.name, "result": call.result,
+                                           "seconds": round(call.seconds, 3)})
+
+            await run_tool_calls(calls, execute, CHAT_TOOL_CONCURRENCY, on_start, on_done)
+        tools_seconds = time.monotonic() - tools_start
+        dependent = sum(1 for c in calls if c.depends_on)
+        logger.info(
+            f"Iteration {iterations}: LLM {llm_seconds:.2f}s, {len(calls)} tool call(s) "
+            f"({dependent} dependent) in {tools_seconds:.2f}s, "
+            f"total {time.monotonic() - iteration_start:.2f}s"
+        )
+
+        # 5. Feed the API results BACK to the LLM, in call order
+        raw_tokens = fed_tokens = 0
+        for call in calls:
+            content = call.result
+            if CHAT_COMPACT_TOOL_RESULTS:
+                # Bare result payload, minified (see context_budget.compact_tool_result)
+                content = compact_tool_result(call.result, max_list_items=None)
+                raw, fed = estimate_tokens(call.result), estimate_tokens(content)
+                raw_tokens, fed_tokens = raw_tokens + raw, fed_tokens + fed
+                if raw > fed:
+                    metrics.TOOL_RESULT_TOKENS_SAVED.inc(raw - fed, tool=metrics.tool_label(call.name, TOOL_CATALOG))
+            messages.append({
+                "role": "tool",
+                "tool_call_id": call.id,
+                "name": call.name,
+                "content": content,
+            })
+        if raw_tokens > fed_tokens:
+            logger.info(f"Iteration {iterations}: tool results compacted to ~{fed_tokens} tokens "
+                        f"(raw ~{raw_tokens}, saved ~{raw_tokens - fed_tokens})")
+
+    # If it hits max_iterations
+    metrics.AGENT_ITERATIONS.observe(iterations)
+    return {
+        "answer": "I required too many steps to complete this request and had to stop.",
+        "llm_consulted": True,
+        "source": "mcp_agent_timeout",
+        "route": "agent",
+        "iterations": iterations,
+    }
+
+
+async def _answer_question(question: str, language: str, emit: Optional[Emit] = None) -> dict:
+    """Cached answer, fast path, learned router, or the LLM agent loop — shared by /chat and /chat/stream."""
+    start = time.monotonic()
+    cache_key = _chat_cache_key(question, language)
+    if CHAT_CACHE is not None:
+        cached = CHAT_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Chat answer served from cache")
+            metrics.CHAT_LATENCY.observe(time.monotonic() - start, route="cache")
+            return {**cached, "cached": True}
+
+    tools_used: set[str] = set()
+    tool_calls: list[ToolCall] = []  # the agent loop's calls
+    payload = None
+    # Deterministic fast path: no LLM call for common single-tool questions
+    if CHAT_FAST_PATH:
+        payload = await _try_fast_path(question, language, tools_used, emit)
+    # Then the local classifier: no LLM call when it is confident
+    if payload is None and LEARNED_ROUTER is not None:
+        payload = await _try_learned_router(question, language, tools_used, emit)
+    if payload is None:
+        if ADMISSION is None:
+            payload = await _run_agent_loop(question, language, tools_used, emit, tool_calls)
+        else:
+            try:
+                async with ADMISSION.slot() as waited:
+                    if waited >= 0.1:
+                        logger.info(f"Admission: waited {waited:.2f}s for an agent loop slot")
+                    payload = await _run_agent_loop(question, language, tools_used, emit, tool_calls)
+            except deadline.DeadlineExceeded:
+                # Still queued when the client's deadline ran out (not a 429: retrying won't help)
+                payload = _partial_answer([], "deadline", llm_consulted=False)
+
+    if CHAT_CACHE is not None and _is_cacheable_answer(payload, tools_used):
+        CHAT_CACHE.set(cache_key, payload)
+    if CHAT_ROUTER_LOG_PATH:
+        _log_router_example(question, payload, tools_used, tool_calls)
+    metrics.CHAT_LATENCY.observe(time.monotonic() - start, route=payload.get("route", "agent"))
+    return {**payload, "cached": False}
+
+
+def _log_router_example(question: str, payload: dict, tools_used: set, tool_calls: list[ToolCall]) -> None:
+    """Record which tool answered `question` and the word it was asked about, as
+    training data for learned_router.py. The learned router's own answers are not
+    logged, so it never trains on itself."""
+    if payload.get("source") not in ("fast_path", "mcp_agent"):
+        return
+    if not tools_used:
+        label = "direct"
+    elif len(tools_used) == 1:
+        label = next(iter(tools_used))
+    else:
+        label = "multi"
+    try:
+        arguments = payload.get("arguments") or (tool_calls[0].arguments if tool_calls else None)
+        append_record(CHAT_ROUTER_LOG_PATH, question, label, record_word(arguments))
+    except OSError as e:
+        logger.warning(f"Could not log router example to {CHAT_ROUTER_LOG_PATH}: {e}")
+
+
+async def _read_chat_request(request: Request) -> tuple[str, str]:
+    body = await request.json()
+    return body.get("question", ""), body.get("language", "english").lower()
+
+
+def _busy_payload(rejection: AdmissionRejected) -> dict:
+    logger.warning(f"Chat request rejected: {rejection}")
+    return {
+        "answer": f"The assistant is busy right now. Please try again in {rejection.retry_after} seconds.",
+        "llm_consulted": False,
+        "source": "busy",
+        "retry_after": rejection.retry_after,
+    }
+
+
+def _request_deadline(request: Request) -> Optional[deadline.Deadline]:
+    return deadline.from_header(request.headers.get(deadline.HEADER), CHAT_DEFAULT_DEADLINE, CHAT_DEADLINE_MARGIN)
+
+
+# How often a running /chat request checks whether its client is still there
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+async def _watch_disconnect(request: Request, task: asyncio.Task) -> None:
+    """Cancel `task` (the request's LLM and tool work) if the client goes away.
+    Polls is_disconnected() rather than reading receive() itself, so it never
+    takes the http.disconnect message from StreamingResponse's own listener."""
+    while not task.done():
+        if await request.is_disconnected():
+            task.cancel()
+            metrics.CHAT_CUT_SHORT.inc(reason="disconnect")
+            logger.info("Client disconnected — cancelled its /chat work")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
 async def chat_endpoint(request: Request) -> JSONResponse:
-    """Agentic execution loop supporting multi-step tool calling."""
+    """POST /chat — cached answer, fast path, or the LLM agent loop."""
     try:
-        body = await request.json()
-        question = body.get("question", "")
-        language = body.get("language", "english").lower()
-        
+        question, language = await _read_chat_request(request)
         if not question:
             return JSONResponse({"answer": "No question provided.", "llm_consulted": False}, status_code=400)
-            
-        client = _create_llm_client()
-        
-        # 1. Initialize the conversation history
-        messages = [
-            {
-                "role": "system", 
-                "content": (
-                    "You are an AI assistant for the Ananya word processor. "
-                    "You have access to a suite of text manipulation tools. "
-                    "If a request requires multiple steps (like reversing a word, "
-                    "then appending a character), call the tools one by one in sequence. "
-                    "Wait for the result of the first tool before calling the second. "
-                    f"The user's preferred language is {language}."
-                )
-            },
-            {"role": "user", "content": question}
-        ]
-
-        # 1. Extract the tool schemas from your FastMCP instance dynamically
-        available_tools = []
-        
-        # FastMCP internal storage varies slightly by version. This safely covers the standard paths:
-        if hasattr(mcp, "_tool_manager"):
-            tools_list = mcp._tool_manager.list_tools()
-        else:
-            tools_dict = getattr(mcp, "tools", getattr(mcp, "_tools", {}))
-            tools_list = tools_dict.values() if isinstance(tools_dict, dict) else tools_dict
-            
-        for t in tools_list:
-            available_tools.append({
-                "type": "function",
-                "function": {
-                    "name": getattr(t, "name", getattr(t, "__name__", "unknown")),
-                    "description": getattr(t, "description", getattr(t, "__doc__", "")),
-                    # FastMCP versions map schema data to either 'inputSchema' or 'parameters'
-                    "parameters": getattr(t, "inputSchema", getattr(t, "parameters", {"type": "object", "properties": {}}))
-                }
-            })        
-        # 2. Start the Agentic Loop
-        max_iterations = 5
-        iterations = 0
-        
-        while iterations < max_iterations:
-            iterations += 1
-            logger.info(f"Agent Loop Iteration: {iterations}")
-            
-            # Call the LLM
-            response = await client.chat.completions.create(
-                model=LLM_MODEL,
-                messages=messages,
-                tools=available_tools,
-                tool_choice="auto",
-                parallel_tool_calls=False,  # Ensure tools are called sequentially, not in parallel
-            )
-            
-            response_message = response.choices[0].message
-            messages.append(response_message)
-            
-            # 3. Check if the LLM decided to call any tools
-            if not response_message.tool_calls:
-                logger.info("LLM provided final text answer. Exiting loop.")
-                return JSONResponse({
-                    "answer": response_message.content,
-                    "llm_consulted": True,
-                    "source": "mcp_agent"
-                })
-
-            # 4. If tools WERE called, execute them
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                
-                try:
-                    arguments = json.loads(tool_call.function.arguments)
-                    logger.info(f"Executing Tool: {function_name} with args {arguments}")
-                    
-                    # Execute the PHP API tool
-                    api_result = await mcp.call_tool(function_name, arguments)
-                    result_string = str(api_result)
-                    
-                except Exception as e:
-                    logger.error(f"Tool execution failed: {e}")
-                    result_string = f"Error executing tool: {str(e)}"
-                
-                # 5. Feed the API result BACK to the LLM
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": result_string
-                })
-                
-        # If it hits max_iterations
-        return JSONResponse({
-            "answer": "I required too many steps to complete this request and had to stop.",
-            "llm_consulted": True,
-            "source": "mcp_agent_timeout"
-        })
+        # The task copies the context, so the deadline follows it into every tool task
+        with deadline.scope(_request_deadline(request)):
+            work = asyncio.create_task(_answer_question(question, language))
+        watcher = asyncio.create_task(_watch_disconnect(request, work))
+        try:
+            return JSONResponse(await work)
+        except asyncio.CancelledError:
+            if watcher.done() and not watcher.cancelled():
+                return Response(status_code=499)  # nobody is left to read it
+            raise
+        finally:
+            watcher.cancel()
+            work.cancel()
+
+    except AdmissionRejected as e:
+        return JSONResponse(_busy_payload(e), status_code=429, headers={"Retry-After": str(e.retry_after)})
 
     except Exception as e:
         logger.error(f"Chat endpoint error: {e}")
         return JSONResponse({"answer": f"Server error: {str(e)}", "llm_consulted": False}, status_code=500)
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def chat_stream_endpoint(request: Request):
+    """POST /chat/stream — same as /chat, as Server-Sent Events.
+
+    Events: tool_started, tool_result, token (LLM content delta), then either
+    done (the same JSON /chat would return) or error. An error event with
+    retry_after means the request was not admitted (the /chat 429).
+    """
+    try:
+        question, language = await _read_chat_request(request)
+    except Exception as e:
+        return JSONResponse({"answer": f"Server error: {str(e)}", "llm_consulted": False}, status_code=400)
+    if not question:
+        return JSONResponse({"answer": "No question provided.", "llm_consulted": False}, status_code=400)
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def emit(event: str, data: dict) -> None:
+        await queue.put((event, data))
+
+    async def produce() -> None:
+        try:
+            await queue.put(("done", await _answer_question(question, language, emit)))
+        except asyncio.CancelledError:
+            queue.put_nowait(("cancelled", {}))
+            raise
+        except AdmissionRejected as e:
+            await queue.put(("error", _busy_payload(e)))
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            await queue.put(("error", {"answer": f"Server error: {str(e)}", "llm_consulted": False}))
+
+    request_deadline = _request_deadline(request)
+
+    async def events():
+        with deadline.scope(request_deadline):
+            task = asyncio.create_task(produce())
+        watcher = asyncio.create_task(_watch_disconnect(request, task))
+        try:
+            while True:
+                event, data = await queue.get()
+                if event == "cancelled":
+                    break
+                yield _sse(event, data)
+                if event in ("done", "error"):
+                    break
+        finally:
+            watcher.cancel()
+            task.cancel()  # client went away: stop the LLM/tool work too
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _is_cache_admin(request: Request) -> bool:
+    """CORS allows every origin, so cache administration checks the caller itself."""
+    if CHAT_CACHE_ADMIN_TOKEN:
+        token = request.headers.get("X-Admin-Token", "")
+        return hmac.compare_digest(token.encode(), CHAT_CACHE_ADMIN_TOKEN.encode())
+    host = request.client.host if request.client else ""
+    return host in ("127.0.0.1", "::1", "localhost")
+
+
+async def chat_cache_invalidate_endpoint(request: Request) -> JSONResponse:
+    """POST /chat/cache/invalidate — drop one cached answer ({"question", "language"}) or all of them.
+    Needs X-Admin-Token = CHAT_CACHE_ADMIN_TOKEN, or a localhost client when no token is set."""
+    if not _is_cache_admin(request):
+        logger.warning(f"Chat answer cache: invalidation refused for {request.client.host if request.client else '?'}")
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    if CHAT_CACHE is None:
+        return JSONResponse({"invalidated": 0, "enabled": False})
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    question = (body or {}).get("question") if isinstance(body, dict) else None
+    if question:
+        language = body.get("language", "english")
+        removed = 1 if CHAT_CACHE.delete(_chat_cache_key(question, language)) else 0
+    else:
+        removed = len(CHAT_CACHE)
+        CHAT_CACHE.clear()
+    logger.info(f"Chat answer cache: invalidated {removed} entr{'y' if removed == 1 else 'ies'}")
+    return JSONResponse({"invalidated": removed, "enabled": True})
+
+
 async def health_endpoint(request: Request) -> JSONResponse:
     """GET /health — simple health check."""
     tool_count = len(mcp._tool_manager._tools) if hasattr(mcp, '_tool_manager') else 0
@@ -961,27 +1565,75 @@ async def health_endpoint(request: Request) -> JSONResponse:
         "tools_available": tool_count,
         "model": LLM_MODEL,
         "provider": LLM_PROVIDER,
+        "api_pool": api.pool_stats(),
+        "api_cache": api.cache_stats(),
+        "api_coalescing": api.coalesce_stats(),
+        "api_backend": api.backend_stats(),
+        "local_eval": api.local_eval_stats(),
+        "llm_clients": llm_clients.stats(),
+        "fast_path": FAST_ROUTER.stats(),
+        "learned_router": LEARNED_ROUTER.stats() if LEARNED_ROUTER is not None else {"enabled": False},
+        "chat_cache": CHAT_CACHE.stats() if CHAT_CACHE is not None else {"enabled": False},
+        "admission": ADMISSION.stats() if ADMISSION is not None else {"enabled": False},
+        "llm_warmup": OLLAMA_WARMER.stats() if OLLAMA_WARMER is not None else {"enabled": False},
     })
 
 
+async def metrics_endpoint(request: Request) -> Response:
+    """GET /metrics — Prometheus text format (latency histograms and cache ratios)."""
+    if api.cache is not None:
+        metrics.record_cache("api", api.cache.stats())
+    if CHAT_CACHE is not None:
+        metrics.record_cache("chat", CHAT_CACHE.stats())
+    if api.single_flight is not None:
+        coalesce = api.single_flight.stats()
+        metrics.record_cache("api_coalesce", {"hits": coalesce["coalesced"], "misses": coalesce["leaders"]})
+    fast_path = FAST_ROUTER.stats()
+    metrics.record_cache("fast_path", {"hits": fast_path["hits"],
+                                       "misses": fast_path["requests"] - fast_path["hits"]})
+    if LEARNED_ROUTER is not None:
+        metrics.record_cache("learned_router", {"hits": LEARNED_ROUTER.routed,
+                                                "misses": LEARNED_ROUTER.requests - LEARNED_ROUTER.routed})
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # APPLICATION SETUP
 # ═══════════════════════════════════════════════════════════════════════
 
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """Open shared resources on startup and release them on shutdown."""
+    await api.open()
+    if OLLAMA_WARMER is not None:
+        # Serve only once the model is loaded, so no request pays the cold start
+        await OLLAMA_WARMER.start(wait=OLLAMA_PRELOAD_TIMEOUT)
+    try:
+        yield
+    finally:
+        if OLLAMA_WARMER is not None:
+            await OLLAMA_WARMER.stop()
+        await api.close()
+        await llm_clients.close()
+
+
 def create_app() -> Starlette:
-    """Create the combined Starlette app with /chat, /health, and MCP SSE routes."""
+    """Create the combined Starlette app with /chat, /chat/stream, /health, /metrics, and MCP SSE routes."""
 
     # Get the MCP SSE app (handles /sse and /messages endpoints)
     mcp_app = mcp.sse_app()
 
     routes = [
         Route("/chat", chat_endpoint, methods=["POST"]),
+        Route("/chat/stream", chat_stream_endpoint, methods=["POST"]),
+        Route("/chat/cache/invalidate", chat_cache_invalidate_endpoint, methods=["POST"]),
         Route("/health", health_endpoint, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
         # Mount the MCP SSE app at /mcp for MCP protocol clients
         Mount("/mcp", app=mcp_app),
     ]
 
-    app = Starlette(routes=routes)
+    app = Starlette(routes=routes, lifespan=lifespan)
 
     # Add CORS middleware so the PHP frontend can call /chat
     app.add_middleware(
@@ -1000,6 +1652,7 @@ if __name__ == "__main__":
     logger.info(f"  LLM Model:   {LLM_MODEL}")
     logger.info(f"  Chat:        http://{MCP_HOST}:{MCP_PORT}/chat")
     logger.info(f"  Health:      http://{MCP_HOST}:{MCP_PORT}/health")
+    logger.info(f"  Metrics:     http://{MCP_HOST}:{MCP_PORT}/metrics")
     logger.info(f"  MCP SSE:     http://{MCP_HOST}:{MCP_PORT}/mcp/sse")
 
     app = create_app()
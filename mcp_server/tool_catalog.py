@@ -0,0 +1,137 @@
+"""
+Precomputed tool catalog for the /chat agent loop.
+
+The OpenAI tool schemas are built once at startup together with their
+serialized size and a small search index (tool name parts, description words
+and the category keywords from TOOL_CATEGORIES). For each question the tools
+are ranked and only the best matches that fit a token budget are sent to the
+LLM; when nothing matches, the full set is sent as before.
+
+Token counts are estimates (about 4 characters per token), which is good
+enough to compare prompt sizes without pulling in a tokenizer.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Words that appear in most tool descriptions and carry no signal
+_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "from", "this", "that", "are", "was", "has",
+    "its", "into", "one", "two", "all", "any", "get", "set", "given", "word",
+    "words", "text", "string", "language", "english", "telugu", "hindi",
+    "gujarati", "malayalam", "return", "returns", "true", "false", "args",
+    "whether", "check", "what", "which", "how", "does", "can", "you", "please",
+})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _terms(text: str) -> set[str]:
+    terms = set()
+    for w in _WORD_RE.findall(text.lower()):
+        if len(w) < 3 or w in _STOPWORDS:
+            continue
+        terms.add(w)
+        if len(w) > 4 and w.endswith("s"):
+            terms.add(w[:-1])
+    return terms
+
+
+@dataclass
+class CatalogEntry:
+    name: str
+    category: str
+    schema: dict
+    tokens: int
+    name_terms: frozenset
+    description_terms: frozenset
+
+
+class ToolCatalog:
+    """OpenAI tool schemas plus the index used to pick a subset per question."""
+
+    # Score weights
+    CATEGORY_KEYWORD = 3
+    NAME_TERM = 2
+    DESCRIPTION_TERM = 1
+
+    def __init__(self, tools: list[dict], categories: dict):
+        self.categories = categories
+        tool_to_category = {t: cat for cat, info in categories.items() for t in info["tools"]}
+        self.entries: list[CatalogEntry] = []
+        for schema in tools:
+            fn = schema["function"]
+            self.entries.append(CatalogEntry(
+                name=fn["name"],
+                category=tool_to_category.get(fn["name"], ""),
+                schema=schema,
+                tokens=estimate_tokens(json.dumps(schema, ensure_ascii=False)),
+                name_terms=frozenset(_terms(fn["name"].replace("_", " "))),
+                description_terms=frozenset(_terms(fn.get("description") or "")),
+            ))
+        self.tools = [e.schema for e in self.entries]
+        self.total_tokens = sum(e.tokens for e in self.entries)
+        # tool name → {parameter: default} from the JSON schemas
+        self.defaults = {
+            e.name: {param: spec["default"]
+                     for param, spec in (e.schema["function"].get("parameters") or {}).get("properties", {}).items()
+                     if isinstance(spec, dict) and "default" in spec}
+            for e in self.entries
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.defaults
+
+    def matched_categories(self, question: str) -> set[str]:
+        q = question.lower()
+        return {cat for cat, info in self.categories.items()
+                if any(kw in q for kw in info["keywords"])}
+
+    def rank(self, question: str) -> list[tuple[int, CatalogEntry]]:
+        """Tools with a positive score for `question`, best first."""
+        categories = self.matched_categories(question)
+        terms = _terms(question)
+        scored = []
+        for entry in self.entries:
+            score = (self.CATEGORY_KEYWORD * (entry.category in categories)
+                     + self.NAME_TERM * len(terms & entry.name_terms)
+                     + self.DESCRIPTION_TERM * len(terms & entry.description_terms))
+            if score > 0:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: -item[0])  # stable: ties keep registration order
+        return scored
+
+    def select(self, question: str, top_k: int, token_budget: int) -> tuple[list[dict], dict]:
+        """Pick up to `top_k` ranked tools whose schemas fit in `token_budget`.
+
+        Falls back to the full catalog when no tool scores above zero.
+        Returns (tools, info) where info describes the choice for logging.
+        """
+        chosen, tokens = [], 0
+        for _score, entry in self.rank(question):
+            if len(chosen) >= top_k:
+                break
+            if tokens + entry.tokens > token_budget:
+                continue
+            chosen.append(entry)
+            tokens += entry.tokens
+
+        if not chosen:
+            return self.tools, {
+                "selected": len(self.entries), "total": len(self.entries),
+                "tool_tokens": self.total_tokens, "saved_tokens": 0, "fallback": True,
+            }
+        return [e.schema for e in chosen], {
+            "selected": len(chosen), "total": len(self.entries),
+            "tool_tokens": tokens, "saved_tokens": self.total_tokens - tokens, "fallback": False,
+            "tools": [e.name for e in chosen],
+        }
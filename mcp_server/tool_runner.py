@@ -0,0 +1,242 @@
+"""
+Concurrent execution of the tool calls from one LLM response.
+
+When the model returns several tool calls at once they are usually an
+independent fan-out (check five candidate words, compare three pairs), so
+they run concurrently under a semaphore. A call whose arguments refer to an
+earlier call in the same response (by its call id, or by that tool's name as
+in "{{reverse_text}}" or "<result of reverse_text>") waits for it. When the
+argument is nothing but the reference, the earlier result is substituted in.
+Results are returned in the original call order.
+
+ToolMemo wraps the execute function for one /chat request: a call with the
+same tool name and arguments as an earlier (or concurrent) one in that
+request reuses its result instead of calling api.php again.
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+# Left over once a reference is removed from an argument that only held the reference
+_REFERENCE_FILLER = re.compile(r"[\s{}<>$\[\]()\"'.:]|\b(?:result|output|of|from|the)\b", re.IGNORECASE)
+
+
+@dataclass
+class ToolCall:
+    id: str
+    name: str
+    arguments: Optional[dict]
+    error: Optional[str] = None     # set when the arguments could not be parsed
+    depends_on: list[int] = field(default_factory=list)
+    result: Optional[str] = None
+    seconds: float = 0.0
+
+    @classmethod
+    def from_openai(cls, tool_call) -> "ToolCall":
+        """From an OpenAI tool call object, or the equivalent dict (streamed responses)."""
+        if isinstance(tool_call, dict):
+            call_id, fn = tool_call.get("id", ""), tool_call.get("function", {})
+            name, raw_arguments = fn.get("name", ""), fn.get("arguments")
+        else:
+            call_id, name, raw_arguments = tool_call.id, tool_call.function.name, tool_call.function.arguments
+        try:
+            arguments = json.loads(raw_arguments or "{}")
+            if not isinstance(arguments, dict):
+                raise ValueError("tool arguments must be a JSON object")
+            return cls(call_id, name, arguments)
+        except ValueError as e:
+            return cls(call_id, name, None, error=f"Invalid tool arguments: {e}")
+
+
+def _references(value: str, call: ToolCall) -> bool:
+    return (bool(call.id) and call.id in value) or call.name in value
+
+
+def find_dependencies(calls: list[ToolCall]) -> None:
+    """Fill `depends_on` with the indexes of earlier calls each call refers to."""
+    for i, call in enumerate(calls):
+        if not call.arguments:
+            continue
+        strings = [v for v in call.arguments.values() if isinstance(v, str)]
+        for j in range(i):
+            if any(_references(s, calls[j]) for s in strings):
+                call.depends_on.append(j)
+
+
+def result_value(result: str) -> Any:
+    """The `result` field of a tool's JSON output, or the raw text."""
+    try:
+        parsed = json.loads(result)
+    except (TypeError, ValueError):
+        return result
+    if isinstance(parsed, dict):
+        return parsed.get("result", parsed.get("data", parsed))
+    return parsed
+
+
+def resolve_references(call: ToolCall, calls: list[ToolCall]) -> dict:
+    """Arguments with whole-value references replaced by the earlier results."""
+    resolved = dict(call.arguments)
+    for key, value in resolved.items():
+        if not isinstance(value, str):
+            continue
+        for j in call.depends_on:
+            dep = calls[j]
+            if not _references(value, dep):
+                continue
+            rest = value.replace(dep.id, "") if dep.id else value
+            rest = rest.replace(dep.name, "")
+            if not _REFERENCE_FILLER.sub("", rest):
+                dep_value = result_value(dep.result)
+                resolved[key] = dep_value if isinstance(dep_value, str) else json.dumps(dep_value, ensure_ascii=False)
+            break
+    return resolved
+
+
+class ToolMemo:
+    """Per-request memo of tool results keyed by tool name and arguments.
+
+    Tools in `skip` (non-deterministic ones) always run. Results rejected by
+    `keep` (e.g. errors) are not reused, so a later identical call retries.
+    `defaults` (tool name → {parameter: default}) makes a call that spells out
+    a default argument match one that leaves it out. With `reuse=False` only
+    prefetched results are served from the memo.
+
+    prefetch() starts a call speculatively; if the LLM later asks for the
+    same call it gets the (possibly still running) prefetch. finish_prefetches()
+    cancels the ones nobody asked for.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, dict], Awaitable[str]],
+        skip: Iterable[str] = (),
+        keep: Optional[Callable[[str], bool]] = None,
+        defaults: Optional[dict[str, dict]] = None,
+        reuse: bool = True,
+    ):
+        self._execute = execute
+        self._skip = frozenset(skip)
+        self._keep = keep
+        self._defaults = defaults or {}
+        self._reuse = reuse
+        self._results: dict[tuple, asyncio.Future] = {}
+        self._prefetched: dict[tuple, asyncio.Future] = {}
+        self.calls = 0
+        self.duplicates: Counter = Counter()  # tool name → reused results
+        self.prefetch_hits = 0
+
+    def key(self, name: str, arguments: dict) -> tuple:
+        arguments = {**self._defaults.get(name, {}), **arguments}
+        return name, json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+    def prefetch(self, name: str, arguments: dict) -> bool:
+        """Start `name(arguments)` now; False if skipped or already known."""
+        key = self.key(name, arguments)
+        if name in self._skip or key in self._results:
+            return False
+        future = asyncio.ensure_future(self._execute(name, arguments))
+        self._results[key] = self._prefetched[key] = future
+        return True
+
+    async def __call__(self, name: str, arguments: dict) -> str:
+        self.calls += 1
+        if name in self._skip:
+            return await self._execute(name, arguments)
+        key = self.key(name, arguments)
+        future = self._results.get(key)
+        if future is not None:
+            prefetched = self._prefetched.pop(key, None) is not None
+            try:
+                # shield: a cancelled duplicate must not cancel the call it is sharing
+                result = await asyncio.shield(future)
+            except Exception:
+                if not prefetched:
+                    raise
+                result = None
+            if not prefetched:
+                self.duplicates[name] += 1
+                return result
+            if result is not None and (self._keep is None or self._keep(result)):
+                self.prefetch_hits += 1
+                return result
+            # A failed prefetch is not trusted: run the call for real
+            if self._results.get(key) is future:
+                del self._results[key]
+        elif not self._reuse:
+            return await self._execute(name, arguments)
+
+        future = asyncio.ensure_future(self._execute(name, arguments))
+        self._results[key] = future
+        try:
+            result = await asyncio.shield(future)
+        except BaseException as e:
+            if self._results.get(key) is future:
+                del self._results[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()  # the request is going away; don't leave the call running
+            raise
+        rejected = self._keep is not None and not self._keep(result)
+        if (rejected or not self._reuse) and self._results.get(key) is future:
+            del self._results[key]
+        return result
+
+    def finish_prefetches(self) -> int:
+        """Cancel prefetches the LLM never asked for; returns how many there were."""
+        unused = list(self._prefetched.values())
+        self._prefetched.clear()
+        for future in unused:
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled():
+                future.exception()  # mark any error as retrieved
+        return len(unused)
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(self.duplicates.values())
+
+
+async def run_tool_calls(
+    calls: list[ToolCall],
+    execute: Callable[[str, dict], Awaitable[str]],
+    concurrency: int = 4,
+    on_start: Optional[Callable[[ToolCall, dict], Awaitable[None]]] = None,
+    on_done: Optional[Callable[[ToolCall], Awaitable[None]]] = None,
+) -> list[ToolCall]:
+    """Run `calls` concurrently (dependents after their dependencies).
+    Each call's `result` and `seconds` are filled in; returns `calls`.
+    `on_start(call, arguments)` and `on_done(call)` are awaited around each call."""
+    find_dependencies(calls)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = [asyncio.Event() for _ in calls]
+
+    async def run(i: int, call: ToolCall) -> None:
+        try:
+            for j in call.depends_on:
+                await done[j].wait()
+            if call.error:
+                call.result = f"Error executing tool: {call.error}"
+            else:
+                arguments = resolve_references(call, calls) if call.depends_on else call.arguments
+                async with semaphore:
+                    if on_start is not None:
+                        await on_start(call, arguments)
+                    start = time.monotonic()
+                    try:
+                        call.result = await execute(call.name, arguments)
+                    except Exception as e:
+                        call.result = f"Error executing tool: {e}"
+                    call.seconds = time.monotonic() - start
+            if on_done is not None:
+                await on_done(call)
+        finally:
+            done[i].set()
+
+    await asyncio.gather(*(run(i, call) for i, call in enumerate(calls)))
+    return calls
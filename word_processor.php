@@ -1495,9 +1495,11 @@ class wordProcessor
 	    $logicalCharacters = $this->getLogicalChars2();
 	    $baseCharacters = array();
 
+	    // A throwaway processor per character, so $this keeps its own word
+	    // (api.php reuses one processor for every op on a word in a batch)
 	    foreach ($logicalCharacters as $character) {
-	        $this->setWord($character);
-	        $result = $this->getCodePoints();
+	        $charProcessor = new wordProcessor($character, $this->language);
+	        $result = $charProcessor->getCodePoints();
 	        $codePoint = $result[0][0];
             $char = mb_chr($codePoint, "utf8");
             array_push($baseCharacters, $char);